@@ -0,0 +1,186 @@
+"""Copy the data of one cruise from the Andes database to a local SQLite file
+
+The resulting file can be used as input with ``AndesHelper(sqlite_file=...)``.
+
+Usage::
+
+    python -m andes_migrate.andes_extract IML-2024-008 ./IML-2024-008.sqlite
+
+"""
+import argparse
+import logging
+import os
+import sqlite3
+from itertools import islice
+
+from andes_migrate.andes_helper import AndesHelper
+from andes_migrate.sqlite_utils import (
+    EXTRACT_META_TABLE,
+    create_table,
+    description_column_types,
+    insert_rows,
+)
+
+_SETS = (
+    "SELECT shared_models_set.id FROM shared_models_set "
+    "WHERE shared_models_set.cruise_id=?"
+)
+_CATCHES = (
+    "SELECT ecosystem_survey_catch.id FROM ecosystem_survey_catch "
+    f"WHERE ecosystem_survey_catch.set_id IN ({_SETS})"
+)
+_BASKETS = (
+    "SELECT ecosystem_survey_basket.id FROM ecosystem_survey_basket "
+    f"WHERE ecosystem_survey_basket.catch_id IN ({_CATCHES})"
+)
+_SPECIMENS = (
+    "SELECT ecosystem_survey_specimen.id FROM ecosystem_survey_specimen "
+    f"WHERE ecosystem_survey_specimen.basket_id IN ({_BASKETS})"
+)
+
+# table -> filter selecting the rows of one cruise (the cruise id is the only parameter)
+CRUISE_TABLES = {
+    "shared_models_cruise": "shared_models_cruise.id=?",
+    "shared_models_set": "shared_models_set.cruise_id=?",
+    "shared_models_set_operations": f"shared_models_set_operations.set_id IN ({_SETS})",
+    "ecosystem_survey_catch": f"ecosystem_survey_catch.set_id IN ({_SETS})",
+    "ecosystem_survey_basket": f"ecosystem_survey_basket.catch_id IN ({_CATCHES})",
+    "ecosystem_survey_specimen": f"ecosystem_survey_specimen.basket_id IN ({_BASKETS})",
+    "ecosystem_survey_observation": f"ecosystem_survey_observation.specimen_id IN ({_SPECIMENS})",
+}
+
+# small lookup tables, copied whole
+REFERENCE_TABLES = [
+    "shared_models_auxiliaryequipment",
+    "shared_models_geartype",
+    "shared_models_observationtype",
+    "shared_models_observationtypecategory",
+    "shared_models_operation",
+    "shared_models_relativeabundancecategory",
+    "shared_models_setresult",
+    "shared_models_sizeclass",
+    "shared_models_species",
+    "shared_models_station",
+    "shared_models_stratificationtype",
+    "shared_models_vessel",
+]
+
+
+def _copy_table(
+    andes_db: AndesHelper,
+    con: sqlite3.Connection,
+    table: str,
+    where: str | None = None,
+    params: tuple = (),
+    batch_size: int = 5000,
+) -> int:
+    with andes_db.cursor() as cur:
+        cur.execute(f"SELECT * FROM {table} LIMIT 0")
+        columns = [desc[0] for desc in cur.description]
+        types = description_column_types(cur.description)
+        cur.fetchall()
+        if andes_db.sqlite:
+            # sqlite3 does not describe the column types, copy the declared ones
+            cur.execute(f'PRAGMA table_info("{table}")')
+            declared = {row[1]: row[2] for row in cur.fetchall()}
+            types = [declared.get(col, "") for col in columns]
+
+    query = f"SELECT * FROM {table}"
+    if where:
+        query += f" WHERE {where}"
+
+    # rows are streamed, the types missing from the source are inferred from the first batch
+    rows = andes_db.iter_query(query, params, batch_size=batch_size)
+    first_batch = list(islice(rows, batch_size))
+    primary_key = "id" if "id" in columns else None
+    create_table(con, table, columns, first_batch, primary_key=primary_key, types=types)
+    count = insert_rows(con, table, columns, first_batch)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        count += insert_rows(con, table, columns, batch)
+    return count
+
+
+def extract_cruise(
+    andes_db: AndesHelper,
+    mission_number: str,
+    sqlite_file: str,
+    overwrite: bool = False,
+    batch_size: int = 5000,
+) -> dict[str, int]:
+    """Copy all the rows of one cruise to a new SQLite file
+
+    The cruise, its sets, set operations, catches, baskets, specimens and observations are copied,
+    along with the shared_models lookup tables used by the migration.
+
+    :param andes_db: the source Andes database
+    :type andes_db: AndesHelper
+    :param mission_number: the cruise mission number (shared_models_cruise.mission_number)
+    :type mission_number: str
+    :param sqlite_file: the output SQLite file
+    :type sqlite_file: str
+    :param overwrite: replace the output file if it exists, defaults to False
+    :type overwrite: bool, optional
+    :param batch_size: number of rows fetched and inserted at a time, defaults to 5000
+    :type batch_size: int, optional
+    :return: the number of rows copied per table
+    :rtype: dict[str, int]
+    """
+    logger = logging.getLogger(__name__)
+
+    result = andes_db.execute_query(
+        "SELECT shared_models_cruise.id "
+        "FROM shared_models_cruise "
+        "WHERE shared_models_cruise.mission_number=?",
+        (mission_number,),
+    )
+    if len(result) != 1:
+        logger.error("Expected one cruise %s, found %s", mission_number, len(result))
+        raise ValueError
+    cruise_id = result[0][0]
+
+    if os.path.exists(sqlite_file):
+        if not overwrite:
+            raise ValueError(f"{sqlite_file} already exists")
+        os.remove(sqlite_file)
+
+    counts = {}
+    con = sqlite3.connect(sqlite_file)
+    try:
+        for table in REFERENCE_TABLES:
+            counts[table] = _copy_table(andes_db, con, table, batch_size=batch_size)
+            logger.info("Copied %s rows from %s", counts[table], table)
+        for table, where in CRUISE_TABLES.items():
+            counts[table] = _copy_table(
+                andes_db, con, table, where, (cruise_id,), batch_size=batch_size
+            )
+            logger.info("Copied %s rows from %s", counts[table], table)
+        # AndesHelper returns the timestamp columns of the extracts as datetime, like MySQL
+        con.execute(f"CREATE TABLE {EXTRACT_META_TABLE} (key TEXT PRIMARY KEY, value TEXT)")
+        con.execute(f"INSERT INTO {EXTRACT_META_TABLE} VALUES ('mission_number', ?)", (mission_number,))
+        con.commit()
+    except Exception as exc:
+        con.close()
+        os.remove(sqlite_file)
+        raise exc
+    con.close()
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Copy one Andes cruise to a local SQLite file"
+    )
+    parser.add_argument("mission_number", help="cruise mission number, e.g. IML-2024-008")
+    parser.add_argument("sqlite_file", help="output SQLite file")
+    parser.add_argument("--overwrite", action="store_true", help="replace an existing file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    counts = extract_cruise(
+        AndesHelper(), args.mission_number, args.sqlite_file, overwrite=args.overwrite
+    )
+    for table, count in counts.items():
+        print(f"{table}: {count}")
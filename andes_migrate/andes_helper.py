@@ -1,42 +1,521 @@
 import os
 import logging
+import re
+import shutil
 import sqlite3
-from typing import List
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Sequence
 import mysql.connector
 
-from mysql.connector.errors import ProgrammingError
+from mysql.connector.errors import (
+    InterfaceError,
+    OperationalError,
+    PoolError,
+    ProgrammingError,
+)
+from mysql.connector.pooling import CNX_POOL_MAXSIZE, MySQLConnectionPool
 from dotenv import load_dotenv
 
+from andes_migrate.query_profiler import QueryProfiler
+from andes_migrate.sqlite_utils import is_andes_extract
+
 load_dotenv()
 
+# (table, column) filtered on by the migration queries, indexed when missing on SQLite files
+SQLITE_INDEXES = [
+    ("shared_models_set", "cruise_id"),
+    ("ecosystem_survey_catch", "set_id"),
+    ("ecosystem_survey_basket", "catch_id"),
+    ("ecosystem_survey_specimen", "basket_id"),
+    ("ecosystem_survey_observation", "specimen_id"),
+    ("ecosystem_survey_observation", "observation_type_id"),
+]
+
+# read-oriented settings for SQLite files
+SQLITE_PRAGMAS = {
+    "mmap_size": 256 * 1024 * 1024,
+    # negative values are in KiB
+    "cache_size": -64 * 1024,
+    "temp_store": "MEMORY",
+}
+
+# AndesHelper.shared() instances, per class
+_shared_instances: dict = {}
+_shared_lock = threading.Lock()
+
+
+def create_sqlite_indexes(con: sqlite3.Connection) -> list[str]:
+    """Create the indexes of ``SQLITE_INDEXES`` missing from the SQLite file
+
+    A column is considered indexed if it is the first column of any index on its table.
+
+    :param con: connection to the SQLite file
+    :type con: sqlite3.Connection
+    :return: the newly indexed columns, as table.column
+    :rtype: list[str]
+    """
+    logger = logging.getLogger(__name__)
+    created = []
+    for table, column in SQLITE_INDEXES:
+        exists = con.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,)
+        ).fetchall()
+        if not exists:
+            continue
+        indexed = False
+        for index in con.execute(f'PRAGMA index_list("{table}")').fetchall():
+            # index_info rows: (seqno, cid, name)
+            index_info = con.execute(f'PRAGMA index_info("{index[1]}")').fetchall()
+            if any(info[0] == 0 and info[2] == column for info in index_info):
+                indexed = True
+                break
+        if indexed:
+            continue
+        try:
+            con.execute(
+                f'CREATE INDEX IF NOT EXISTS "{table}_{column}_idx" ON "{table}" ("{column}")'
+            )
+        except sqlite3.OperationalError as exc:
+            # e.g. a read-only file
+            logger.warning("Could not create index on %s.%s: %s", table, column, exc)
+        else:
+            created.append(f"{table}.{column}")
+    if created:
+        con.commit()
+        logger.info("Created missing indexes on %s", ", ".join(created))
+    return created
+
+
+def qmark_to_format(query: str) -> str:
+    """Convert ``?`` placeholders to the ``%s`` style used by MySQL client-side cursors
+
+    Literal ``%`` are escaped, quoted strings and identifiers are left as is.
+
+    :param query: SQL query with ``?`` placeholders
+    :type query: str
+    :return: SQL query with ``%s`` placeholders
+    :rtype: str
+    """
+
+    def _replace(match: re.Match) -> str:
+        if match.group(1):
+            return match.group(1).replace("%", "%%")
+        return "%s" if match.group(0) == "?" else "%%"
+
+    return re.sub(r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`)|\?|%""", _replace, query)
+
 
 class AndesHelper:
-    def __init__(self, sqlite_file=None):
+    """Helper to query an Andes database (MySQL or an SQLite copy)
+
+    The connection is only made on the first query. :meth:`shared` returns a
+    single instance to share between all the table objects.
+
+    Queries can be parameterized by using ``?`` placeholders and passing the
+    values in ``params``. Parameterized queries are prepared once per query
+    template and re-used for every subsequent call with the same template:
+
+        - MySQL: one prepared cursor is kept per template (bounded LRU).
+        - SQLite: the ``sqlite3`` statement cache is sized accordingly.
+
+    Query results can optionally be cached (``result_cache_size`` > 0). The cache is
+    a LRU keyed on the whitespace-normalized query and its parameters.
+    When reading from a live cruise, call :meth:`invalidate` to drop stale results.
+
+    With ``pool_size`` > 0 (MySQL only), queries are run on connections borrowed
+    from a connection pool, with a new cursor for every call (see :meth:`cursor`).
+    This makes :meth:`execute_query` safe to call from many threads.
+    Pooled connections are reset when returned to the pool, so
+    statements are prepared on every call in this mode.
+
+    :param sqlite_file: path to an Andes SQLite file, defaults to None (MySQL)
+    :type sqlite_file: str, optional
+    :param max_prepared_statements: number of prepared statements to keep, defaults to 128
+    :type max_prepared_statements: int, optional
+    :param result_cache_size: number of query results to keep, defaults to 0 (no cache)
+    :type result_cache_size: int, optional
+    :param profiler: records the timing of the executed queries, defaults to None
+    :type profiler: QueryProfiler, optional
+    :param pool_size: number of pooled MySQL connections, defaults to 0 (single connection)
+    :type pool_size: int, optional
+    :param pool_timeout: time to wait for a free pooled connection; unit seconds, defaults to 60
+    :type pool_timeout: float, optional
+    :param sqlite_indexes: create the missing indexes listed in ``SQLITE_INDEXES`` in the SQLite file, defaults to True
+    :type sqlite_indexes: bool, optional
+    :param working_copy: work on a temporary copy of the SQLite file, leaving the original untouched, defaults to False
+    :type working_copy: bool, optional
+    """
+
+    def __init__(
+        self,
+        sqlite_file=None,
+        max_prepared_statements: int = 128,
+        result_cache_size: int = 0,
+        profiler: QueryProfiler | None = None,
+        pool_size: int = 0,
+        pool_timeout: float = 60,
+        sqlite_indexes: bool = True,
+        working_copy: bool = False,
+    ):
         self.logger = logging.getLogger(__name__)
         # datime format on MS access DB
         self.datetime_strfmt = "%Y-%m-%d %H:%M:%S"
-        self.sqlite: bool
+        self.max_prepared_statements = max_prepared_statements
+        # query template -> (template, prepared cursor), MySQL only
+        self._prepared_statements: OrderedDict = OrderedDict()
+        # (normalized query, params) -> result rows
+        self.result_cache_size = result_cache_size
+        self._result_cache: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.profiler = profiler
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self._pool: MySQLConnectionPool | None = None
+        self._pool_slots: threading.BoundedSemaphore | None = None
+        self._working_copy: str | None = None
 
-        if sqlite_file:
-            self.sqlite = True
-            self.con = sqlite3.connect(sqlite_file)
+        self.sqlite = bool(sqlite_file)
+        self.sqlite_file = sqlite_file
+        self.sqlite_indexes = sqlite_indexes
+        self.working_copy = working_copy
+        if self.sqlite and pool_size:
+            raise ValueError("Connection pooling is only available for MySQL")
+        if pool_size > CNX_POOL_MAXSIZE:
+            raise ValueError(f"pool_size cannot be larger than {CNX_POOL_MAXSIZE}")
 
-            print("Successfully connected to SQlite file")
+        # the connection is only made on first use, see _connect()
+        self._con = None
+        self._cur = None
+        self._connect_lock = threading.Lock()
 
-        else:
-            self.sqlite = False
-            self.con = mysql.connector.connect(
-                host=os.getenv("ANDES_HOST", "la-tele-du-samedi.ent.dfo-mpo.ca"),
-                port=int(os.getenv("ANDES_PORT", 4321)),
-                database=os.getenv("ANDES_DB_NAME", "BD de BikiniBottom"),
-                user=os.getenv("ANDES_DB_USERNAME", "Bob Eponge"),
-                password=os.getenv("ANDES_DB_USERPASS", "SQUIDWARD"),
+    @property
+    def con(self):
+        """The shared connection, connecting on first use (None in pooled mode)"""
+        if self._con is None and not self.pool_size:
+            self._connect()
+        return self._con
+
+    @con.setter
+    def con(self, con):
+        self._con = con
+
+    @property
+    def cur(self):
+        """The shared cursor, connecting on first use (None in pooled mode)"""
+        if self._cur is None and not self.pool_size:
+            self._connect()
+        return self._cur
+
+    @cur.setter
+    def cur(self, cur):
+        self._cur = cur
+
+    def is_connected(self) -> bool:
+        """True if a connection (or the connection pool) was made"""
+        return self._con is not None or self._pool is not None
+
+    def _connect(self):
+        with self._connect_lock:
+            if self.is_connected():
+                return
+
+            if self.sqlite:
+                sqlite_file = self.sqlite_file
+                if self.working_copy:
+                    fd, self._working_copy = tempfile.mkstemp(suffix=".sqlite")
+                    os.close(fd)
+                    shutil.copyfile(sqlite_file, self._working_copy)
+                    self.logger.info("Using working copy %s of %s", self._working_copy, sqlite_file)
+                    sqlite_file = self._working_copy
+                # the timestamp columns of the andes_extract files are returned as datetime, like on MySQL
+                con = sqlite3.connect(
+                    sqlite_file,
+                    cached_statements=self.max_prepared_statements,
+                    detect_types=sqlite3.PARSE_DECLTYPES if is_andes_extract(sqlite_file) else 0,
+                )
+
+                print("Successfully connected to SQlite file")
+                if self.sqlite_indexes:
+                    create_sqlite_indexes(con)
+                for pragma, value in SQLITE_PRAGMAS.items():
+                    con.execute(f"PRAGMA {pragma}={value}")
+
+            elif self.pool_size:
+                self._pool_slots = threading.BoundedSemaphore(self.pool_size)
+                self._pool = MySQLConnectionPool(
+                    pool_name="andes",
+                    pool_size=self.pool_size,
+                    pool_reset_session=True,
+                    **self._mysql_connection_args(),
+                )
+                # there is no shared connection in pooled mode
+                print(
+                    f"Successfully created a pool of {self.pool_size} connections to MySQL Database",
+                    os.getenv("ANDES_HOST"),
+                    os.getenv("ANDES_PORT"),
+                )
+                return
+
+            else:
+                con = mysql.connector.connect(**self._mysql_connection_args())
+                print("Successfully connected to MySQL Database",os.getenv("ANDES_HOST"),os.getenv("ANDES_PORT") )
+
+            self._cur = con.cursor()
+            self._con = con
+
+    @classmethod
+    def shared(cls, **kwargs) -> "AndesHelper":
+        """The instance shared by default, created on first call
+
+        :param kwargs: arguments used to create the shared instance (ignored afterwards)
+        :return: the shared instance
+        :rtype: AndesHelper
+        """
+        with _shared_lock:
+            if cls not in _shared_instances:
+                _shared_instances[cls] = cls(**kwargs)
+            return _shared_instances[cls]
+
+    def close(self):
+        """Close the connection(s), and remove the SQLite working copy if any"""
+        if self._con is not None:
+            self._con.close()
+            self._con = None
+            self._cur = None
+        self._pool = None
+        for _, cur in self._prepared_statements.values():
+            cur.close()
+        self._prepared_statements.clear()
+        if self._working_copy is not None:
+            os.remove(self._working_copy)
+            self._working_copy = None
+
+    @staticmethod
+    def _mysql_connection_args() -> dict:
+        return {
+            "host": os.getenv("ANDES_HOST", "la-tele-du-samedi.ent.dfo-mpo.ca"),
+            "port": int(os.getenv("ANDES_PORT", 4321)),
+            "database": os.getenv("ANDES_DB_NAME", "BD de BikiniBottom"),
+            "user": os.getenv("ANDES_DB_USERNAME", "Bob Eponge"),
+            "password": os.getenv("ANDES_DB_USERPASS", "SQUIDWARD"),
+        }
+
+    @contextmanager
+    def _pooled_connection(self):
+        """Borrow a connection from the pool, waiting for one to be free
+
+        The pool checks the connection is alive before handing it out, and reconnects it otherwise.
+        """
+        if self._pool is None:
+            self._connect()
+        if not self._pool_slots.acquire(timeout=self.pool_timeout):
+            raise PoolError(
+                f"No pooled connection available after {self.pool_timeout} seconds"
             )
-            print("Successfully connected to MySQL Database",os.getenv("ANDES_HOST"),os.getenv("ANDES_PORT") )
+        try:
+            con = self._pool.get_connection()
+            try:
+                yield con
+            finally:
+                # returns the connection to the pool
+                con.close()
+        finally:
+            self._pool_slots.release()
+
+    @contextmanager
+    def cursor(self, prepared: bool = False):
+        """Context-managed cursor, closed on exit
+
+        In pooled mode, the cursor is created on a connection borrowed from the pool
+        for the duration of the ``with`` block. Otherwise the cursor is created
+        on the single shared connection (which is not thread-safe).
+
+        :param prepared: create a prepared-statement cursor (MySQL only), defaults to False
+        :type prepared: bool, optional
+        """
+        if self.pool_size:
+            with self._pooled_connection() as con:
+                cur = con.cursor(prepared=prepared)
+                try:
+                    yield cur
+                finally:
+                    cur.close()
+        else:
+            if self.sqlite:
+                cur = self.con.cursor()
+            else:
+                cur = self.con.cursor(prepared=prepared)
+            try:
+                yield cur
+            finally:
+                cur.close()
 
-        self.cur = self.con.cursor()
+    @contextmanager
+    def _streaming_cursor(self):
+        """Unbuffered cursor, on a connection of its own for MySQL
+
+        MySQL cannot run other queries on a connection while a result is being streamed,
+        a dedicated connection (or a pooled one) is used to keep the shared connection available.
+        """
+        if self.sqlite:
+            cur = self.con.cursor()
+            try:
+                yield cur
+            finally:
+                cur.close()
+        elif self.pool_size:
+            with self._pooled_connection() as con:
+                cur = con.cursor()
+                try:
+                    yield cur
+                finally:
+                    # unread rows must be consumed before the connection returns to the pool
+                    con.consume_results()
+                    cur.close()
+        else:
+            con = mysql.connector.connect(**self._mysql_connection_args())
+            try:
+                yield con.cursor()
+            finally:
+                # close the socket directly, dropping unread rows of an abandoned stream
+                con.shutdown()
+
+    def iter_query(
+        self, query: str, params: Sequence | None = None, batch_size: int = 1000
+    ):
+        """Execute a query and lazily yield the result rows
+
+        Rows are fetched by batches of ``batch_size`` from an unbuffered cursor,
+        so large results are never fully held in memory.
+        Results are never cached.
+
+        :param query: the SQL query, using ``?`` placeholders if ``params`` is given
+        :type query: str
+        :param params: values bound to the query placeholders, defaults to None
+        :type params: Sequence, optional
+        :param batch_size: number of rows fetched at a time, defaults to 1000
+        :type batch_size: int, optional
+        :yield: the result rows
+        :rtype: Iterator[tuple]
+        """
+        start = time.perf_counter()
+        n_rows = 0
+        try:
+            with self._streaming_cursor() as cur:
+                try:
+                    if params is None:
+                        cur.execute(query)
+                    elif self.sqlite:
+                        cur.execute(query, tuple(params))
+                    else:
+                        cur.execute(qmark_to_format(query), tuple(params))
+                except ProgrammingError as exc:
+                    self.logger.error("Error to executing query: %s", query)
+                    raise exc
+
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    n_rows += len(rows)
+                    yield from rows
+        finally:
+            # also when the caller stops early (break, exception), with the rows fetched so far
+            if self.profiler is not None:
+                self.profiler.record(
+                    query, time.perf_counter() - start, n_rows, source="andes"
+                )
+
+    def execute_query(self, query: str, params: Sequence | None = None):
+        """Execute a query and fetch all the results
+
+        :param query: the SQL query, using ``?`` placeholders if ``params`` is given
+        :type query: str
+        :param params: values bound to the query placeholders, defaults to None
+        :type params: Sequence, optional
+        :return: list of result rows
+        :rtype: list
+        """
+        if self.result_cache_size <= 0:
+            return self._execute_query(query, params)
+
+        key = self._cache_key(query, params)
+        with self._cache_lock:
+            if key in self._result_cache:
+                self.cache_hits += 1
+                self._result_cache.move_to_end(key)
+                return list(self._result_cache[key])
+            self.cache_misses += 1
+
+        result = self._execute_query(query, params)
+        with self._cache_lock:
+            self._result_cache[key] = list(result)
+            if len(self._result_cache) > self.result_cache_size:
+                self._result_cache.popitem(last=False)
+        return result
+
+    def invalidate(self):
+        """Drop all cached query results
+
+        Needed when the Andes database can change during the run (e.g. a live cruise).
+        The hit/miss counters are kept.
+        """
+        with self._cache_lock:
+            self._result_cache.clear()
+
+    @staticmethod
+    def _cache_key(query: str, params: Sequence | None) -> tuple:
+        # collapse whitespace, except inside quoted literals
+        normalized = re.sub(
+            r"('(?:[^']|'')*')|\s+", lambda m: m.group(1) or " ", query
+        )
+        normalized = normalized.strip().rstrip(";").strip()
+        return (normalized, tuple(params) if params is not None else None)
+
+    def _execute_query(self, query: str, params: Sequence | None = None):
+        if self.profiler is None:
+            return self._run_query(query, params)
+
+        start = time.perf_counter()
+        result = self._run_query(query, params)
+        self.profiler.record(
+            query, time.perf_counter() - start, len(result), source="andes"
+        )
+        return result
+
+    def _run_query(self, query: str, params: Sequence | None = None):
+        if self.pool_size:
+            return self._run_pooled_query(query, params)
+
+        if params is None:
+            return self._execute_literal_query(query)
 
-    def execute_query(self, query: str):
+        if self.sqlite:
+            # sqlite3 keeps its own LRU of compiled statements keyed on the query string
+            res = self.cur.execute(query, tuple(params))
+            return res.fetchall()
+        else:
+            template, cur = self._get_prepared_cursor(query)
+            try:
+                # the prepared cursor only re-uses the statement when given the
+                # same string object it was prepared with
+                cur.execute(template, tuple(params))
+            except ProgrammingError as exc:
+                self.logger.error(
+                    "Error to executing query: %s with params %s", query, params
+                )
+                raise exc
+
+            else:
+                return cur.fetchall()
+
+    def _execute_literal_query(self, query: str):
         if self.sqlite:
             res = self.cur.execute(query)
             return res.fetchall()
@@ -50,6 +529,45 @@ class AndesHelper:
             else:
                 return self.cur.fetchall()
 
+    def _run_pooled_query(self, query: str, params: Sequence | None = None):
+        # a connection dropped while in the pool is reconnected by the pool itself,
+        # one dropped during the query is retried once on a fresh connection
+        for attempt in range(2):
+            try:
+                with self.cursor(prepared=params is not None) as cur:
+                    if params is None:
+                        cur.execute(query)
+                    else:
+                        cur.execute(query, tuple(params))
+                    return cur.fetchall()
+            except (InterfaceError, OperationalError) as exc:
+                if attempt:
+                    self.logger.error("Error to executing query: %s", query)
+                    raise exc
+                self.logger.warning("Lost connection (%s), retrying query", exc)
+            except ProgrammingError as exc:
+                self.logger.error(
+                    "Error to executing query: %s with params %s", query, params
+                )
+                raise exc
+
+    def _get_prepared_cursor(self, query: str) -> tuple:
+        """Return the (template, prepared cursor) for a query template (MySQL only)
+
+        Cursors are kept in a LRU bounded by ``max_prepared_statements``,
+        the least recently used one is closed (deallocating the server-side statement).
+        """
+        if query in self._prepared_statements:
+            self._prepared_statements.move_to_end(query)
+            return self._prepared_statements[query]
+
+        entry = (query, self.con.cursor(prepared=True))
+        self._prepared_statements[query] = entry
+        if len(self._prepared_statements) > self.max_prepared_statements:
+            _, (_, evicted) = self._prepared_statements.popitem(last=False)
+            evicted.close()
+        return entry
+
     def get_basket_specimens(self, basket_id: int) -> List[int]:
         """get a list of specimen_id in a basket
 
@@ -61,12 +579,42 @@ class AndesHelper:
         query = (
             "SELECT ecosystem_survey_specimen.id "
             "FROM ecosystem_survey_specimen "
-            f"WHERE ecosystem_survey_specimen.basket_id={basket_id}"
+            "WHERE ecosystem_survey_specimen.basket_id=?"
         )
-        result = self.execute_query(query)
+        result = self.execute_query(query, (basket_id,))
         to_return = [s[0] for s in result]
         return to_return
 
 
+    def get_specimens_for_baskets(
+        self, basket_ids: Iterable[int], chunk_size: int = 500
+    ) -> Dict[int, List[int]]:
+        """get the specimen_id's of many baskets at once
+
+        One query is executed per chunk of ``chunk_size`` baskets.
+
+        :param basket_ids: The andes basket id's
+        :type basket_ids: Iterable[int]
+        :param chunk_size: maximum number of baskets per query, defaults to 500
+        :type chunk_size: int, optional
+        :return: a dict of basket id -> list of andes specimen id's (empty for baskets without specimens)
+        :rtype: Dict[int, List[int]]
+        """
+        # keep the order, drop duplicates
+        basket_ids = list(dict.fromkeys(basket_ids))
+        to_return: Dict[int, List[int]] = {basket_id: [] for basket_id in basket_ids}
+        for i in range(0, len(basket_ids), chunk_size):
+            chunk = basket_ids[i : i + chunk_size]
+            query = (
+                "SELECT ecosystem_survey_specimen.basket_id, ecosystem_survey_specimen.id "
+                "FROM ecosystem_survey_specimen "
+                f"WHERE ecosystem_survey_specimen.basket_id IN ({', '.join('?' * len(chunk))}) "
+                "ORDER BY ecosystem_survey_specimen.basket_id, ecosystem_survey_specimen.id"
+            )
+            for basket_id, specimen_id in self.execute_query(query, chunk):
+                to_return[basket_id].append(specimen_id)
+        return to_return
+
+
 if __name__ == "__main__":
     andes_db = AndesHelper()
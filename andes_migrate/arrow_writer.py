@@ -0,0 +1,212 @@
+"""Write the Peche Sentinelle tables to Apache Parquet (or Arrow IPC) files
+
+One file per table, e.g.::
+
+    with ArrowTableWriter("./IML-2024-008") as output:
+        proj = ProjetMollusque(andes_db, output, ref=ref, zone=zone, no_notif=no_notif, espece=espece)
+        ...
+
+    pandas.read_parquet("./IML-2024-008/FREQ_LONG_MOLLUSQUE.parquet")
+
+Needs the ``pyarrow`` package.
+"""
+import datetime
+import os
+from decimal import Decimal
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from andes_migrate.table_writer import TableWriter, null_if_empty
+
+# PSE type of the columns of the Peche Sentinelle tables: NUMBER(5,0) -> int32, NUMBER(10,0) -> int64,
+# NUMBER -> float64, VARCHAR2 -> string, DATE -> timestamp.
+# A column has the same type in all the tables, so that the files can be joined on their keys.
+COLUMN_TYPES = {
+    **dict.fromkeys(
+        [
+            # keys
+            "COD_SOURCE_INFO", "NO_RELEVE", "IDENT_NO_TRAIT", "COD_ENG_GEN", "NO_ENGIN",
+            "COD_TYP_PANIER", "COD_ESP_GEN", "NO_MOLLUSQUE",
+            # PROJET_MOLLUSQUE
+            "ANNEE", "COD_SERIE_HIST", "COD_TYP_STRATIF",
+            # TRAIT_MOLLUSQUE
+            "COD_ZONE_GEST_MOLL", "COD_SECTEUR_RELEVE", "COD_STRATE", "NO_STATION", "COD_TYP_TRAIT",
+            "COD_RESULT_OPER", "COD_TYP_HEURE", "COD_FUSEAU_HORAIRE", "COD_METHOD_POS", "COD_TYP_ECH_TRAIT",
+            # ENGIN_MOLLUSQUE
+            "NB_PANIER",
+            # CAPTURE_MOLLUSQUE
+            "COD_DESCRIP_CAPT", "COD_TYP_MESURE", "COD_ABONDANCE_EPIBIONT", "COD_COUVERTURE_EPIBIONT",
+            # FREQ_LONG_MOLLUSQUE, BIOMETRIE_MOLLUSQUE, POIDS_BIOMETRIE
+            "COD_TYP_LONG", "COD_TECH_MESURE_LONG", "COD_SEXE", "COD_TYP_PDS",
+        ],
+        "int32",
+    ),
+    "SEQ_PECHEUR": "int64",
+    **dict.fromkeys(
+        [
+            "NO_CHARGEMENT",
+            # PROJET_MOLLUSQUE
+            "DUREE_TRAIT_VISEE", "DUREE_TRAIT_VISEE_P", "VIT_TOUAGE_VISEE", "VIT_TOUAGE_VISEE_P",
+            "DIST_CHALUTE_VISEE", "DIST_CHALUTE_VISEE_P", "RAPPORT_FUNE_VISEE", "RAPPORT_FUNE_VISEE_P",
+            # TRAIT_MOLLUSQUE
+            "LAT_DEB_TRAIT", "LAT_FIN_TRAIT", "LONG_DEB_TRAIT", "LONG_FIN_TRAIT", "LATLONG_P",
+            "DISTANCE_POS", "DISTANCE_POS_P", "VIT_TOUAGE", "VIT_TOUAGE_P", "DUREE_TRAIT", "DUREE_TRAIT_P",
+            "TEMP_FOND", "TEMP_FOND_P", "PROF_DEB", "PROF_DEB_P", "PROF_FIN", "PROF_FIN_P",
+            # ENGIN_MOLLUSQUE
+            "LONG_FUNE", "LONG_FUNE_P", "REMPLISSAGE", "REMPLISSAGE_P",
+            # CAPTURE_MOLLUSQUE
+            "FRACTION_PECH", "FRACTION_PECH_P", "FRACTION_ECH", "FRACTION_ECH_P", "NBR_CAPT", "NBR_ECH",
+            "PDS_CAPT", "PDS_CAPT_P", "PDS_ECH", "PDS_ECH_P",
+            # FREQ_LONG_MOLLUSQUE, BIOMETRIE_MOLLUSQUE, POIDS_BIOMETRIE
+            "VALEUR_LONG_MOLL", "VALEUR_LONG_MOLL_P", "VOLUME_GONADE", "VOLUME_GONADE_P",
+            "VALEUR_PDS", "VALEUR_PDS_P",
+        ],
+        "float64",
+    ),
+    **dict.fromkeys(
+        [
+            "COD_NBPC", "NO_NOTIF_IML", "CHEF_MISSION", "NOM_EQUIPE_NAVIRE", "NOM_SCIENCE_NAVIRE",
+            "REM_PROJET_MOLL", "REM_TRAIT_MOLL", "REM_ENGIN_MOLL", "REM_CAPT_MOLL", "COD_TYP_ETAT",
+        ],
+        "string",
+    ),
+    **dict.fromkeys(
+        [
+            "DATE_DEB_PROJET", "DATE_FIN_PROJET", "DATE_DEB_TRAIT", "DATE_FIN_TRAIT",
+            "HRE_DEB_TRAIT", "HRE_FIN_TRAIT", "DATE_HEURE_DEB_TRAIT", "DATE_HEURE_FIN_TRAIT",
+        ],
+        "timestamp",
+    ),
+}
+
+
+def arrow_type(type_name: str):
+    """Arrow type of a ``COLUMN_TYPES`` type name
+
+    :param type_name: e.g. "int32", "float64", "string" or "timestamp"
+    :type type_name: str
+    :return: the arrow type
+    :rtype: pa.DataType
+    """
+    if type_name == "timestamp":
+        return pa.timestamp("s")
+    return getattr(pa, type_name)()
+
+
+class ArrowTableWriter(TableWriter):
+    """Write each table to a Parquet (or Arrow IPC) file, by record batches
+
+    The schema of a table is typed from ``COLUMN_TYPES``, and inferred from the values
+    for the columns that are not listed there.
+    Rows are buffered and appended as a record batch every ``batch_size`` rows.
+
+    The files are complete once the writer is closed. :meth:`rollback` only discards
+    the rows that are not yet written.
+
+    :param output_dir: directory of the output files (``<TABLE_NAME>.parquet`` or ``.arrow``)
+    :type output_dir: str
+    :param batch_size: number of rows per record batch, defaults to 10000
+    :type batch_size: int, optional
+    :param file_format: "parquet" or "arrow" (IPC file), defaults to "parquet"
+    :type file_format: str, optional
+    :param datetime_strfmt: format of the date values, defaults to "%Y-%m-%d %H:%M:%S"
+    :type datetime_strfmt: str, optional
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        batch_size: int = 10000,
+        file_format: str = "parquet",
+        datetime_strfmt: str = "%Y-%m-%d %H:%M:%S",
+    ):
+        super().__init__()
+        if pa is None:
+            raise ValueError("The pyarrow package is needed to write Arrow/Parquet files")
+        if file_format not in ("parquet", "arrow"):
+            raise ValueError(f"Unknown file format: {file_format}")
+        self.output_dir = output_dir
+        self.batch_size = batch_size
+        self.file_format = file_format
+        self.datetime_strfmt = datetime_strfmt
+        os.makedirs(output_dir, exist_ok=True)
+
+        # table name -> buffered rows
+        self._rows: dict[str, list[dict]] = {}
+        # table name -> (schema, file writer)
+        self._writers: dict[str, tuple] = {}
+
+    def write_data(self, table_name: str, data: dict):
+        self._rows.setdefault(table_name, []).append(data)
+        if len(self._rows[table_name]) >= self.batch_size:
+            self._flush_table(table_name)
+
+    def _to_arrow_value(self, value, col_type):
+        value = null_if_empty(value)
+        if isinstance(value, str) and pa.types.is_timestamp(col_type):
+            return datetime.datetime.strptime(value, self.datetime_strfmt)
+        if isinstance(value, Decimal) and pa.types.is_floating(col_type):
+            # e.g. DECIMAL columns of MySQL, not converted by arrow to a float column
+            return float(value)
+        return value
+
+    def _schema(self, table_name: str, rows: list[dict]):
+        fields = []
+        for col in rows[0].keys():
+            if col.upper() in COLUMN_TYPES:
+                col_type = arrow_type(COLUMN_TYPES[col.upper()])
+            else:
+                col_type = pa.array([row[col] for row in rows]).type
+                if pa.types.is_null(col_type):
+                    col_type = pa.string()
+            fields.append(pa.field(col, col_type))
+        return pa.schema(fields)
+
+    def _flush_table(self, table_name: str):
+        rows = self._rows.pop(table_name, [])
+        if not rows:
+            return
+        if table_name not in self._writers:
+            schema = self._schema(table_name, rows)
+            path = os.path.join(self.output_dir, f"{table_name}.{self.file_format}")
+            if self.file_format == "parquet":
+                writer = pq.ParquetWriter(path, schema)
+            else:
+                writer = pa.ipc.new_file(path, schema)
+            self._writers[table_name] = (schema, writer)
+        schema, writer = self._writers[table_name]
+
+        columns = [
+            pa.array(
+                [self._to_arrow_value(row[field.name], field.type) for row in rows],
+                type=field.type,
+            )
+            for field in schema
+        ]
+        writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+
+    def flush(self):
+        """Append the buffered rows to the files"""
+        for table_name in list(self._rows.keys()):
+            self._flush_table(table_name)
+
+    def contains(self, table_name: str, key: dict) -> bool:
+        """Always False: the files are created by the writer, without the rows of previous runs"""
+        return False
+
+    def commit(self):
+        self.flush()
+
+    def rollback(self):
+        self._rows.clear()
+
+    def close(self):
+        """Write the buffered rows and close the files"""
+        self.flush()
+        for _, writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
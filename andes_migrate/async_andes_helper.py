@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Sequence
+
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+from andes_migrate.andes_helper import (
+    SQLITE_PRAGMAS,
+    AndesHelper,
+    create_sqlite_indexes,
+    qmark_to_format,
+)
+from andes_migrate.query_profiler import QueryProfiler
+from andes_migrate.sqlite_utils import is_andes_extract
+
+
+class AsyncAndesHelper:
+    """asyncio counterpart of :class:`~andes_migrate.andes_helper.AndesHelper`
+
+    :meth:`execute_query` has the same semantics (``?`` placeholders, returns all the rows)
+    but is awaitable, so independent queries can run concurrently::
+
+        async with AsyncAndesHelper() as andes_db:
+            results = await asyncio.gather(
+                *[andes_db.execute_query(query, (catch_id,)) for catch_id in catch_ids]
+            )
+
+    - MySQL: queries run on a pool of ``aiomysql`` connections (needs the ``aiomysql`` package).
+    - SQLite: queries run in a thread pool, each thread with its own connection.
+
+    :param sqlite_file: path to an Andes SQLite file, defaults to None (MySQL)
+    :type sqlite_file: str, optional
+    :param pool_size: maximum number of concurrent connections (or threads for SQLite), defaults to 5
+    :type pool_size: int, optional
+    :param profiler: records the timing of the executed queries, defaults to None
+    :type profiler: QueryProfiler, optional
+    :param sqlite_indexes: create the missing indexes listed in ``SQLITE_INDEXES`` in the SQLite file, defaults to True
+    :type sqlite_indexes: bool, optional
+    :param working_copy: work on a temporary copy of the SQLite file, leaving the original untouched, defaults to False
+    :type working_copy: bool, optional
+    """
+
+    def __init__(
+        self,
+        sqlite_file=None,
+        pool_size: int = 5,
+        profiler: QueryProfiler | None = None,
+        sqlite_indexes: bool = True,
+        working_copy: bool = False,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.sqlite = bool(sqlite_file)
+        self.sqlite_file = sqlite_file
+        self.pool_size = pool_size
+        self.profiler = profiler
+        self.sqlite_indexes = sqlite_indexes
+        self.working_copy = working_copy
+        self._working_copy: str | None = None
+        # set by connect(), see AndesHelper._connect()
+        self._detect_types = 0
+
+        self._pool = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._local = threading.local()
+        self._sqlite_connections: list[sqlite3.Connection] = []
+        self._sqlite_lock = threading.Lock()
+
+        if not self.sqlite and aiomysql is None:
+            raise ValueError("The aiomysql package is needed to query MySQL asynchronously")
+
+    async def connect(self):
+        """Create the connection pool (MySQL) or the thread pool (SQLite)"""
+        if self.sqlite:
+            if self.working_copy:
+                fd, self._working_copy = tempfile.mkstemp(suffix=".sqlite")
+                os.close(fd)
+                shutil.copyfile(self.sqlite_file, self._working_copy)
+                self.logger.info("Using working copy %s of %s", self._working_copy, self.sqlite_file)
+            if is_andes_extract(self._sqlite_path()):
+                self._detect_types = sqlite3.PARSE_DECLTYPES
+            if self.sqlite_indexes:
+                # done once here, rather than by each thread connection
+                con = sqlite3.connect(self._sqlite_path())
+                create_sqlite_indexes(con)
+                con.close()
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.pool_size, thread_name_prefix="andes_sqlite"
+            )
+            print("Successfully connected to SQlite file")
+        else:
+            args = AndesHelper._mysql_connection_args()
+            self._pool = await aiomysql.create_pool(
+                minsize=1,
+                maxsize=self.pool_size,
+                host=args["host"],
+                port=args["port"],
+                db=args["database"],
+                user=args["user"],
+                password=args["password"],
+                autocommit=True,
+            )
+            print("Successfully connected to MySQL Database",os.getenv("ANDES_HOST"),os.getenv("ANDES_PORT") )
+
+    async def close(self):
+        """Close all the connections"""
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            with self._sqlite_lock:
+                for con in self._sqlite_connections:
+                    con.close()
+                self._sqlite_connections = []
+        if self._working_copy is not None:
+            os.remove(self._working_copy)
+            self._working_copy = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _sqlite_path(self) -> str:
+        """The SQLite file queried: the working copy if any, the original file otherwise"""
+        return self._working_copy or self.sqlite_file
+
+    def _sqlite_connection(self) -> sqlite3.Connection:
+        # one connection per thread, only closed by close() once the threads are done
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(
+                self._sqlite_path(),
+                detect_types=self._detect_types,
+                check_same_thread=False,
+            )
+            for pragma, value in SQLITE_PRAGMAS.items():
+                con.execute(f"PRAGMA {pragma}={value}")
+            self._local.con = con
+            with self._sqlite_lock:
+                self._sqlite_connections.append(con)
+        return con
+
+    def _sqlite_query(self, query: str, params: Sequence | None):
+        con = self._sqlite_connection()
+        if params is None:
+            return con.execute(query).fetchall()
+        return con.execute(query, tuple(params)).fetchall()
+
+    async def _mysql_query(self, query: str, params: Sequence | None):
+        async with self._pool.acquire() as con:
+            async with con.cursor() as cur:
+                try:
+                    if params is None:
+                        await cur.execute(query)
+                    else:
+                        await cur.execute(qmark_to_format(query), tuple(params))
+                except Exception as exc:
+                    self.logger.error("Error to executing query: %s", query)
+                    raise exc
+                return list(await cur.fetchall())
+
+    async def execute_query(self, query: str, params: Sequence | None = None):
+        """Execute a query and fetch all the results
+
+        :param query: the SQL query, using ``?`` placeholders if ``params`` is given
+        :type query: str
+        :param params: values bound to the query placeholders, defaults to None
+        :type params: Sequence, optional
+        :return: list of result rows
+        :rtype: list
+        """
+        if self._pool is None and self._executor is None:
+            self.logger.error("Not connected, did you run connect()?")
+            raise ValueError
+
+        start = time.perf_counter()
+        if self.sqlite:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self._executor, self._sqlite_query, query, params
+            )
+        else:
+            result = await self._mysql_query(query, params)
+
+        if self.profiler is not None:
+            self.profiler.record(
+                query, time.perf_counter() - start, len(result), source="andes"
+            )
+        return result
+
+    async def get_basket_specimens(self, basket_id: int) -> List[int]:
+        """get a list of specimen_id in a basket
+
+        :param basket_id: The andes basket id
+        :type basket_id: int
+        :return: a list of andes specimen id's
+        :rtype: List [ int]
+        """
+        query = (
+            "SELECT ecosystem_survey_specimen.id "
+            "FROM ecosystem_survey_specimen "
+            "WHERE ecosystem_survey_specimen.basket_id=?"
+        )
+        result = await self.execute_query(query, (basket_id,))
+        return [s[0] for s in result]
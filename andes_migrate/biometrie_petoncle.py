@@ -85,10 +85,12 @@ class BiometriePetoncle(TablePecheSentinelle):
                  "ON shared_models_set.id=ecosystem_survey_catch.set_id "
                  "LEFT JOIN shared_models_observationtype "
                  "ON shared_models_observationtype.id=observation_type_id "
-                 f"WHERE shared_models_set.cruise_id = {self.proj._get_current_row_pk()} "
-                 f"AND (shared_models_observationtype.nom ='{self.collection_name}' AND observation_value=1) "
+                 "WHERE shared_models_set.cruise_id = ? "
+                 "AND (shared_models_observationtype.nom =? AND observation_value=1) "
+        )
+        result = self.andes_db.execute_query(
+            query, (self.proj._get_current_row_pk(), self.collection_name)
         )
-        result = self.andes_db.execute_query(query)
         self._assert_not_empty(result)
         self._row_list = [specimen[0] for specimen in result]
         self._row_idx = 0
@@ -134,9 +136,9 @@ class BiometriePetoncle(TablePecheSentinelle):
             "LEFT JOIN shared_models_station "
             "ON shared_models_set.station_id=shared_models_station.id "
 
-            f"WHERE ecosystem_survey_specimen.id={specimen_pk} "
+            "WHERE ecosystem_survey_specimen.id=? "
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (specimen_pk,))
         self._assert_one(result)
         to_return = result[0][0]
         return to_return
@@ -162,9 +164,9 @@ class BiometriePetoncle(TablePecheSentinelle):
             "ON ecosystem_survey_basket.catch_id=ecosystem_survey_catch.id "
             "LEFT JOIN shared_models_set "
             "ON shared_models_set.id=ecosystem_survey_catch.set_id "
-            f"WHERE ecosystem_survey_specimen.id={specimen_pk} "
+            "WHERE ecosystem_survey_specimen.id=? "
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (specimen_pk,))
         self._assert_one(result)
         to_return = result[0][0]
         return to_return
@@ -177,10 +179,10 @@ class BiometriePetoncle(TablePecheSentinelle):
             "FROM ecosystem_survey_observation "
             "LEFT JOIN shared_models_observationtype "
             "ON ecosystem_survey_observation.observation_type_id=shared_models_observationtype.id "
-            f"WHERE ecosystem_survey_observation.specimen_id={specimen_pk} "
-            f"AND shared_models_observationtype.nom='{name_fr}' "
+            "WHERE ecosystem_survey_observation.specimen_id=? "
+            "AND shared_models_observationtype.nom=? "
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (specimen_pk, name_fr))
         try:
             self._assert_one(result)
             to_return = result[0][0]
@@ -196,9 +198,9 @@ class BiometriePetoncle(TablePecheSentinelle):
         query = (
              "SELECT ecosystem_survey_specimen.comment "
              "FROM ecosystem_survey_specimen "
-            f"WHERE ecosystem_survey_specimen.id={specimen_pk} "
+            "WHERE ecosystem_survey_specimen.id=? "
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (specimen_pk,))
         self._assert_one(result)
         to_return = result[0][0]
         if to_return is None:
@@ -23,6 +23,15 @@ class CaptureMollusque(TablePecheSentinelle):
     Object model representing the CAPTURE_MOLLUSQUE table
     """
 
+    # species with neither a relative abundance category nor a weight (g.e., hermit crabs are not normaly weighted)
+    qualitative_exceptions_aphia_id = [
+        106854,  # STRAP 2561, Pagurus sp.
+        100854,  # STRAP 8313, Anemone (S.coccinea)
+    ]
+
+    # strap codes of the species that could have a barnacle coverage observation
+    epibiont_candidates_strap = [4167, 4179]
+
     def __init__(self, engin: EnginMollusque, *args, aphia_id_filter=None, size_class_filter=None, **kwargs):
 
         super().__init__(*args, ref=engin.reference_data, **kwargs)
@@ -56,27 +65,12 @@ class CaptureMollusque(TablePecheSentinelle):
         # )
 
 
-        # create a SQL query to filter by aphia ids
-        aphia_id_filter_query = None
-        if self.aphia_id_filter:
-            aphia_id_filter_query='AND ('
-            # the first one
-            aphia_id_filter_query += f"shared_models_species.aphia_id = {self.aphia_id_filter[0]}"
-            # the rest
-            for aphia_id in self.aphia_id_filter[1:]:
-                aphia_id_filter_query += f" OR shared_models_species.aphia_id = {aphia_id}"
-            aphia_id_filter_query+=') '
-
-        # create a SQL query to filter by size class codes
-        size_class_filter_query = None
-        if self.size_class_filter:
-            size_class_filter_query='AND ('
-            # the first one
-            size_class_filter_query += f"shared_models_sizeclass.code={self.size_class_filter[0]}"
-            # the rest
-            for size_class_code in self.size_class_filter[1:]:
-                size_class_filter_query += f" OR shared_models_sizeclass.code={size_class_code}"
-            size_class_filter_query+=') '
+        params = [
+            self.engin.trait.proj._get_current_row_pk(),
+            self.engin.trait._get_current_row_pk(),
+        ]
+        filter_query, filter_params = self._filter_query()
+        params.extend(filter_params)
 
         query = (
             "SELECT DISTINCT ecosystem_survey_catch.id "
@@ -90,20 +84,54 @@ class CaptureMollusque(TablePecheSentinelle):
             "ON ecosystem_survey_basket.size_class = shared_models_sizeclass.code "
             "LEFT JOIN shared_models_cruise "
             "ON shared_models_cruise.sampling_protocol_id = shared_models_sizeclass.sampling_protocol_id "
-            f"WHERE shared_models_cruise.id={self.engin.trait.proj._get_current_row_pk()} "
-            f"AND ecosystem_survey_catch.set_id={self.engin.trait._get_current_row_pk()} "
-            f"{size_class_filter_query if size_class_filter_query else ''} "
-            f"{aphia_id_filter_query if aphia_id_filter_query else ''} "
+            "WHERE shared_models_cruise.id=? "
+            "AND ecosystem_survey_catch.set_id=? "
+            f"{filter_query}"
             "ORDER BY ecosystem_survey_catch.id ASC "
         )
 
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, tuple(params))
         # a set could be empty,
         # self._assert_not_empty(result)
         # a list of all the catch pk's (need to unpack a bit)
         self._row_list = [catch[0] for catch in result]
         self._row_idx = 0
 
+    def _filter_query(self) -> tuple[str, list]:
+        """SQL conditions filtering the catches by size class and aphia id
+
+        :return: the conditions (to append to a WHERE clause), and their parameters
+        :rtype: tuple[str, list]
+        """
+        params = []
+
+        # create a SQL query to filter by size class codes
+        size_class_filter_query = None
+        if self.size_class_filter:
+            size_class_filter_query = "AND ("
+            size_class_filter_query += " OR ".join(
+                ["shared_models_sizeclass.code=?"] * len(self.size_class_filter)
+            )
+            size_class_filter_query += ") "
+            params.extend(self.size_class_filter)
+
+        # create a SQL query to filter by aphia ids
+        aphia_id_filter_query = None
+        if self.aphia_id_filter:
+            aphia_id_filter_query = "AND ("
+            aphia_id_filter_query += " OR ".join(
+                ["shared_models_species.aphia_id = ?"] * len(self.aphia_id_filter)
+            )
+            aphia_id_filter_query += ") "
+            # placeholders are ordered as they appear in the query
+            params.extend(self.aphia_id_filter)
+
+        query = (
+            f"{size_class_filter_query if size_class_filter_query else ''} "
+            f"{aphia_id_filter_query if aphia_id_filter_query else ''} "
+        )
+        return query, params
+
     def populate_data(self):
         """Populate data: run all getters"""
 
@@ -200,9 +228,9 @@ class CaptureMollusque(TablePecheSentinelle):
             "FROM ecosystem_survey_catch "
             "LEFT JOIN shared_models_species "
             "ON shared_models_species.id=ecosystem_survey_catch.species_id "
-            f"WHERE ecosystem_survey_catch.id={self._get_current_row_pk()}"
+            "WHERE ecosystem_survey_catch.id=?"
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
 
         andes_id = result[0][0]
@@ -343,9 +371,9 @@ class CaptureMollusque(TablePecheSentinelle):
             "FROM ecosystem_survey_catch "
             "LEFT JOIN shared_models_relativeabundancecategory "
             "ON shared_models_relativeabundancecategory.id=ecosystem_survey_catch.relative_abundance_category_id "
-            f"WHERE ecosystem_survey_catch.id={self._get_current_row_pk()}"
+            "WHERE ecosystem_survey_catch.id=?"
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
 
         to_return = result[0][0]
@@ -410,9 +438,9 @@ class CaptureMollusque(TablePecheSentinelle):
             "ON ecosystem_survey_basket.catch_id=ecosystem_survey_catch.id "
             "JOIN ecosystem_survey_specimen "
             "ON ecosystem_survey_specimen.basket_id=ecosystem_survey_basket.id "
-            f"WHERE ecosystem_survey_catch.id={self._get_current_row_pk()}"
+            "WHERE ecosystem_survey_catch.id=?"
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         # any rspecimens means it's a quantitive catch (assuming quantitative specimen observations)
         if len(result) > 0:
             self.logger.info(
@@ -424,9 +452,9 @@ class CaptureMollusque(TablePecheSentinelle):
         query = (
             "SELECT ecosystem_survey_basket.basket_wt_kg "
             "FROM ecosystem_survey_basket "
-            f"WHERE ecosystem_survey_basket.catch_id={self._get_current_row_pk()}"
+            "WHERE ecosystem_survey_basket.catch_id=?"
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         nonzero_weights = [basket[0] for basket in result if not basket[0] == 0]
 
         # any weighted baskets means a quantitaive catch
@@ -441,9 +469,9 @@ class CaptureMollusque(TablePecheSentinelle):
         query = (
             "SELECT ecosystem_survey_catch.relative_abundance_category_id "
             "FROM ecosystem_survey_catch "
-            f"WHERE ecosystem_survey_catch.id={self._get_current_row_pk()}"
+            "WHERE ecosystem_survey_catch.id=?"
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
         rel_abundance: int | None = result[0][0]
         if rel_abundance:
@@ -453,24 +481,20 @@ class CaptureMollusque(TablePecheSentinelle):
             return qualitative_code
 
 
-        # Some species do not have a relative abundance category, nor do they have a weight (g.e., hermit crabs are not normaly weighted)
-        exceptions_aphia_id = [
-                               106854, # STRAP 2561, Pagurus sp.
-                               100854, # STRAP 8313, Anemone (S.coccinea)
-                               ] 
+        # Some species do not have a relative abundance category, nor do they have a weight
         query = (
             "SELECT ecosystem_survey_catch.specimen_count, shared_models_species.aphia_id "
             "FROM ecosystem_survey_catch "
             "LEFT JOIN shared_models_species "
             "ON shared_models_species.id=ecosystem_survey_catch.species_id "
-            f"WHERE ecosystem_survey_catch.id={self._get_current_row_pk()}"
+            "WHERE ecosystem_survey_catch.id=?"
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
         specimen_count = result[0][0]
         aphia_id = result[0][1]
         # print(result)
-        if specimen_count is not None and aphia_id in exceptions_aphia_id:
+        if specimen_count is not None and aphia_id in self.qualitative_exceptions_aphia_id:
             return qualitative_code
 
         self.logger.error(
@@ -641,9 +665,9 @@ class CaptureMollusque(TablePecheSentinelle):
         query = (
             "SELECT shared_models_observationtype.id "
             "FROM shared_models_observationtype "
-            f"WHERE shared_models_observationtype.nom='{observation_type_name}'"
+            "WHERE shared_models_observationtype.nom=?"
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (observation_type_name,))
         # perhaps allow for multiple baskets?
         self._assert_one(result)
         observation_type_id = result[0][0]
@@ -652,12 +676,14 @@ class CaptureMollusque(TablePecheSentinelle):
         query = (
             "SELECT shared_models_observationtypecategory.code "
             "FROM shared_models_observationtypecategory "
-            f"WHERE shared_models_observationtypecategory.description_fra='{description_no_barnacles}'"
+            "WHERE shared_models_observationtypecategory.description_fra=?"
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (description_no_barnacles,))
         # perhaps allow for multiple baskets?
         self._assert_one(result)
-        observation_value_no_barnacles = result[0][0]
+        # observation_value is a varchar: keep comparing it with a string
+        # (bound as a number, MySQL would compare numerically and match 'NaN', '0.0'...)
+        observation_value_no_barnacles = str(result[0][0])
 
         return observation_value_no_barnacles, observation_type_id
 
@@ -700,12 +726,19 @@ class CaptureMollusque(TablePecheSentinelle):
             "ON ecosystem_survey_observation.specimen_id=ecosystem_survey_specimen.id  "
             "LEFT JOIN shared_models_observationtypecategory "
             "ON shared_models_observationtypecategory.observation_type_id=ecosystem_survey_observation.id  "
-            f"WHERE ecosystem_survey_catch.id={catch_id} "
-            f"AND ecosystem_survey_observation.observation_type_id='{observation_coverage_type_id}' "
-            f"AND ecosystem_survey_observation.observation_value='{observation_value_no_barnacles}' "
+            "WHERE ecosystem_survey_catch.id=? "
+            "AND ecosystem_survey_observation.observation_type_id=? "
+            "AND ecosystem_survey_observation.observation_value=? "
             "AND ecosystem_survey_observation.observation_value IS NOT NULL "
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(
+            query,
+            (
+                catch_id,
+                observation_coverage_type_id,
+                observation_value_no_barnacles,
+            ),
+        )
         num_specimens_without_barnacles = len(result)
         self.logger.info(
             "Found %s specimens identified without barnacles",
@@ -723,16 +756,31 @@ class CaptureMollusque(TablePecheSentinelle):
             "ON ecosystem_survey_observation.specimen_id=ecosystem_survey_specimen.id  "
             "LEFT JOIN shared_models_observationtypecategory "
             "ON shared_models_observationtypecategory.observation_type_id=ecosystem_survey_observation.id  "
-            f"WHERE ecosystem_survey_catch.id={catch_id} "
-            f"AND ecosystem_survey_observation.observation_type_id='{observation_coverage_type_id}' "
-            f"AND NOT ecosystem_survey_observation.observation_value='{observation_value_no_barnacles}' "
+            "WHERE ecosystem_survey_catch.id=? "
+            "AND ecosystem_survey_observation.observation_type_id=? "
+            "AND NOT ecosystem_survey_observation.observation_value=? "
             "AND ecosystem_survey_observation.observation_value IS NOT NULL "
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(
+            query,
+            (
+                catch_id,
+                observation_coverage_type_id,
+                observation_value_no_barnacles,
+            ),
+        )
         num_specimens_with_barnacles = len(result)
         self.logger.info(
             "Found %s specimens identified with barnacles", num_specimens_with_barnacles
         )
+        return self._abondance_epibiont_code(
+            num_specimens_with_barnacles, num_specimens_without_barnacles
+        )
+
+    def _abondance_epibiont_code(
+        self, num_specimens_with_barnacles: int, num_specimens_without_barnacles: int
+    ) -> int | None:
+        """Bin the ratio of specimens with barnacles, see `_compute_abondance_epibiont`"""
         if (num_specimens_with_barnacles + num_specimens_with_barnacles) == 0:
             self.logger.warning("No valid barnacle coverage code, null coverage")
             return None
@@ -792,13 +840,10 @@ class CaptureMollusque(TablePecheSentinelle):
         #     return None
 
 
-        # list of strap codes for species that could contain a barnacle coverge observation
-        candidate_species_strap = [4167, 4179]
-
         current_strap = self.reference_data._cod_esp_gen_2_strap(
             self.get_cod_esp_gen()
         )
-        if current_strap not in candidate_species_strap:
+        if current_strap not in self.epibiont_candidates_strap:
             self.logger.warn("Current species not a EPIBIONT candidate, returning null")
             return None
 
@@ -832,16 +877,27 @@ class CaptureMollusque(TablePecheSentinelle):
             "ON ecosystem_survey_observation.specimen_id=ecosystem_survey_specimen.id  "
             "LEFT JOIN shared_models_observationtypecategory "
             "ON shared_models_observationtypecategory.observation_type_id=ecosystem_survey_observation.id  "
-            f"WHERE ecosystem_survey_catch.id={catch_id} "
-            f"AND ecosystem_survey_observation.observation_type_id='{observation_coverage_type_id}' "
-            f"AND NOT ecosystem_survey_observation.observation_value='{observation_value_no_barnacles}' "
+            "WHERE ecosystem_survey_catch.id=? "
+            "AND ecosystem_survey_observation.observation_type_id=? "
+            "AND NOT ecosystem_survey_observation.observation_value=? "
             "AND ecosystem_survey_observation.observation_value IS NOT NULL "
             "AND NOT ecosystem_survey_observation.observation_value='NaN' "
 
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(
+            query,
+            (
+                catch_id,
+                observation_coverage_type_id,
+                observation_value_no_barnacles,
+            ),
+        )
+
+        return self._couverture_epibiont_code([cov[0] for cov in result])
 
-        if not result:
+    def _couverture_epibiont_code(self, coverage_codes: list[str]) -> int | None:
+        """Bin the mean coverage of the specimens with barnacles, see `_compute_couverture_epibiont`"""
+        if not coverage_codes:
             # return None or zero?
             return None
 
@@ -852,7 +908,7 @@ class CaptureMollusque(TablePecheSentinelle):
             "2": 0.5 * (1.0 / 3.0 + 2.0 / 3.0),
             "3": 0.5 * (2.0 / 3.0 + 1),
         }
-        coverage_values = [coverage_code_2_percent[cov[0]] for cov in result]
+        coverage_values = [coverage_code_2_percent[cov] for cov in coverage_codes]
         average_cov = np.mean(np.array(coverage_values))
         if 0 < average_cov <= 1.0 / 3.0:
             cov_code = 1
@@ -903,9 +959,9 @@ class CaptureMollusque(TablePecheSentinelle):
         query = (
             "SELECT ecosystem_survey_catch.notes "
             "FROM ecosystem_survey_catch "
-            f"WHERE ecosystem_survey_catch.id={self._get_current_row_pk()} "
+            "WHERE ecosystem_survey_catch.id=? "
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
         to_return = result[0][0]
 
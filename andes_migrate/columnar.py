@@ -0,0 +1,531 @@
+"""Set-oriented extraction of the TRAIT, ENGIN and CAPTURE tables, as columnar frames
+
+Instead of running every getter for every row, the Andes data of the whole cruise is loaded
+with a few set-based queries, and each column is computed for all the rows at once::
+
+    for p in proj:
+        extractor = ColumnarExtractor(andes_db, proj, aphia_id_filter=[156972, 140692], size_class_filter=[1, 2])
+        traits = extractor.trait_frame()
+        engins = extractor.engin_frame()
+        captures = extractor.capture_frame()
+
+The number of queries depends on the number of tables (and of distinct values,
+e.g. species), not on the number of rows.
+
+The frames have the same columns, in the same order and with the same values, as the rows
+of the table iterators (see :func:`compare_frame` to check it for a cruise).
+"""
+import logging
+import math
+
+import pandas as pd
+
+from andes_migrate.andes_helper import AndesHelper
+from andes_migrate.capture_mollusque import CaptureMollusque
+from andes_migrate.engin_mollusque import EnginMollusque
+from andes_migrate.oracle_helper import OracleHelper
+from andes_migrate.projet_mollusque import ProjetMollusque
+from andes_migrate.table_writer import TableWriter
+from andes_migrate.trait_mollusque import TraitMollusque
+
+# (column, getter, set values the getter depends on), in the order of TraitMollusque.populate_data
+# columns depending on no set value are the same for the whole project
+TRAIT_COLUMNS = [
+    ("COD_SOURCE_INFO", "get_cod_source_info", ()),
+    ("NO_RELEVE", "get_no_releve", ()),
+    ("COD_NBPC", "get_cod_nbpc", ()),
+    ("IDENT_NO_TRAIT", "get_ident_no_trait", ("set_number",)),
+    ("COD_ZONE_GEST_MOLL", "get_cod_zone_gest_moll", ("station_name",)),
+    ("COD_SECTEUR_RELEVE", "get_cod_secteur_releve", ("area_of_operation",)),
+    ("COD_STRATE", "get_cod_strate", ("station_name", "area_of_operation")),
+    ("NO_STATION", "get_no_station", ("station_name",)),
+    ("COD_TYP_TRAIT", "get_cod_typ_trait", ("operations", "stratification_type_description")),
+    ("COD_RESULT_OPER", "get_cod_result_oper", ("set_result_code",)),
+    ("DATE_DEB_TRAIT", "get_date_deb_trait", ("start_date",)),
+    ("DATE_FIN_TRAIT", "get_date_fin_trait", ("end_date",)),
+    ("HRE_DEB_TRAIT", "get_hre_deb_trait", ("start_date",)),
+    ("HRE_FIN_TRAIT", "get_hre_fin_trait", ("end_date",)),
+    ("COD_TYP_HEURE", "get_cod_typ_heure", ("start_date",)),
+    ("COD_FUSEAU_HORAIRE", "get_cod_fuseau_horaire", ("start_date",)),
+    ("LAT_DEB_TRAIT", None, ()),
+    ("LAT_FIN_TRAIT", None, ()),
+    ("LONG_DEB_TRAIT", None, ()),
+    ("LONG_FIN_TRAIT", None, ()),
+    ("LATLONG_P", "get_latlong_p", ()),
+    ("DISTANCE_POS", "get_distance_pos", ()),
+    ("DISTANCE_POS_P", "get_distance_pos_p", ()),
+    ("VIT_TOUAGE", "get_vit_touage", ()),
+    ("VIT_TOUAGE_P", "get_vit_touage_p", ()),
+    ("DUREE_TRAIT", "get_duree_trait", ()),
+    ("DUREE_TRAIT_P", "get_duree_trait_p", ()),
+    ("TEMP_FOND", "get_temp_fond", ()),
+    ("TEMP_FOND_P", "get_temp_fond_p", ()),
+    ("PROF_DEB", "get_prof_deb", ("start_depth_m",)),
+    ("PROF_DEB_P", "get_prof_deb_p", ()),
+    ("PROF_FIN", "get_prof_fin", ("start_depth_m",)),
+    ("PROF_FIN_P", "get_prof_fin_p", ()),
+    ("REM_TRAIT_MOLL", "get_rem_trait_moll", ("remarks",)),
+    ("NO_CHARGEMENT", "get_no_chargement", ()),
+]
+
+# coordinate columns (computed on arrays): column -> (set value, is a longitude)
+TRAIT_COORDS = {
+    "LAT_DEB_TRAIT": ("start_latitude", False),
+    "LAT_FIN_TRAIT": ("end_latitude", False),
+    "LONG_DEB_TRAIT": ("start_longitude", True),
+    "LONG_FIN_TRAIT": ("end_longitude", True),
+}
+
+# (column, getter, set values the getter depends on), in the order of EnginMollusque.populate_data
+ENGIN_COLUMNS = [
+    ("COD_SOURCE_INFO", "get_cod_source_info", ()),
+    ("COD_ENG_GEN", "get_cod_eng_gen", ("gear_type_code",)),
+    ("NO_RELEVE", "get_no_releve", ()),
+    ("IDENT_NO_TRAIT", "get_ident_no_trait", ("set_number",)),
+    ("NO_ENGIN", "get_no_engin", ("auxiliary_equipment_code",)),
+    ("COD_NBPC", "get_cod_nbpc", ()),
+    ("COD_TYP_PANIER", "get_cod_typ_panier", ("gear_type_code",)),
+    ("NO_CHARGEMENT", "get_no_chargement", ()),
+    ("LONG_FUNE", "get_long_fune", ("trawl_cable_length",)),
+    ("LONG_FUNE_P", "get_long_fune_p", ()),
+    ("NB_PANIER", "get_nb_panier", ()),
+    ("REMPLISSAGE", "get_remplissage", ("fill_percent",)),
+    ("REMPLISSAGE_P", "get_remplissage_p", ()),
+]
+
+# columns of CaptureMollusque.populate_data, in order
+CAPTURE_COLUMNS = [
+    "COD_SOURCE_INFO",
+    "COD_ENG_GEN",
+    "NO_RELEVE",
+    "COD_ESP_GEN",
+    "IDENT_NO_TRAIT",
+    "COD_TYP_PANIER",
+    "COD_NBPC",
+    "FRACTION_PECH",
+    "NO_ENGIN",
+    "FRACTION_ECH",
+    "COD_DESCRIP_CAPT",
+    "FRACTION_ECH_P",
+    "COD_TYP_MESURE",
+    "NBR_CAPT",
+    "FRACTION_PECH_P",
+    "NBR_ECH",
+    "PDS_CAPT",
+    "PDS_CAPT_P",
+    "PDS_ECH",
+    "PDS_ECH_P",
+    "NO_CHARGEMENT",
+    "COD_ABONDANCE_EPIBIONT",
+    "COD_COUVERTURE_EPIBIONT",
+]
+
+# capture columns taken from the engin of the set
+CAPTURE_ENGIN_COLUMNS = [
+    "COD_SOURCE_INFO",
+    "COD_ENG_GEN",
+    "NO_RELEVE",
+    "IDENT_NO_TRAIT",
+    "COD_TYP_PANIER",
+    "COD_NBPC",
+    "NO_ENGIN",
+    "NO_CHARGEMENT",
+]
+
+# hard-coded capture columns -> getter
+CAPTURE_CONSTANT_COLUMNS = {
+    "FRACTION_PECH": "get_fraction_peche",
+    "FRACTION_ECH": "get_fraction_ech",
+    "FRACTION_ECH_P": "get_fraction_ech_p",
+    "NBR_CAPT": "get_nbr_capt",
+    "FRACTION_PECH_P": "get_fraction_peche_p",
+    "NBR_ECH": "get_nbr_ech",
+    "PDS_CAPT": "get_pds_capt",
+    "PDS_CAPT_P": "get_pds_capt_p",
+    "PDS_ECH": "get_pds_ech",
+    # as in CaptureMollusque.populate_data
+    "PDS_ECH_P": "get_pds_ech",
+}
+
+
+def _broadcast(table, keys: list, getter) -> list:
+    """Run a getter once per distinct key, on the first row having it, and repeat its result
+
+    :param table: the table object positioned on each row (its ``_row_list`` matches ``keys``)
+    :type table: TablePecheSentinelle
+    :param keys: the (hashable) input values of the getter, one per row
+    :type keys: list
+    :param getter: the bound getter
+    :return: the getter results, one per row
+    :rtype: list
+    """
+    results = {}
+    column = []
+    row_idx = table._row_idx
+    try:
+        for idx, key in enumerate(keys):
+            if key not in results:
+                # _get_current_row_pk() looks one row back
+                table._row_idx = idx + 1
+                results[key] = getter()
+            column.append(results[key])
+    finally:
+        table._row_idx = row_idx
+    return column
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+class ColumnarExtractor:
+    """Compute the TRAIT_MOLLUSQUE, ENGIN_MOLLUSQUE and CAPTURE_MOLLUSQUE tables of a project
+    for the whole cruise, as pandas DataFrames
+
+    The sets are read by a :class:`~andes_migrate.trait_mollusque.TraitMollusque`
+    in snapshot mode (two queries). The getters are then run once per distinct value
+    of the set columns they depend on (e.g. once per station for COD_STRATE) and their
+    result is repeated for the other rows, the coordinates are converted on arrays
+    and the catch level columns are computed from a few grouped queries.
+
+    The columns have the object dtype, and hold the values returned by the getters (None where null).
+
+    :param andes_db: the Andes database
+    :type andes_db: AndesHelper
+    :param proj: the project, positioned on the current project row (i.e., while iterating on it)
+    :type proj: ProjetMollusque
+    :param aphia_id_filter: aphia ids of the captures, see CaptureMollusque, defaults to None
+    :type aphia_id_filter: list[int], optional
+    :param size_class_filter: size classes of the captures, see CaptureMollusque, defaults to None
+    :type size_class_filter: list[int], optional
+    """
+
+    def __init__(
+        self,
+        andes_db: AndesHelper,
+        proj: ProjetMollusque,
+        aphia_id_filter: list[int] | None = None,
+        size_class_filter: list[int] | None = None,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.andes_db = andes_db
+        self.proj = proj
+        self.aphia_id_filter = aphia_id_filter
+        self.size_class_filter = size_class_filter
+
+        # nothing is written by the table objects
+        self.trait = TraitMollusque(andes_db, proj, None, snapshot=True)
+        self.engin = EnginMollusque(self.trait, None)
+        self.reference_data: OracleHelper = self.trait.reference_data
+
+        self._trait_frame: pd.DataFrame | None = None
+        self._engin_frame: pd.DataFrame | None = None
+
+    def _set_keys(self, inputs: tuple) -> list:
+        """Key of each set, made of the set values a getter depends on"""
+        keys = []
+        for set_pk in self.trait._row_list:
+            values = self.trait._set_snapshot[set_pk]
+            key = []
+            for name in inputs:
+                if name == "operations":
+                    key.append(tuple(self.trait._set_operations.get(set_pk, [])))
+                else:
+                    key.append(values[name])
+            keys.append(tuple(key))
+        return keys
+
+    def _set_values(self, name: str) -> list:
+        return [self.trait._set_snapshot[set_pk][name] for set_pk in self.trait._row_list]
+
+    def _coords(self, name: str, longitude: bool) -> list:
+        """Oracle encoding of a coordinate column, see TraitMollusque.get_lat_deb_trait"""
+        coords = [coord if coord is not None else float("nan") for coord in self._set_values(name)]
+        # like OracleHelper._to_oracle_coord, a zero coordinate is missing
+        encoded = OracleHelper.to_oracle_coords(coords, mask=[coord == 0 for coord in coords])
+        if longitude:
+            # strip negative from longitudes
+            encoded = -encoded
+        return [None if math.isnan(coord) else float(coord) for coord in encoded]
+
+    def _getter_frame(self, table, columns: list) -> pd.DataFrame:
+        data = {}
+        for column, getter, inputs in columns:
+            if getter is None:
+                data[column] = self._coords(*TRAIT_COORDS[column])
+            else:
+                data[column] = _broadcast(
+                    self.trait, self._set_keys(inputs), getattr(table, getter)
+                )
+        return pd.DataFrame(data, index=pd.Index(self.trait._row_list, name="set_id"), dtype=object)
+
+    def trait_frame(self) -> pd.DataFrame:
+        """TRAIT_MOLLUSQUE rows of the project, one per set
+
+        :return: the rows, indexed by Andes set id
+        :rtype: pd.DataFrame
+        """
+        if self._trait_frame is None:
+            self._trait_frame = self._getter_frame(self.trait, TRAIT_COLUMNS)
+        return self._trait_frame
+
+    def engin_frame(self) -> pd.DataFrame:
+        """ENGIN_MOLLUSQUE rows of the project, one per set
+
+        :return: the rows, indexed by Andes set id
+        :rtype: pd.DataFrame
+        """
+        if self._engin_frame is None:
+            self._engin_frame = self._getter_frame(self.engin, ENGIN_COLUMNS)
+        return self._engin_frame
+
+    def _cruise_query(self, select: str, joins: str, conditions: str = "", params: tuple = ()):
+        """Run a query over all the catches of the cruise"""
+        query = (
+            f"SELECT {select} "
+            "FROM ecosystem_survey_catch "
+            f"{joins}"
+            "JOIN shared_models_set "
+            "ON shared_models_set.id=ecosystem_survey_catch.set_id "
+            "WHERE shared_models_set.cruise_id=? "
+            f"{conditions}"
+        )
+        return self.andes_db.execute_query(
+            query, (self.proj._get_current_row_pk(),) + tuple(params)
+        )
+
+    def _catches(self, capture: CaptureMollusque) -> list[tuple]:
+        """Catches of the cruise, with the same filters as CaptureMollusque._init_rows,
+        ordered by set then by catch id
+
+        :return: (catch id, set id, aphia id, species code, relative abundance category id,
+            relative abundance code, specimen count) of each catch
+        """
+        filter_query, filter_params = capture._filter_query()
+        result = self._cruise_query(
+            "DISTINCT ecosystem_survey_catch.id, ecosystem_survey_catch.set_id, "
+            "shared_models_species.aphia_id, shared_models_species.code, "
+            "ecosystem_survey_catch.relative_abundance_category_id, "
+            "shared_models_relativeabundancecategory.code, "
+            "ecosystem_survey_catch.specimen_count",
+            "LEFT JOIN shared_models_species "
+            "ON shared_models_species.id=ecosystem_survey_catch.species_id "
+            "LEFT JOIN shared_models_relativeabundancecategory "
+            "ON shared_models_relativeabundancecategory.id=ecosystem_survey_catch.relative_abundance_category_id "
+            # # this part is to remove 'NA' size-class baskets
+            "LEFT JOIN ecosystem_survey_basket "
+            "ON ecosystem_survey_catch.id=ecosystem_survey_basket.catch_id "
+            "LEFT JOIN shared_models_sizeclass "
+            "ON ecosystem_survey_basket.size_class = shared_models_sizeclass.code "
+            "LEFT JOIN shared_models_cruise "
+            "ON shared_models_cruise.sampling_protocol_id = shared_models_sizeclass.sampling_protocol_id ",
+            f"AND shared_models_cruise.id=? {filter_query}",
+            (self.proj._get_current_row_pk(), *filter_params),
+        )
+        set_order = {set_pk: idx for idx, set_pk in enumerate(self.trait._row_list)}
+        # the sets skipped by a journal have no capture rows either
+        catches = [row for row in result if row[1] in set_order]
+        return sorted(catches, key=lambda row: (set_order[row[1]], row[0]))
+
+    def _cod_typ_mesure(self, capture: CaptureMollusque, catches: list[tuple]) -> list:
+        """COD_TYP_MESURE of each catch, see CaptureMollusque.get_cod_type_mesure"""
+        qualitative_code = self.reference_data.get_ref_key(
+            table="TYPE_MESURE_MOLL",
+            pkey_col="COD_TYP_MESURE",
+            col="DESC_TYP_MESURE_F",
+            val="Données qualitatives",
+        )
+        quantitative_code = self.reference_data.get_ref_key(
+            table="TYPE_MESURE_MOLL",
+            pkey_col="COD_TYP_MESURE",
+            col="DESC_TYP_MESURE_F",
+            val="Données quantitatives",
+        )
+
+        result = self._cruise_query(
+            "ecosystem_survey_catch.id, COUNT(*)",
+            "JOIN ecosystem_survey_basket "
+            "ON ecosystem_survey_basket.catch_id=ecosystem_survey_catch.id "
+            "JOIN ecosystem_survey_specimen "
+            "ON ecosystem_survey_specimen.basket_id=ecosystem_survey_basket.id ",
+            "GROUP BY ecosystem_survey_catch.id",
+        )
+        num_specimens = dict(result)
+
+        result = self._cruise_query(
+            "ecosystem_survey_catch.id, ecosystem_survey_basket.basket_wt_kg",
+            "JOIN ecosystem_survey_basket "
+            "ON ecosystem_survey_basket.catch_id=ecosystem_survey_catch.id ",
+        )
+        weighted = {catch_id for catch_id, weight in result if not weight == 0}
+
+        column = []
+        for catch_id, _, aphia_id, _, rel_abundance, _, specimen_count in catches:
+            if num_specimens.get(catch_id, 0) > 0 or catch_id in weighted:
+                column.append(quantitative_code)
+            elif rel_abundance:
+                column.append(qualitative_code)
+            elif specimen_count is not None and aphia_id in capture.qualitative_exceptions_aphia_id:
+                column.append(qualitative_code)
+            else:
+                self.logger.error("Cannot determine cod_type_mesure for catch %s", catch_id)
+                raise ValueError
+        return column
+
+    def _epibionts(self, capture: CaptureMollusque, catches: list[tuple], cod_esp_gen: list) -> tuple[list, list]:
+        """COD_ABONDANCE_EPIBIONT and COD_COUVERTURE_EPIBIONT of each catch,
+        see CaptureMollusque.get_cod_abondance_epibiont and CaptureMollusque.get_couverture_epibiont
+        """
+        strap = {
+            code: self.reference_data._cod_esp_gen_2_strap(code) for code in set(cod_esp_gen)
+        }
+        candidates = [strap[code] in capture.epibiont_candidates_strap for code in cod_esp_gen]
+        if not any(candidates):
+            return [None] * len(catches), [None] * len(catches)
+
+        (
+            observation_value_no_barnacles,
+            observation_coverage_type_id,
+        ) = capture._get_coverage_codes()
+        # same joins as CaptureMollusque._compute_abondance_epibiont
+        result = self._cruise_query(
+            "ecosystem_survey_catch.id, ecosystem_survey_observation.observation_value",
+            "LEFT JOIN ecosystem_survey_basket "
+            "ON ecosystem_survey_catch.id=ecosystem_survey_basket.catch_id "
+            "LEFT JOIN ecosystem_survey_specimen "
+            "ON ecosystem_survey_specimen.basket_id = ecosystem_survey_basket.id "
+            "LEFT JOIN ecosystem_survey_observation "
+            "ON ecosystem_survey_observation.specimen_id=ecosystem_survey_specimen.id  "
+            "LEFT JOIN shared_models_observationtypecategory "
+            "ON shared_models_observationtypecategory.observation_type_id=ecosystem_survey_observation.id  ",
+            "AND ecosystem_survey_observation.observation_type_id=? "
+            "AND ecosystem_survey_observation.observation_value IS NOT NULL ",
+            (observation_coverage_type_id,),
+        )
+        # catch id -> coverage codes of the specimens with barnacles
+        with_barnacles = {}
+        num_without_barnacles = {}
+        for catch_id, value in result:
+            # observation_value is a varchar, compared as a string by the per-row queries
+            if str(value) == str(observation_value_no_barnacles):
+                num_without_barnacles[catch_id] = num_without_barnacles.get(catch_id, 0) + 1
+            else:
+                with_barnacles.setdefault(catch_id, []).append(value)
+
+        abondance = []
+        couverture = []
+        for catch, candidate in zip(catches, candidates):
+            catch_id = catch[0]
+            if not candidate:
+                abondance.append(None)
+                couverture.append(None)
+                continue
+            coverage_codes = with_barnacles.get(catch_id, [])
+            code = capture._abondance_epibiont_code(
+                len(coverage_codes), num_without_barnacles.get(catch_id, 0)
+            )
+            abondance.append(code)
+            if code is None or code == 0:
+                couverture.append(None)
+            else:
+                couverture.append(
+                    capture._couverture_epibiont_code([cov for cov in coverage_codes if not str(cov) == "NaN"])
+                )
+        return abondance, couverture
+
+    def capture_frame(self) -> pd.DataFrame:
+        """CAPTURE_MOLLUSQUE rows of the project, one per (filtered) catch
+
+        :return: the rows, indexed by Andes catch id
+        :rtype: pd.DataFrame
+        """
+        engins = self.engin_frame()
+        if not self.trait._row_list:
+            return pd.DataFrame(columns=CAPTURE_COLUMNS, dtype=object)
+
+        # positioned on the first set, for its constructor only
+        row_idx = self.trait._row_idx
+        self.trait._row_idx = 1
+        try:
+            capture = CaptureMollusque(
+                self.engin,
+                None,
+                aphia_id_filter=self.aphia_id_filter,
+                size_class_filter=self.size_class_filter,
+            )
+        finally:
+            self.trait._row_idx = row_idx
+        catches = self._catches(capture)
+        index = pd.Index([catch[0] for catch in catches], name="catch_id")
+        if not catches:
+            return pd.DataFrame(columns=CAPTURE_COLUMNS, index=index, dtype=object)
+        capture._row_list = list(index)
+
+        data = {}
+        set_ids = [catch[1] for catch in catches]
+        for column in CAPTURE_ENGIN_COLUMNS:
+            data[column] = list(engins.loc[set_ids, column])
+        for column, getter in CAPTURE_CONSTANT_COLUMNS.items():
+            data[column] = _broadcast(capture, [()] * len(catches), getattr(capture, getter))
+        # one species query per distinct species
+        data["COD_ESP_GEN"] = _broadcast(
+            capture, [(catch[2], catch[3]) for catch in catches], capture.get_cod_esp_gen
+        )
+        data["COD_DESCRIP_CAPT"] = [
+            None if catch[5] is None else int(catch[5]) for catch in catches
+        ]
+        data["COD_TYP_MESURE"] = self._cod_typ_mesure(capture, catches)
+        (
+            data["COD_ABONDANCE_EPIBIONT"],
+            data["COD_COUVERTURE_EPIBIONT"],
+        ) = self._epibionts(capture, catches, data["COD_ESP_GEN"])
+
+        return pd.DataFrame(
+            {column: data[column] for column in CAPTURE_COLUMNS}, index=index, dtype=object
+        )
+
+
+def compare_frame(frame: pd.DataFrame, rows: list[dict]) -> list[tuple]:
+    """Differences between a frame and the rows produced by a table iterator
+
+    e.g., with the rows collected while iterating on a TraitMollusque
+    (``rows = [dict(t) for t in trait]``) and ``extractor.trait_frame()``.
+    None and NaN are both null, other values have to be equal.
+
+    :param frame: the frame
+    :type frame: pd.DataFrame
+    :param rows: the rows of the table iterator, in order
+    :type rows: list[dict]
+    :return: (row number, column, frame value, row value) of each difference, empty if they match
+    :rtype: list[tuple]
+    """
+    differences = []
+    if not len(frame) == len(rows):
+        differences.append((None, "number of rows", len(frame), len(rows)))
+    for idx, row in enumerate(rows[: len(frame)]):
+        if not list(row.keys()) == list(frame.columns):
+            differences.append((idx, "columns", list(frame.columns), list(row.keys())))
+            continue
+        for column, value in row.items():
+            frame_value = frame.iloc[idx][column]
+            if _is_missing(frame_value) and _is_missing(value):
+                continue
+            if not frame_value == value:
+                differences.append((idx, column, frame_value, value))
+    return differences
+
+
+def write_frame(output: TableWriter, table_name: str, frame: pd.DataFrame):
+    """Write the rows of a frame with a TableWriter (e.g., BufferedTableWriter)
+
+    :param output: the writer
+    :type output: TableWriter
+    :param table_name: the destination table
+    :type table_name: str
+    :param frame: the rows
+    :type frame: pd.DataFrame
+    """
+    for row in frame.to_dict(orient="records"):
+        output.write_data(
+            table_name, {col: None if _is_missing(val) else val for col, val in row.items()}
+        )
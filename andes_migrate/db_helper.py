@@ -1,15 +1,90 @@
 import logging
+import re
+import threading
+from decimal import Decimal
+from typing import Iterable
+
+# one "AND COL=value" clause of an optional_query
+_OPTIONAL_CLAUSE = re.compile(
+    r"\s*AND\s+(?:\w+\.)?(\w+)\s*=\s*('(?:[^']|'')*'|-?\d+(?:\.\d+)?)\s*", re.IGNORECASE
+)
+
+# DBHelper.shared() instances, per class
+_shared_instances: dict = {}
+_shared_lock = threading.Lock()
 
 
 class DBHelper:
-    def __init__(self, file=None):
+    """Base class of the reference database helpers
+
+    The connection is only made on first use (see ``con`` and ``cur``), by :meth:`_connect`.
+
+    With ``preload=True``, every reference table used by :meth:`get_ref_key` and
+    :meth:`validate_exists` is read once, on first use, and the lookups are then answered from memory
+    (with the same results and errors as the SQL queries).
+
+    :param preload: keep the reference tables in memory, defaults to False
+    :type preload: bool, optional
+    """
+
+    def __init__(self, file=None, preload: bool = False):
         self.datetime_strfmt = "%Y-%m-%d %H:%M:%S"
-        # children classes need to init these
-        self.con = None
-        self.cur = None
+        # children classes need to init these, in _connect()
+        self._con = None
+        self._cur = None
         self.db_charset: str
         self.logger: logging.Logger
 
+        self.preload = preload
+        # TABLE -> (COLUMNS, rows)
+        self._ref_tables: dict[str, tuple[list[str], list[tuple]]] = {}
+        # (TABLE, COLUMN) -> match key -> row indices
+        self._ref_indexes: dict[tuple[str, str], dict] = {}
+
+    @property
+    def con(self):
+        """The connection, connecting on first use"""
+        if self._con is None:
+            self._connect()
+        return self._con
+
+    @con.setter
+    def con(self, con):
+        self._con = con
+
+    @property
+    def cur(self):
+        """The cursor, connecting on first use"""
+        if self._cur is None:
+            self._connect()
+        return self._cur
+
+    @cur.setter
+    def cur(self, cur):
+        self._cur = cur
+
+    def is_connected(self) -> bool:
+        """True if the connection was made"""
+        return self._con is not None
+
+    def _connect(self):
+        # child class must override, setting self.con and self.cur
+        raise NotImplementedError
+
+    @classmethod
+    def shared(cls, **kwargs):
+        """The instance shared by default, created on first call
+
+        As the connection is lazy, creating the shared instance does not connect.
+
+        :param kwargs: arguments used to create the shared instance (ignored afterwards)
+        :return: the shared instance
+        """
+        with _shared_lock:
+            if cls not in _shared_instances:
+                _shared_instances[cls] = cls(**kwargs)
+            return _shared_instances[cls]
+
     def _format_sql_string(self, input: str) -> str:
         """use two single-quotes to properly generate the SQL statement
 
@@ -24,6 +99,121 @@ class DBHelper:
         # child class must override
         raise NotImplemented
 
+    def _load_ref_table(self, table: str) -> tuple[list[str], list[tuple]]:
+        """Read a whole reference table
+
+        :param table: name of the table
+        :type table: str
+        :return: the column names and the rows
+        :rtype: tuple[list[str], list[tuple]]
+        """
+        rows = self.execute_query(f"SELECT * FROM {table}")
+        columns = [desc[0] for desc in self.cur.description]
+        return columns, [tuple(row) for row in rows]
+
+    def _get_ref_table(self, table: str) -> tuple[list[str], list[tuple]]:
+        key = table.upper()
+        if key not in self._ref_tables:
+            columns, rows = self._load_ref_table(table)
+            self._ref_tables[key] = ([col.upper() for col in columns], rows)
+            self.logger.info("Preloaded %s rows from %s", len(rows), table)
+        return self._ref_tables[key]
+
+    def _match_key(self, value):
+        """Normalize a value so that the in-memory lookups match like the database does
+
+        Numbers are compared by value, whatever their type.
+        Child classes can override this, e.g. for case-insensitive matching.
+        """
+        if isinstance(value, bool):
+            return float(value)
+        if isinstance(value, (int, float, Decimal)):
+            return float(value)
+        return value
+
+    def _get_ref_index(self, table: str, col: str) -> dict:
+        """Index of a preloaded reference table on one column (built on first use)"""
+        key = (table.upper(), col.upper())
+        if key not in self._ref_indexes:
+            columns, rows = self._get_ref_table(table)
+            if key[1] not in columns:
+                raise ValueError(f"No column {col} in {table}")
+            col_idx = columns.index(key[1])
+            index: dict = {}
+            for row_idx, row in enumerate(rows):
+                if row[col_idx] is None:
+                    # NULL never matches
+                    continue
+                index.setdefault(self._match_key(row[col_idx]), []).append(row_idx)
+            self._ref_indexes[key] = index
+        return self._ref_indexes[key]
+
+    def _lookup_ref_rows(self, table: str, col: str, val) -> list[int]:
+        """Indices of the preloaded rows where col matches val"""
+        return self._find_match(self._get_ref_index(table, col), val) or []
+
+    def _find_match(self, mapping: dict, val):
+        """Look up val in a dict keyed by match key
+
+        Like the SQL comparison, a number also matches its string representation, and vice versa.
+        """
+        match = mapping.get(self._match_key(val))
+        if match is None and isinstance(val, str):
+            try:
+                match = mapping.get(self._match_key(float(val)))
+            except ValueError:
+                pass
+        if match is None and isinstance(val, (int, float, Decimal)):
+            match = mapping.get(self._match_key(str(val)))
+        return match
+
+    @staticmethod
+    def _parse_optional_query(optional_query: str) -> list[tuple[str, object]] | None:
+        """Parse an optional_query made of "AND COL=value" clauses
+
+        :return: a list of (column, value), or None if the query cannot be parsed
+        """
+        clauses = []
+        pos = 0
+        optional_query = optional_query.strip()
+        while pos < len(optional_query):
+            match = _OPTIONAL_CLAUSE.match(optional_query, pos)
+            if not match:
+                return None
+            col, literal = match.groups()
+            if literal.startswith("'"):
+                value = literal[1:-1].replace("''", "'")
+            elif "." in literal:
+                value = float(literal)
+            else:
+                value = int(literal)
+            clauses.append((col, value))
+            pos = match.end()
+        return clauses
+
+    def _preloaded_select(
+        self, table: str, select_col: str, col: str, val, optional_query: str = ""
+    ) -> list[tuple] | None:
+        """In-memory equivalent of SELECT select_col FROM table WHERE col=val optional_query
+
+        :return: the result rows, or None if the query has to be sent to the database
+        """
+        clauses = self._parse_optional_query(optional_query)
+        if clauses is None:
+            self.logger.warning(
+                "Cannot use preloaded %s for optional_query %s", table, optional_query
+            )
+            return None
+        columns, rows = self._get_ref_table(table)
+        if select_col.upper() not in columns:
+            raise ValueError(f"No column {select_col} in {table}")
+        select_idx = columns.index(select_col.upper())
+
+        matched = set(self._lookup_ref_rows(table, col, val))
+        for clause_col, clause_val in clauses:
+            matched &= set(self._lookup_ref_rows(table, clause_col, clause_val))
+        return [(rows[row_idx][select_idx],) for row_idx in sorted(matched)]
+
     def get_ref_key(
         self,
         table: str = "tablename",
@@ -47,10 +237,55 @@ class DBHelper:
         :return: The value found in the pkey column for the entry with the value
         :rtype: _type_
         """
+        res = None
+        if self.preload:
+            res = self._preloaded_select(table, pkey_col, col, val, optional_query)
+
         # sanitize string (double escape single quotes)
         val = self._format_sql_string(val)
         query = f"SELECT {pkey_col} FROM {table} WHERE {col}='{val}' {optional_query}"
-        res = self.execute_query(query)
+        if res is None:
+            res = self.execute_query(query)
+
+        if len(res) == 1:
+            return res[0][0]
+        elif len(res) == 0:
+            self.logger.error("No match found for query: %s", query)
+            raise ValueError
+        else:
+            self.logger.error("More than one match found for query: %s", query)
+            raise ValueError
+
+    def get_ref_value(
+        self,
+        table: str = "tablename",
+        col: str = "columnname",
+        key_col: str = "columnofprimarykey",
+        key: int | str = "keyvalue",
+    ):
+        """gets the value of a column for the Oracle reference entry with a given key
+
+        :param table: The name of the Oracle table, defaults to "tablename"
+        :type table: str,
+        :param col: The column that holds the value to return, defaults to "columnname"
+        :type col: str,
+        :param key_col: The column name that holds the key, defaults to "columnofprimarykey"
+        :type key_col: str,
+        :param key: The key of the entry, defaults to "keyvalue"
+        :type key: int | str,
+        :return: The value found in col for the entry with the key
+        :rtype: _type_
+        """
+        res = None
+        if self.preload:
+            res = self._preloaded_select(table, col, key_col, key)
+
+        if isinstance(key, str):
+            query = f"SELECT {col} FROM {table} WHERE {key_col}='{self._format_sql_string(key)}'"
+        else:
+            query = f"SELECT {col} FROM {table} WHERE {key_col}={key}"
+        if res is None:
+            res = self.execute_query(query)
 
         if len(res) == 1:
             return res[0][0]
@@ -81,14 +316,17 @@ class DBHelper:
         """
         if isinstance(val, str):
             # sanitize string (double escape single quotes)
-            val = self._format_sql_string(val)
-            query = f"SELECT {col} FROM {table} WHERE {col}='{val}'"
+            query = f"SELECT {col} FROM {table} WHERE {col}='{self._format_sql_string(val)}'"
         elif isinstance(val, int):
             query = f"SELECT {col} FROM {table} WHERE {col}={val}"
         else:
             print("type error yo?")
             raise TypeError
-        res = self.execute_query(query)
+
+        if self.preload:
+            res = self._preloaded_select(table, col, col, val)
+        else:
+            res = self.execute_query(query)
 
         if len(res) == 1:
             return True
@@ -97,3 +335,64 @@ class DBHelper:
                 "Looking for %s=%s but is not present in table: %s", col, val, table
             )
             return False
+
+    def validate_exists_many(
+        self,
+        table: str = "tablename",
+        col: str = "columnname",
+        values: Iterable[int | str] = (),
+        chunk_size: int = 500,
+    ) -> tuple[list, list]:
+        """
+        Validate that many values exist (and only once) in the DB
+
+        The values are checked in the preloaded table, or with one query per chunk of ``chunk_size`` values.
+
+        :param table: The name of the table, defaults to "tablename"
+        :type table: str, optional
+        :param col: The column that holds the values to match, defaults to "columnname"
+        :type col: str, optional
+        :param values: The values to match
+        :type values: Iterable[int | str]
+        :param chunk_size: maximum number of values per query, defaults to 500
+        :type chunk_size: int, optional
+        :return: the values that are not present, and the values present more than once
+        :rtype: tuple[list, list]
+        """
+        # keep the order, drop duplicates
+        values = list(dict.fromkeys(values))
+        for val in values:
+            if not isinstance(val, (str, int)):
+                raise TypeError(f"Cannot match {val!r} ({type(val).__name__}) in {table}.{col}")
+
+        if self.preload:
+            counts = {val: len(self._lookup_ref_rows(table, col, val)) for val in values}
+        else:
+            # number of matching rows per matched value
+            found: dict = {}
+            for i in range(0, len(values), chunk_size):
+                chunk = values[i : i + chunk_size]
+                in_list = ", ".join(
+                    f"'{self._format_sql_string(val)}'" if isinstance(val, str) else str(val)
+                    for val in chunk
+                )
+                query = f"SELECT {col}, COUNT(*) FROM {table} WHERE {col} IN ({in_list}) GROUP BY {col}"
+                for match, count in self.execute_query(query):
+                    key = self._match_key(match)
+                    found[key] = found.get(key, 0) + count
+            counts = {val: self._find_match(found, val) or 0 for val in values}
+
+        missing = [val for val in values if counts[val] == 0]
+        duplicated = [val for val in values if counts[val] > 1]
+        if missing:
+            self.logger.error(
+                "Looking for %s=%s but is not present in table: %s", col, missing, table
+            )
+        if duplicated:
+            self.logger.error(
+                "Looking for %s=%s but is present more than once in table: %s",
+                col,
+                duplicated,
+                table,
+            )
+        return missing, duplicated
@@ -0,0 +1,122 @@
+import re
+import time
+import traceback
+
+from andes_migrate.table_writer import TableWriter, ordered_tables
+
+# column assigned by the populate_data line that failed, e.g. self.data["COD_TYP_PANIER"] = ...
+_COLUMN_PATTERN = re.compile(r"data\[[\"'](\w+)[\"']\]")
+
+
+class DryRunWriter(TableWriter):
+    """Run the extraction and the validators without writing anything
+
+    Given as output to the table objects, each row is populated (running all the getters
+    and their validators, see :meth:`populate`) and validated (see :meth:`write`), but nothing
+    is written. Failures are recorded instead of stopping the run, so a whole cruise can be
+    checked at once::
+
+        dry_run = DryRunWriter()
+        proj = ProjetMollusque(andes_db, dry_run, ref=ref, zone=zone, no_notif=no_notif, espece=espece)
+        for p in proj:
+            ...
+        print(dry_run.report())
+
+    The timings only include the extraction and the validation, not the output I/O.
+    Do not give a :class:`~andes_migrate.migration_journal.MigrationJournal` to a dry run:
+    the rows would be recorded as completed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.start_time = time.perf_counter()
+        # table name -> statistics
+        self.stats: dict[str, dict] = {}
+        # (table name, Andes primary key, column, error) of each failed row
+        self.failures: list[tuple[str, int, str | None, str]] = []
+        # the current row failed to populate, it is not validated
+        self._row_failed = False
+
+    def _stat(self, table_name: str) -> dict:
+        return self.stats.setdefault(table_name, {"rows": 0, "failures": 0, "total_time": 0.0})
+
+    def populate(self, table):
+        """Populate the current row of a table object, and record its statistics
+
+        :param table: the table object
+        :type table: TablePecheSentinelle
+        """
+        stat = self._stat(table.table_name)
+        start = time.perf_counter()
+        self._row_failed = False
+        try:
+            table.populate_data()
+        except Exception as exc:
+            self._row_failed = True
+            stat["failures"] += 1
+            self._record_failure(table, exc)
+        finally:
+            stat["rows"] += 1
+            stat["total_time"] += time.perf_counter() - start
+
+    def write(self, table):
+        """Validate the current row of a table object (nothing is written)
+
+        :param table: the table object
+        :type table: TablePecheSentinelle
+        """
+        if self._row_failed:
+            # already recorded by populate()
+            return
+        stat = self._stat(table.table_name)
+        start = time.perf_counter()
+        try:
+            table.validate()
+        except NotImplementedError:
+            pass
+        except Exception as exc:
+            stat["failures"] += 1
+            self._record_failure(table, exc)
+        finally:
+            stat["total_time"] += time.perf_counter() - start
+
+    def _record_failure(self, table, exc: Exception):
+        column = None
+        for frame in traceback.extract_tb(exc.__traceback__):
+            if frame.name == "populate_data" and frame.line:
+                match = _COLUMN_PATTERN.search(frame.line)
+                if match:
+                    column = match.group(1)
+        error = f"{type(exc).__name__}: {exc}" if str(exc) else type(exc).__name__
+        pk = table._get_current_row_pk()
+        self.failures.append((table.table_name, pk, column, error))
+        self.logger.warning("%s %s %s failed: %s", table.table_name, pk, column or "", error)
+
+    def write_data(self, table_name: str, data: dict):
+        # nothing is written in a dry run
+        pass
+
+    def contains(self, table_name: str, key: dict) -> bool:
+        return False
+
+    def report(self) -> str:
+        """Human readable report of the rows, throughput and validation failures per table
+
+        :return: the report
+        :rtype: str
+        """
+        elapsed = time.perf_counter() - self.start_time
+        total_rows = sum(stat["rows"] for stat in self.stats.values())
+        lines = [
+            f"{total_rows} rows, {len(self.failures)} failures, {elapsed:.3f} s elapsed",
+            f"{'rows':>8} {'failures':>8} {'time (s)':>10} {'rows/s':>10}  table",
+        ]
+        for table_name in ordered_tables(self.stats.keys()):
+            stat = self.stats[table_name]
+            rate = stat["rows"] / stat["total_time"] if stat["total_time"] else 0.0
+            lines.append(
+                f"{stat['rows']:>8} {stat['failures']:>8} {stat['total_time']:>10.3f} {rate:>10.1f}  {table_name}"
+            )
+        for table_name, pk, column, error in self.failures:
+            lines.append(f"FAILED {table_name} (Andes id {pk}) {column or ''}: {error}")
+        return "\n".join(lines)
@@ -82,16 +82,7 @@ class EnginMollusque(TablePecheSentinelle):
         Code lookup
 
         """
-        set_pk = self.trait._get_current_row_pk()
-
-        query = f"SELECT shared_models_geartype.code \
-                FROM shared_models_set \
-                LEFT JOIN shared_models_geartype \
-                ON shared_models_set.gear_type_id = shared_models_geartype.id \
-                WHERE shared_models_set.id={set_pk};"
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        to_return = result[0][0]
+        to_return = self.trait._get_set_value("gear_type_code")
         return to_return
 
     @validate_int()
@@ -133,18 +124,7 @@ class EnginMollusque(TablePecheSentinelle):
 
         """
 
-        set_pk = self.trait._get_current_row_pk()
-        query = (
-            "SELECT shared_models_auxiliaryequipment.code "
-            "FROM shared_models_set "
-            "LEFT JOIN shared_models_auxiliaryequipment "
-            "ON shared_models_set.auxiliary_equipment_id = shared_models_auxiliaryequipment.id "
-
-            f"WHERE shared_models_set.id={set_pk} "
-        )
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        to_return = result[0][0]
+        to_return = self.trait._get_set_value("auxiliary_equipment_code")
 
         return to_return
 
@@ -184,14 +164,12 @@ class EnginMollusque(TablePecheSentinelle):
         """
 
         cod_engin = self.get_cod_eng_gen()
-        query = (
-            "SELECT ENGIN_GENERAL.NOM_ENG_F "
-            "FROM ENGIN_GENERAL "
-            f"WHERE ENGIN_GENERAL.COD_ENG_GEN={cod_engin}"
+        gear_name = self.reference_data.get_ref_value(
+            table="ENGIN_GENERAL",
+            col="NOM_ENG_F",
+            key_col="COD_ENG_GEN",
+            key=cod_engin,
         )
-        result = self.reference_data.execute_query(query)
-        self._assert_one(result)
-        gear_name = result[0][0]
         self.logger.info("Need to find the code for %s", gear_name)
 
         # cases where automatic assignment needs manual intervention
@@ -266,13 +244,7 @@ class EnginMollusque(TablePecheSentinelle):
         
         The Andes associated field is shared_models_set.trawl_cable_length
         """
-        set_pk = self.trait._get_current_row_pk()
-        query = f"SELECT shared_models_set.trawl_cable_length \
-                FROM shared_models_set \
-                WHERE shared_models_set.id={set_pk};"
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        to_return = result[0][0]
+        to_return = self.trait._get_set_value("trawl_cable_length")
         return to_return
 
     @tag(HardCoded)
@@ -307,13 +279,7 @@ class EnginMollusque(TablePecheSentinelle):
         The Andes associated field is shared_models_set.fill_percent
 
         """
-        set_pk = self.trait._get_current_row_pk()
-        query = f"SELECT shared_models_set.fill_percent \
-                FROM shared_models_set \
-                WHERE shared_models_set.id={set_pk};"
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        to_return = result[0][0]
+        to_return = self.trait._get_set_value("fill_percent")
         return to_return
 
     @tag(HardCoded)
@@ -65,10 +65,12 @@ class FreqLongMollusque(TablePecheSentinelle):
             "ON ecosystem_survey_observation.specimen_id=ecosystem_survey_specimen.id "
             "LEFT JOIN shared_models_observationtypecategory "
             "ON shared_models_observationtypecategory.observation_type_id=ecosystem_survey_observation.id  "
-            f"WHERE ecosystem_survey_catch.id={self.capture._get_current_row_pk()} "
-            f"AND ecosystem_survey_observation.observation_type_id={observation_length_type_id} "
+            "WHERE ecosystem_survey_catch.id=? "
+            "AND ecosystem_survey_observation.observation_type_id=? "
+        )
+        result = self.andes_db.execute_query(
+            query, (self.capture._get_current_row_pk(), observation_length_type_id)
         )
-        result = self.andes_db.execute_query(query)
 
         # a list of all the catch pk's (need to unpack a bit)
         self._row_list = result
@@ -266,11 +268,17 @@ class FreqLongMollusque(TablePecheSentinelle):
             "ON ecosystem_survey_basket.size_class = shared_models_sizeclass.code  "
             "LEFT JOIN shared_models_cruise  "
             "ON shared_models_cruise.sampling_protocol_id = shared_models_sizeclass.sampling_protocol_id  "
-            f"WHERE shared_models_cruise.id={self.capture.engin.trait.proj._get_current_row_pk()} "
-            f"AND ecosystem_survey_basket.id={self.get_current_basket_id()} "
+            "WHERE shared_models_cruise.id=? "
+            "AND ecosystem_survey_basket.id=? "
         )
 
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(
+            query,
+            (
+                self.capture.engin.trait.proj._get_current_row_pk(),
+                self.get_current_basket_id(),
+            ),
+        )
         self._assert_one(result)
         andes_desc = result[0][0]
         # print(query)
@@ -0,0 +1,165 @@
+import datetime
+import math
+from decimal import Decimal
+
+from andes_migrate.table_writer import BufferedTableWriter, key_condition
+
+# columns of the project, part of the natural key of all the tables
+PROJECT_KEY = ["COD_SOURCE_INFO", "NO_RELEVE", "COD_NBPC"]
+
+# columns identifying a row of each table
+NATURAL_KEYS = {
+    "PROJET_MOLLUSQUE": PROJECT_KEY,
+    "TRAIT_MOLLUSQUE": PROJECT_KEY + ["IDENT_NO_TRAIT"],
+    "ENGIN_MOLLUSQUE": PROJECT_KEY + ["IDENT_NO_TRAIT", "COD_ENG_GEN", "NO_ENGIN"],
+    "CAPTURE_MOLLUSQUE": PROJECT_KEY
+    + ["IDENT_NO_TRAIT", "COD_ENG_GEN", "NO_ENGIN", "COD_ESP_GEN", "COD_DESCRIP_CAPT"],
+    "FREQ_LONG_MOLLUSQUE": PROJECT_KEY
+    + ["IDENT_NO_TRAIT", "COD_ENG_GEN", "NO_ENGIN", "COD_ESP_GEN", "NO_MOLLUSQUE"],
+    "BIOMETRIE_MOLLUSQUE": PROJECT_KEY
+    + ["IDENT_NO_TRAIT", "COD_ENG_GEN", "NO_ENGIN", "COD_ESP_GEN", "NO_MOLLUSQUE"],
+    "POIDS_BIOMETRIE": PROJECT_KEY
+    + ["IDENT_NO_TRAIT", "COD_ENG_GEN", "NO_ENGIN", "COD_ESP_GEN", "NO_MOLLUSQUE", "COD_TYP_PDS"],
+}
+
+
+class MergeTableWriter(BufferedTableWriter):
+    """Merge the rows into an existing database, by natural key (see ``NATURAL_KEYS``)
+
+    Re-running a migration into a database that already has (some of) its rows only
+    changes what differs: new rows are inserted, changed rows are updated
+    and identical rows are skipped.
+
+    The existing rows are read in bulk, once per table and project (the ``PROJECT_KEY`` columns),
+    and kept up to date with the merged rows. NULL natural key values match NULL values.
+
+    :param output_cur: the output cursor (with ``?`` placeholders, e.g. pyodbc)
+    :param batch_size: number of rows merged at a time, defaults to 1000
+    :type batch_size: int, optional
+    :param fast_executemany: use the pyodbc ``fast_executemany`` array binding, defaults to True
+    :type fast_executemany: bool, optional
+    :param datetime_strfmt: format of the date values, defaults to "%Y-%m-%d %H:%M:%S"
+    :type datetime_strfmt: str, optional
+    """
+
+    def __init__(
+        self,
+        output_cur,
+        batch_size: int = 1000,
+        fast_executemany: bool = True,
+        datetime_strfmt: str = "%Y-%m-%d %H:%M:%S",
+    ):
+        super().__init__(output_cur, batch_size=batch_size, fast_executemany=fast_executemany)
+        self.datetime_strfmt = datetime_strfmt
+        # table name -> number of inserted, updated and unchanged rows
+        self.stats: dict[str, dict] = {}
+        # (table name, columns, project) -> existing rows, by natural key
+        self._existing: dict[tuple, dict] = {}
+
+    def _normalize(self, value):
+        """Comparable form of a value, whatever the driver returned"""
+        if value is None or (isinstance(value, str) and value == ""):
+            return None
+        if isinstance(value, datetime.datetime):
+            return value.strftime(self.datetime_strfmt)
+        if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+            return float(value)
+        return str(value)
+
+    def _same(self, new_value, old_value) -> bool:
+        new_value = self._normalize(new_value)
+        old_value = self._normalize(old_value)
+        if isinstance(new_value, float) and isinstance(old_value, float):
+            return math.isclose(new_value, old_value, rel_tol=1e-9, abs_tol=1e-9)
+        return new_value == old_value
+
+    def _existing_rows(self, table_name: str, columns: list[str], scope: tuple) -> dict:
+        """Existing rows of a project, by natural key
+
+        Read on the first flush of the table and project, the merged rows are then added by _flush_table().
+        """
+        cache_key = (table_name, tuple(columns), scope)
+        if cache_key not in self._existing:
+            key_columns = NATURAL_KEYS[table_name]
+            col_str = ", ".join(columns)
+            where, params = key_condition(dict(zip(PROJECT_KEY, scope)))
+            self.output_cur.execute(f"SELECT {col_str} FROM {table_name} WHERE {where}", params)
+            key_idx = [columns.index(col) for col in key_columns]
+            self._existing[cache_key] = {
+                tuple(self._normalize(row[i]) for i in key_idx): row
+                for row in self.output_cur.fetchall()
+            }
+        return self._existing[cache_key]
+
+    def _flush_table(self, table_name: str):
+        columns, rows = self._buffers.pop(table_name)
+        if not rows:
+            return
+        if table_name not in NATURAL_KEYS:
+            self.logger.error("No natural key defined for %s", table_name)
+            raise ValueError
+        key_columns = NATURAL_KEYS[table_name]
+        for col in key_columns:
+            if col not in columns:
+                self.logger.error("Natural key column %s missing from %s", col, table_name)
+                raise ValueError
+        key_idx = [columns.index(col) for col in key_columns]
+        scope_idx = [columns.index(col) for col in PROJECT_KEY]
+        value_cols = [col for col in columns if col not in key_columns]
+        value_idx = [columns.index(col) for col in value_cols]
+
+        to_insert = []
+        # the rows to update, grouped by the natural key columns that are NULL (see key_condition())
+        to_update: dict[tuple, list] = {}
+        n_unchanged = 0
+        for row in rows:
+            existing = self._existing_rows(table_name, columns, tuple(row[i] for i in scope_idx))
+            key = tuple(self._normalize(row[i]) for i in key_idx)
+            old_row = existing.get(key)
+            if old_row is None:
+                to_insert.append(row)
+            elif all(self._same(row[i], old_row[i]) for i in value_idx):
+                n_unchanged += 1
+                continue
+            else:
+                null_cols = tuple(col for col, i in zip(key_columns, key_idx) if row[i] is None)
+                to_update.setdefault(null_cols, []).append(row)
+            existing[key] = row
+
+        try:
+            if to_insert:
+                col_str = ", ".join(columns)
+                placeholders = ", ".join("?" * len(columns))
+                self.output_cur.executemany(
+                    f"INSERT INTO {table_name} ({col_str}) VALUES ({placeholders})", to_insert
+                )
+            set_str = ", ".join(f"{col}=?" for col in value_cols)
+            for update_rows in to_update.values():
+                where, _ = key_condition({col: update_rows[0][i] for col, i in zip(key_columns, key_idx)})
+                self.output_cur.executemany(
+                    f"UPDATE {table_name} SET {set_str} WHERE {where}",
+                    [
+                        [row[i] for i in value_idx] + [row[i] for i in key_idx if row[i] is not None]
+                        for row in update_rows
+                    ],
+                )
+        except Exception as exc:
+            # the rows of the failed batch may or may not be in the database
+            self._existing.clear()
+            self.logger.error("Could not merge %s rows in %s", len(rows), table_name)
+            raise exc
+
+        stat = self.stats.setdefault(table_name, {"inserted": 0, "updated": 0, "unchanged": 0})
+        stat["inserted"] += len(to_insert)
+        n_updated = sum(len(update_rows) for update_rows in to_update.values())
+        stat["updated"] += n_updated
+        stat["unchanged"] += n_unchanged
+        self.logger.info(
+            "%s: %s inserted, %s updated, %s unchanged",
+            table_name, len(to_insert), n_updated, n_unchanged,
+        )
+
+    def rollback(self):
+        # the rows merged since the last commit are not in the database anymore
+        self._existing.clear()
+        super().rollback()
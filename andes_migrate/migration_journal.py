@@ -0,0 +1,104 @@
+import json
+import logging
+import os
+
+
+class MigrationJournal:
+    """Progress of a migration run, saved in a local JSON checkpoint file
+
+    Records the Andes primary key of the rows whose output (and all their children)
+    was committed, per table. A rerun with the same journal skips them, and resumes
+    from the first unfinished row.
+
+    A row is recorded as pending before the output is committed, and as completed after.
+    If the run stops in between, the rerun cannot tell whether the pending row was committed,
+    and looks for it in the output (see `TablePecheSentinelle._is_in_output`).
+
+    :param path: the checkpoint file, created if it does not exist
+    :type path: str
+    :param no_notif: the mission number, the journal of another mission is refused
+    :type no_notif: str
+    """
+
+    def __init__(self, path: str, no_notif: str):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.no_notif = no_notif
+        # table name -> completed Andes primary keys
+        self._completed: dict[str, set] = {}
+        # table name -> Andes primary keys of the rows being committed
+        self._pending: dict[str, set] = {}
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as fp:
+                content = json.load(fp)
+            if not content["no_notif"] == no_notif:
+                raise ValueError(
+                    f"{path} is the journal of {content['no_notif']}, not {no_notif}"
+                )
+            self._completed = {
+                table: set(pks) for table, pks in content["completed"].items()
+            }
+            self._pending = {
+                table: set(pks) for table, pks in content.get("pending", {}).items()
+            }
+            self.logger.info("Resuming from %s", path)
+
+    def is_done(self, table_name: str, pk: int) -> bool:
+        """True if the row was committed by a previous run
+
+        :param table_name: the output table
+        :type table_name: str
+        :param pk: the Andes primary key of the row
+        :type pk: int
+        """
+        return pk in self._completed.get(table_name, set())
+
+    def is_pending(self, table_name: str, pk: int) -> bool:
+        """True if a previous run stopped while committing the row
+
+        :param table_name: the output table
+        :type table_name: str
+        :param pk: the Andes primary key of the row
+        :type pk: int
+        """
+        return pk in self._pending.get(table_name, set())
+
+    def mark_pending(self, table_name: str, pk: int):
+        """Record a row about to be committed, and save the journal
+
+        :param table_name: the output table
+        :type table_name: str
+        :param pk: the Andes primary key of the row
+        :type pk: int
+        """
+        self._pending.setdefault(table_name, set()).add(pk)
+        self.save()
+
+    def mark_done(self, table_name: str, pk: int):
+        """Record a committed row, and save the journal
+
+        :param table_name: the output table
+        :type table_name: str
+        :param pk: the Andes primary key of the row
+        :type pk: int
+        """
+        self._pending.get(table_name, set()).discard(pk)
+        self._completed.setdefault(table_name, set()).add(pk)
+        self.save()
+
+    def save(self):
+        """Write the journal (atomically, a crash leaves the previous version)"""
+        content = {
+            "no_notif": self.no_notif,
+            "completed": {
+                table: sorted(pks) for table, pks in self._completed.items()
+            },
+            "pending": {
+                table: sorted(pks) for table, pks in self._pending.items() if pks
+            },
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fp:
+            json.dump(content, fp, indent=1)
+        os.replace(tmp_path, self.path)
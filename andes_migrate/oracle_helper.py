@@ -1,6 +1,10 @@
+import hashlib
 import os
+import sqlite3
+import time
 import pyodbc
 import logging
+import numpy as np
 import oracledb
 
 # from oracledb.exceptions import Error
@@ -9,33 +13,82 @@ from pyodbc import Error
 from dotenv import load_dotenv
 
 from andes_migrate.db_helper import DBHelper
+from andes_migrate.query_profiler import QueryProfiler
+from andes_migrate.sqlite_utils import create_table, description_column_types, insert_rows
 
 load_dotenv()
 
 
 class OracleHelper(DBHelper):
-    def __init__(self, access_file=None):
-        super().__init__()
+    """Helper to query the reference tables of PSE (Oracle) or of an MS Access copy
+
+    With a ``cache_file``, the reference tables read by the lookups (see ``preload``) are saved
+    in a local SQLite file, along with a fingerprint of their source:
+
+        - MS Access: the hash of the Access file,
+        - Oracle: the row count and the latest ORA_ROWSCN of each table.
+
+    Later runs re-use the cached tables whose fingerprint did not change.
+    With MS Access, no connection is made unless a query is not answered by the cache.
+    The Oracle fingerprint needs a connection, so it is only checked again once it is older
+    than ``cache_ttl``: within the TTL, the cached tables are used without connecting.
+    Delete the cache file to force a refresh.
+
+    The connection is only made on the first query. :meth:`shared` returns a
+    single instance to share between all the table objects.
+
+    :param access_file: path to an MS Access file, defaults to None (Oracle)
+    :type access_file: str, optional
+    :param profiler: records the timing of the executed queries, defaults to None
+    :type profiler: QueryProfiler, optional
+    :param preload: keep the reference tables in memory, defaults to False
+    :type preload: bool, optional
+    :param cache_file: path to the SQLite reference cache (implies ``preload``), defaults to None
+    :type cache_file: str, optional
+    :param cache_ttl: seconds during which the Oracle fingerprints are trusted without being checked
+        again, 0 checks them on every run, None never checks them, defaults to one day
+    :type cache_ttl: float, optional
+    """
+
+    def __init__(
+        self,
+        access_file=None,
+        profiler: QueryProfiler | None = None,
+        preload: bool = False,
+        cache_file: str | None = None,
+        cache_ttl: float | None = 24 * 3600,
+    ):
+        super().__init__(preload=preload or cache_file is not None)
+        self.profiler = profiler
+        # NOM_NORME -> (COD_ESP_GEN -> [COD_ESPECE], COD_ESPECE -> [COD_ESP_GEN])
+        self._species_maps: dict[str, tuple[dict, dict]] = {}
 
         self.logger = logging.getLogger(__name__)
         # datime format on MS access DB
         self.datetime_strfmt = "%Y-%m-%d %H:%M:%S"
-        self.ms_access: bool
+        self.ms_access: bool = bool(access_file)
+        self.access_file = access_file
+        if not self.ms_access:
+            # IMLP uses WE8MSWIN1252
+            self.db_charset = "Windows-1252"
 
-        if access_file:
-            self.ms_access = True
+        self.cache_file = cache_file
+        self.cache_ttl = cache_ttl
+        self._cache_con: sqlite3.Connection | None = None
+        self._access_fingerprint: str | None = None
+        # opened on the first reference table lookup
+        self._cache_opened = False
+
+    def _connect(self):
+        if self.ms_access:
             self.con = pyodbc.connect(
-                f"Driver={{Microsoft Access Driver (*.mdb, *.accdb)}};DBQ={access_file};"
+                f"Driver={{Microsoft Access Driver (*.mdb, *.accdb)}};DBQ={self.access_file};"
             )
             print("Successfully connected to Microsoft Access file")
 
         else:
             os.environ.get("PYO_SAMPLES_ORACLE_CLIENT_PATH")
 
-            self.ms_access = False
-            # IMLP uses WE8MSWIN1252
-            self.db_charset = "Windows-1252"
-
             host = os.getenv("ORACLE_HOST", "default host")
             port = int(os.getenv("ORACLE_PORT", 123))
             sid = os.getenv("ORACLE_SID", "default sid")
@@ -49,7 +102,109 @@ class OracleHelper(DBHelper):
             print("Successfully connected to the Oracle Database")
         self.cur = self.con.cursor()
 
+    def _get_ref_table(self, table: str) -> tuple[list[str], list[tuple]]:
+        if self.cache_file and not self._cache_opened:
+            self._open_cache()
+        return super()._get_ref_table(table)
+
+    def _fingerprints(self, tables: list[str]) -> dict[str, str]:
+        """Fingerprint of the source of each table, changes when the table content may have changed"""
+        if not tables:
+            return {}
+        if self.ms_access:
+            if self._access_fingerprint is None:
+                sha = hashlib.sha256()
+                with open(self.access_file, "rb") as f:
+                    for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                        sha.update(chunk)
+                self._access_fingerprint = sha.hexdigest()
+            return {table: self._access_fingerprint for table in tables}
+
+        query = " UNION ALL ".join(
+            f"SELECT '{table}', COUNT(*), MAX(ORA_ROWSCN) FROM {table}" for table in tables
+        )
+        return {
+            table: f"{count}:{scn}" for table, count, scn in self.execute_query(query)
+        }
+
+    def _open_cache(self):
+        """Load the cached tables that are still valid, drop the others"""
+        self._cache_opened = True
+        self._cache_con = sqlite3.connect(
+            self.cache_file, detect_types=sqlite3.PARSE_DECLTYPES
+        )
+        self._cache_con.execute(
+            "CREATE TABLE IF NOT EXISTS _cache_meta (table_name TEXT PRIMARY KEY, fingerprint TEXT, checked_at REAL)"
+        )
+        meta_columns = [row[1] for row in self._cache_con.execute("PRAGMA table_info(_cache_meta)")]
+        if "checked_at" not in meta_columns:
+            # cache written before the TTL, its tables are checked on this run
+            self._cache_con.execute("ALTER TABLE _cache_meta ADD COLUMN checked_at REAL")
+        stored = self._cache_con.execute(
+            "SELECT table_name, fingerprint, checked_at FROM _cache_meta"
+        ).fetchall()
+        now = time.time()
+        fresh = {table for table, _, checked_at in stored if self._is_fresh(checked_at, now)}
+        # no connection when all the tables are fresh
+        current = self._fingerprints([table for table, _, _ in stored if table not in fresh])
+        for table, fingerprint, _ in stored:
+            if table in fresh or current.get(table) == fingerprint:
+                if table not in fresh:
+                    self._cache_con.execute(
+                        "UPDATE _cache_meta SET checked_at=? WHERE table_name=?", (now, table)
+                    )
+                cur = self._cache_con.execute(f'SELECT * FROM "{table}"')
+                # upper case, like the tables loaded by _get_ref_table()
+                columns = [desc[0].upper() for desc in cur.description]
+                self._ref_tables[table] = (columns, cur.fetchall())
+            else:
+                self.logger.info("Reference cache of %s is out of date", table)
+                self._cache_con.execute(f'DROP TABLE IF EXISTS "{table}"')
+                self._cache_con.execute(
+                    "DELETE FROM _cache_meta WHERE table_name=?", (table,)
+                )
+        self._cache_con.commit()
+        self.logger.info(
+            "Loaded %s reference tables from %s", len(self._ref_tables), self.cache_file
+        )
+
+    def _is_fresh(self, checked_at: float | None, now: float) -> bool:
+        """True if a cached Oracle table can be used without checking its fingerprint"""
+        if self.ms_access or checked_at is None:
+            # hashing the Access file needs no connection
+            return False
+        return self.cache_ttl is None or now - checked_at < self.cache_ttl
+
+    def _load_ref_table(self, table: str) -> tuple[list[str], list[tuple]]:
+        columns, rows = super()._load_ref_table(table)
+        if self._cache_con is not None:
+            # before _fingerprints(), which runs another query on the cursor
+            types = description_column_types(self.cur.description)
+            table = table.upper()
+            create_table(self._cache_con, table, columns, rows, types=types)
+            insert_rows(self._cache_con, table, columns, rows)
+            self._cache_con.execute(
+                "INSERT OR REPLACE INTO _cache_meta VALUES (?, ?, ?)",
+                (table, self._fingerprints([table])[table], time.time()),
+            )
+            self._cache_con.commit()
+        return columns, rows
+
     def execute_query(self, query: str):
+        if self.profiler is None:
+            return self._execute_query(query)
+
+        start = time.perf_counter()
+        result = self._execute_query(query)
+        self.profiler.record(
+            query,
+            time.perf_counter() - start,
+            len(result),
+            source="access" if self.ms_access else "oracle",
+        )
+        return result
+
+    def _execute_query(self, query: str):
         if self.ms_access:
             try:
                 res = self.cur.execute(query)
@@ -66,6 +221,12 @@ class OracleHelper(DBHelper):
             else:
                 return self.cur.fetchall()
 
+    def _match_key(self, value):
+        # text comparisons are case-insensitive in MS Access
+        if self.ms_access and isinstance(value, str):
+            return value.casefold()
+        return super()._match_key(value)
+
     def execute_statement(self, statement: str):
         if self.ms_access:
             res = self.cur.execute(statement)
@@ -79,6 +240,91 @@ class OracleHelper(DBHelper):
             else:
                 return self.cur.fetchall()
 
+    def _strap_norme_name(self) -> str:
+        # yup, ms access has a different name
+        if self.ms_access:
+            return "STRAP"
+        else:
+            return "STRAP_IML"
+
+    @staticmethod
+    def _species_key(code):
+        try:
+            return int(code)
+        except (TypeError, ValueError):
+            return code
+
+    def _get_species_maps(self, norme_name_str: str) -> tuple[dict, dict]:
+        """Translation maps between COD_ESP_GEN and the species codes of a norm
+
+        All the codes of the norm are read with a single query (on first use).
+        Codes mapped to more than one value are reported here, and raise a ValueError when looked up.
+
+        :param norme_name_str: the norm name (NORME.NOM_NORME)
+        :type norme_name_str: str
+        :return: (COD_ESP_GEN -> [COD_ESPECE], COD_ESPECE -> [COD_ESP_GEN])
+        :rtype: tuple[dict, dict]
+        """
+        if norme_name_str not in self._species_maps:
+            if self.preload:
+                rows = self._preloaded_species_codes(norme_name_str)
+            else:
+                rows = self.execute_query(
+                    "SELECT ESPECE_NORME.COD_ESP_GEN, ESPECE_NORME.COD_ESPECE "
+                    "FROM ESPECE_NORME "
+                    "LEFT JOIN NORME "
+                    "ON ESPECE_NORME.COD_NORME=NORME.COD_NORME "
+                    f"WHERE NORME.NOM_NORME='{norme_name_str}' "
+                )
+            from_cod_esp_gen: dict = {}
+            to_cod_esp_gen: dict = {}
+            for cod_esp_gen, cod_espece in rows:
+                cod_esp_gen = self._species_key(cod_esp_gen)
+                cod_espece = self._species_key(cod_espece)
+                from_cod_esp_gen.setdefault(cod_esp_gen, []).append(cod_espece)
+                to_cod_esp_gen.setdefault(cod_espece, []).append(cod_esp_gen)
+
+            ambiguous = [k for k, v in from_cod_esp_gen.items() if len(v) > 1]
+            if ambiguous:
+                self.logger.warning(
+                    "COD_ESP_GEN with more than one %s code: %s", norme_name_str, ambiguous
+                )
+            ambiguous = [k for k, v in to_cod_esp_gen.items() if len(v) > 1]
+            if ambiguous:
+                self.logger.warning(
+                    "%s codes with more than one COD_ESP_GEN: %s", norme_name_str, ambiguous
+                )
+            self._species_maps[norme_name_str] = (from_cod_esp_gen, to_cod_esp_gen)
+        return self._species_maps[norme_name_str]
+
+    def _preloaded_species_codes(self, norme_name_str: str) -> list[tuple]:
+        """In-memory equivalent of the ESPECE_NORME-NORME join of :meth:`_get_species_maps`"""
+        norme_cols, norme_rows = self._get_ref_table("NORME")
+        espece_cols, espece_rows = self._get_ref_table("ESPECE_NORME")
+        cod_normes = {
+            self._match_key(row[norme_cols.index("COD_NORME")])
+            for row in norme_rows
+            if self._match_key(row[norme_cols.index("NOM_NORME")])
+            == self._match_key(norme_name_str)
+        }
+        return [
+            (row[espece_cols.index("COD_ESP_GEN")], row[espece_cols.index("COD_ESPECE")])
+            for row in espece_rows
+            if self._match_key(row[espece_cols.index("COD_NORME")]) in cod_normes
+        ]
+
+    def _translate_species(self, norme_name_str: str, code, to_cod_esp_gen: bool) -> int:
+        from_map, to_map = self._get_species_maps(norme_name_str)
+        species_map = to_map if to_cod_esp_gen else from_map
+        result = species_map.get(self._species_key(code), [])
+        if not len(result) == 1:
+            self.logger.error(
+                "Expected only one %s match for %s, got %s", norme_name_str, code, len(result)
+            )
+            raise ValueError("Expected only one result.")
+        else:
+            return int(result[0])
+
     def _cod_esp_gen_2_aphia_id(self, code_esp: int) -> int:
         """convert code espece general to aphia id
         returns mapped aphia
@@ -89,21 +335,7 @@ class OracleHelper(DBHelper):
         :rtype: int
 
         """
-        norme_name_str = "AphiaId"
-        query = (
-            "SELECT ESPECE_NORME.COD_ESPECE "
-            "FROM ESPECE_NORME "
-            "LEFT JOIN NORME "
-            "ON ESPECE_NORME.COD_NORME=NORME.COD_NORME "
-            f"WHERE NORME.NOM_NORME='{norme_name_str}' "
-            f"AND ESPECE_NORME.COD_ESP_GEN={code_esp}"
-        )
-
-        result = self.execute_query(query)
-        if not len(result) == 1:
-            raise ValueError("Expected only one result.")
-        else:
-            return int(result[0][0])
+        return self._translate_species("AphiaId", code_esp, to_cod_esp_gen=False)
 
     def _cod_esp_gen_2_strap(self, code_esp: int) -> int:
         """convert code espece general to aphia id
@@ -115,25 +347,9 @@ class OracleHelper(DBHelper):
         :rtype: int
 
         """
-        if self.ms_access:
-            norme_name_str = "STRAP"
-        else:
-            norme_name_str = "STRAP_IML"
-
-        query = (
-            "SELECT ESPECE_NORME.COD_ESPECE "
-            "FROM ESPECE_NORME "
-            "LEFT JOIN NORME "
-            "ON ESPECE_NORME.COD_NORME=NORME.COD_NORME "
-            f"WHERE NORME.NOM_NORME='{norme_name_str}' "
-            f"AND ESPECE_NORME.COD_ESP_GEN={code_esp}"
+        return self._translate_species(
+            self._strap_norme_name(), code_esp, to_cod_esp_gen=False
         )
-        result = self.execute_query(query)
-        if not len(result) == 1:
-            raise ValueError("Expected only one result.")
-        else:
-            return int(result[0][0])
-
 
     def _aphia_id_2_cod_esp_gen(self, aphia_id: int) -> int:
         """convert code aphia id to espece general
@@ -144,21 +360,7 @@ class OracleHelper(DBHelper):
         :rtype: int
 
         """
-        norme_name_str = "AphiaId"
-        query = (
-            "SELECT ESPECE_NORME.COD_ESP_GEN "
-            "FROM ESPECE_NORME "
-            "LEFT JOIN NORME "
-            "ON ESPECE_NORME.COD_NORME=NORME.COD_NORME "
-            f"WHERE NORME.NOM_NORME='{norme_name_str}' "
-            f"AND ESPECE_NORME.COD_ESPECE={aphia_id}"
-        )
-
-        result = self.execute_query(query)
-        if not len(result) == 1:
-            raise ValueError("Expected only one result.")
-        else:
-            return int(result[0][0])
+        return self._translate_species("AphiaId", aphia_id, to_cod_esp_gen=True)
 
     def _strap_2_cod_esp_gen(self, strap_code: int) -> int:
         """convert STRAP code to code espece general
@@ -169,32 +371,14 @@ class OracleHelper(DBHelper):
         :rtype: int
 
         """
-        # yup, ms access has a different name
-        if self.ms_access:
-            norme_name_str = "STRAP"
-        else:
-            norme_name_str = "STRAP_IML"
-
-        query = (
-            "SELECT ESPECE_NORME.COD_ESP_GEN "
-            "FROM ESPECE_NORME "
-            "LEFT JOIN NORME "
-            "ON ESPECE_NORME.COD_NORME=NORME.COD_NORME "
-            f"WHERE NORME.NOM_NORME='{norme_name_str}' "
-            f"AND ESPECE_NORME.COD_ESPECE={strap_code}"
+        return self._translate_species(
+            self._strap_norme_name(), strap_code, to_cod_esp_gen=True
         )
-        result = self.execute_query(query)
-        # print(query)
-        if not len(result) == 1:
-            self.logger.error("Expected only one result, got %s", len(result))
-            raise ValueError
-        else:
-            return int(result[0][0])
 
     @staticmethod
     def value_2_string(value: str | int | float | None) ->str|int|float:
         """formats a valu into a SQL string
-        It will wrap string with an extr set of singel quotes.
+        It will wrap string with an extr set of singel quotes (and double the quotes inside it).
         This usualy does nothing to the value itself except will make None-types a NULL
 
         :param val: a value to insert
@@ -207,7 +391,8 @@ class OracleHelper(DBHelper):
         elif isinstance(value,str):
             if (value==''):
                 return "NULL"
-            return f"'{value}'"
+            escaped = value.replace("'", "''")
+            return f"'{escaped}'"
         else:
             return value
 
@@ -285,6 +470,63 @@ class OracleHelper(DBHelper):
         else:
             return None
 
+    @staticmethod
+    def _missing_coords(coords, mask=None) -> tuple[np.ndarray, np.ndarray]:
+        """float array of the coordinates, and the boolean array of the missing ones
+
+        None and NaN are missing, as well as the values where ``mask`` is True.
+        """
+        coords = np.asarray(coords, dtype=float)
+        missing = np.isnan(coords)
+        if mask is not None:
+            mask = np.asarray(mask, dtype=bool)
+            if not mask.shape == coords.shape:
+                raise ValueError(
+                    f"mask shape {mask.shape} does not match coordinates shape {coords.shape}"
+                )
+            missing |= mask
+        return coords, missing
+
+    @staticmethod
+    def to_oracle_coords(coords, mask=None) -> np.ndarray:
+        """convert an array of coordinates to the unique coordinate encoding scheme
+
+        Vectorized version of :meth:`_to_oracle_coord`, for whole cruises or historical data.
+        Unlike the scalar version, 0.0 is a valid coordinate.
+
+        :param coords: coordinates in degrees decimal (None or NaN for missing values)
+        :type coords: array_like
+        :param mask: True where the coordinate is missing, defaults to None
+        :type mask: array_like, optional
+        :return: the encoded coordinates, NaN where missing
+        :rtype: np.ndarray
+        """
+        coords, missing = OracleHelper._missing_coords(coords, mask)
+        degrees = np.trunc(coords)
+        min_dec = (coords - degrees) * 60
+        to_return = degrees * 100 + min_dec
+        return np.where(missing, np.nan, to_return)
+
+    @staticmethod
+    def from_oracle_coords(coords, mask=None) -> np.ndarray:
+        """convert an array of coordinates from the unique coordinate encoding scheme
+
+        Vectorized version of :meth:`_from_oracle_coord`, for whole cruises or historical data.
+        Unlike the scalar version, 0.0 is a valid coordinate.
+
+        :param coords: coordinates in the oracle encoding (None or NaN for missing values)
+        :type coords: array_like
+        :param mask: True where the coordinate is missing, defaults to None
+        :type mask: array_like, optional
+        :return: the coordinates in degrees decimal, NaN where missing
+        :rtype: np.ndarray
+        """
+        coords, missing = OracleHelper._missing_coords(coords, mask)
+        degrees = np.trunc(coords / 100)
+        min_dec = (coords - degrees * 100) / 60
+        to_return = degrees + min_dec
+        return np.where(missing, np.nan, to_return)
+
 
 if __name__ == "__main__":
     key_col = "COD_SECTEUR_RELEVE"
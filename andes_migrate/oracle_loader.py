@@ -0,0 +1,158 @@
+"""Load the migration output directly in PSE (Oracle)
+
+Instead of writing to an MS Access file and copy-pasting the tables by hand
+(see docs/source/combiner_bd.md), give an :class:`OracleBulkLoader` as output to the table objects::
+
+    ref = OracleHelper()
+    with OracleBulkLoader(ref.con) as loader:
+        proj = ProjetMollusque(andes_db, loader, ref=ref, zone=zone, no_notif=no_notif, espece=espece)
+        for p in proj:
+            trait = TraitMollusque(andes_db, proj, loader)
+            ...
+
+The rows are kept in memory, and inserted on :meth:`OracleBulkLoader.commit`, table by table
+(parent -> child), with array binding, in a single transaction.
+"""
+import datetime
+from collections import defaultdict
+
+import oracledb
+
+from andes_migrate.table_writer import TableWriter, null_if_empty, ordered_tables
+
+_STRING_TYPES = (
+    oracledb.DB_TYPE_CHAR,
+    oracledb.DB_TYPE_NCHAR,
+    oracledb.DB_TYPE_NVARCHAR,
+    oracledb.DB_TYPE_VARCHAR,
+)
+_DATE_TYPES = (
+    oracledb.DB_TYPE_DATE,
+    oracledb.DB_TYPE_TIMESTAMP,
+)
+
+
+class OracleBulkLoader(TableWriter):
+    """Insert the migration output in Oracle, with array binding (``executemany``)
+
+    Rows are buffered per table until :meth:`commit`, then each table is inserted in
+    ``batch_size`` round trips, parent tables first (see :data:`~andes_migrate.table_writer.TABLE_ORDER`).
+    Errors are collected for the whole load (``batcherrors``); if any row fails,
+    the transaction is rolled back and nothing is kept.
+
+    :param con: connection to the PSE Oracle database
+    :type con: oracledb.Connection
+    :param batch_size: number of rows sent per round trip, defaults to 1000
+    :type batch_size: int, optional
+    :param datetime_strfmt: format of the date values given as strings, defaults to "%Y-%m-%d %H:%M:%S"
+    :type datetime_strfmt: str, optional
+    """
+
+    def __init__(
+        self,
+        con: oracledb.Connection,
+        batch_size: int = 1000,
+        datetime_strfmt: str = "%Y-%m-%d %H:%M:%S",
+    ):
+        super().__init__()
+        self.con = con
+        self.batch_size = batch_size
+        self.datetime_strfmt = datetime_strfmt
+        # table name -> buffered rows
+        self._rows: dict[str, list[dict]] = defaultdict(list)
+        # (table name, row index, message) of the rows rejected by the last commit
+        self.errors: list[tuple[str, int, str]] = []
+
+    def write_data(self, table_name: str, data: dict):
+        self._rows[table_name].append(data)
+
+    def _column_types(self, cur: oracledb.Cursor, table_name: str) -> dict:
+        cur.execute(f"SELECT * FROM {table_name} WHERE 1=0")
+        return {desc[0].upper(): desc for desc in cur.description}
+
+    def _to_bind_value(self, value, desc):
+        value = null_if_empty(value)
+        if isinstance(value, str) and desc[1] in _DATE_TYPES:
+            return datetime.datetime.strptime(value, self.datetime_strfmt)
+        return value
+
+    def _load_table(self, cur: oracledb.Cursor, table_name: str, rows: list[dict]) -> int:
+        columns = list(rows[0].keys())
+        column_types = self._column_types(cur, table_name)
+        descs = []
+        for col in columns:
+            if col.upper() not in column_types:
+                self.logger.error("Column %s not found in %s", col, table_name)
+                raise ValueError
+            descs.append(column_types[col.upper()])
+
+        # explicit bind types, so NULLs in the first rows do not decide the type
+        cur.setinputsizes(
+            *[desc[3] if desc[1] in _STRING_TYPES else desc[1] for desc in descs]
+        )
+        col_str = ", ".join(columns)
+        placeholders = ", ".join(f":{i + 1}" for i in range(len(columns)))
+        statement = f"INSERT INTO {table_name} ({col_str}) VALUES ({placeholders})"
+
+        n_errors = len(self.errors)
+        for start in range(0, len(rows), self.batch_size):
+            batch = [
+                [self._to_bind_value(row[col], desc) for col, desc in zip(columns, descs)]
+                for row in rows[start : start + self.batch_size]
+            ]
+            cur.executemany(statement, batch, batcherrors=True)
+            for error in cur.getbatcherrors():
+                self.errors.append((table_name, start + error.offset, error.message))
+        return len(rows) - (len(self.errors) - n_errors)
+
+    def contains(self, table_name: str, key: dict) -> bool:
+        """True if a row with these column values is in Oracle (the buffered rows are not looked at)"""
+        conditions = []
+        params = []
+        for col, value in key.items():
+            value = null_if_empty(value)
+            if value is None:
+                conditions.append(f"{col} IS NULL")
+            else:
+                params.append(value)
+                conditions.append(f"{col}=:{len(params)}")
+        cur = self.con.cursor()
+        try:
+            cur.execute(f"SELECT COUNT(*) FROM {table_name} WHERE {' AND '.join(conditions)}", params)
+            return cur.fetchone()[0] > 0
+        finally:
+            cur.close()
+
+    def commit(self) -> dict[str, int]:
+        """Insert all the buffered rows, in one transaction
+
+        :return: number of inserted rows per table
+        :rtype: dict[str, int]
+        """
+        self.errors = []
+        counts = {}
+        cur = self.con.cursor()
+        try:
+            for table_name in ordered_tables(self._rows.keys()):
+                counts[table_name] = self._load_table(cur, table_name, self._rows[table_name])
+                self.logger.info("Inserted %s rows in %s", counts[table_name], table_name)
+        except Exception as exc:
+            self.con.rollback()
+            raise exc
+        finally:
+            cur.close()
+
+        if self.errors:
+            self.con.rollback()
+            for table_name, idx, message in self.errors:
+                self.logger.error("%s row %s: %s", table_name, idx, message)
+            raise ValueError(f"{len(self.errors)} rows rejected, nothing was loaded")
+
+        self.con.commit()
+        self._rows.clear()
+        return counts
+
+    def rollback(self):
+        """Discard the buffered rows"""
+        self._rows.clear()
+        self.con.rollback()
@@ -63,11 +63,18 @@ class PoidsBiometrie(TablePecheSentinelle):
             "ON ecosystem_survey_catch.id=ecosystem_survey_basket.catch_id "
             "LEFT JOIN shared_models_species "
             "ON ecosystem_survey_catch.species_id = shared_models_species.id "
-            f"WHERE ecosystem_survey_catch.id={self.biometrie.capture._get_current_row_pk()} "
-            f"AND shared_models_species.aphia_id = {target_aphia_id} "
-            f"AND ecosystem_survey_basket.size_class = {target_size_class} "
+            "WHERE ecosystem_survey_catch.id=? "
+            "AND shared_models_species.aphia_id = ? "
+            "AND ecosystem_survey_basket.size_class = ? "
+        )
+        result = self.andes_db.execute_query(
+            query,
+            (
+                self.biometrie.capture._get_current_row_pk(),
+                target_aphia_id,
+                target_size_class,
+            ),
         )
-        result = self.andes_db.execute_query(query)
 
         # a list of all the catch pk's (need to unpack a bit)
                 # a list of all the catch pk's (need to unpack a bit)
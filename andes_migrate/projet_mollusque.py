@@ -2,6 +2,7 @@ import logging
 import datetime
 
 from andes_migrate.andes_helper import AndesHelper
+from andes_migrate.migration_journal import MigrationJournal
 from andes_migrate.oracle_helper import OracleHelper
 from andes_migrate.table_peche_sentinelle import TablePecheSentinelle
 from andes_migrate.decorators import (
@@ -22,17 +23,23 @@ from andes_migrate.decorators import (
 class ProjetMollusque(TablePecheSentinelle):
     """
     Object model representing the PROJET_MOLLUSQUE table
+
+    With a `journal` (:class:`~andes_migrate.migration_journal.MigrationJournal`), the run is resumable:
+    the output is committed after the project row and after each trait (with all its children),
+    and a rerun skips what was already committed.
     """
 
     def __init__(self, andes_db, *args,
             zone: str = "defaultzone",
             no_notif: str = "IML-2000-001",
             espece: str = "pétoncle",
+            journal: MigrationJournal | None = None,
             **kwargs
              ):
         
         super().__init__(*args, **kwargs)
         self.andes_db = andes_db
+        self.journal = journal
 
         self.init_input(
             zone=zone,
@@ -88,6 +95,21 @@ class ProjetMollusque(TablePecheSentinelle):
                 f"La date debut {date_start} est apres la date fin {date_end}"
             )
 
+    def write_row(self):
+        if self.journal is not None:
+            pk = self._get_current_row_pk()
+            if self.journal.is_done(self.table_name, pk):
+                # committed by a previous run
+                return
+            if self.journal.is_pending(self.table_name, pk) and self._is_in_output():
+                # committed by a previous run, which stopped before recording it
+                self.journal.mark_done(self.table_name, pk)
+                return
+            super().write_row()
+            self._checkpoint()
+            return
+        super().write_row()
+
     def _init_rows(self):
         """
         mission_number (str)
@@ -96,10 +118,10 @@ class ProjetMollusque(TablePecheSentinelle):
         query = (
             "SELECT shared_models_cruise.id "
             "FROM shared_models_cruise "
-            f"WHERE shared_models_cruise.mission_number='{self.no_notification}'"
+            "WHERE shared_models_cruise.mission_number=?"
         )
 
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self.no_notification,))
         self._assert_one(result)
 
         # a list of all the catch pk's (need to unpack a bit)
@@ -181,11 +203,11 @@ class ProjetMollusque(TablePecheSentinelle):
 
         """
         query = (
-            f"SELECT shared_models_cruise.description "
+            "SELECT shared_models_cruise.description "
             "FROM shared_models_cruise "
-            f"WHERE shared_models_cruise.id = {self._get_current_row_pk()}"
+            "WHERE shared_models_cruise.id = ?"
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
 
         description = result[0][0]
@@ -228,9 +250,9 @@ class ProjetMollusque(TablePecheSentinelle):
         query = (
             "SELECT shared_models_cruise.survey_number "
             "FROM shared_models_cruise "
-            f"WHERE shared_models_cruise.id={self._get_current_row_pk()}"
+            "WHERE shared_models_cruise.id=?"
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
 
         to_return = result[0][0]
@@ -257,9 +279,9 @@ class ProjetMollusque(TablePecheSentinelle):
             "FROM shared_models_cruise "
             "LEFT JOIN shared_models_vessel "
             "ON shared_models_cruise.vessel_id=shared_models_vessel.id "
-            f"WHERE shared_models_cruise.id={self._get_current_row_pk()}"
+            "WHERE shared_models_cruise.id=?"
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
 
         to_return = result[0][0]
@@ -288,9 +310,9 @@ class ProjetMollusque(TablePecheSentinelle):
         query = (
             "SELECT shared_models_cruise.season "
             "FROM shared_models_cruise "
-            f"WHERE shared_models_cruise.id={self._get_current_row_pk()}"
+            "WHERE shared_models_cruise.id=?"
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
         to_return = result[0][0]
 
@@ -369,9 +391,9 @@ class ProjetMollusque(TablePecheSentinelle):
             "FROM shared_models_cruise "
             "LEFT JOIN shared_models_stratificationtype "
             "ON shared_models_cruise.stratification_type_id=shared_models_stratificationtype.id "
-            f"WHERE shared_models_cruise.id={self._get_current_row_pk()}"
+            "WHERE shared_models_cruise.id=?"
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
 
         self.logger.info("%s est %s", result[0][0], result[0][1])
@@ -395,9 +417,9 @@ class ProjetMollusque(TablePecheSentinelle):
         query = (
             "SELECT shared_models_cruise.start_date "
             "FROM shared_models_cruise "
-            f"WHERE id = {self._get_current_row_pk()}"
+            "WHERE id = ?"
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
 
         to_return = result[0][0]
@@ -418,9 +440,9 @@ class ProjetMollusque(TablePecheSentinelle):
         query = (
             "SELECT shared_models_cruise.end_date "
             "FROM shared_models_cruise "
-            f"WHERE id = {self._get_current_row_pk()}"
+            "WHERE id = ?"
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
 
         to_return = result[0][0]
@@ -442,9 +464,9 @@ class ProjetMollusque(TablePecheSentinelle):
         query = (
             "SELECT shared_models_cruise.mission_number "
             "FROM shared_models_cruise "
-            f"WHERE shared_models_cruise.id = {self._get_current_row_pk()}"
+            "WHERE shared_models_cruise.id = ?"
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
         to_return = result[0][0]
         return to_return
@@ -461,9 +483,9 @@ class ProjetMollusque(TablePecheSentinelle):
         query = (
             "SELECT shared_models_cruise.chief_scientist "
             "FROM shared_models_cruise "
-            f"WHERE shared_models_cruise.id = {self._get_current_row_pk()}"
+            "WHERE shared_models_cruise.id = ?"
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
         to_return = result[0][0]
         return to_return
@@ -517,9 +539,9 @@ class ProjetMollusque(TablePecheSentinelle):
         query = (
             "SELECT shared_models_cruise.targeted_trawl_duration "
             "FROM shared_models_cruise "
-            f"WHERE shared_models_cruise.id={self._get_current_row_pk()} "
+            "WHERE shared_models_cruise.id=? "
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
         to_return = result[0][0]
         return to_return
@@ -552,9 +574,9 @@ class ProjetMollusque(TablePecheSentinelle):
         query = (
             "SELECT shared_models_cruise.targeted_trawl_speed "
             "FROM shared_models_cruise "
-            f"WHERE shared_models_cruise.id={self._get_current_row_pk()} "
+            "WHERE shared_models_cruise.id=? "
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
         to_return = result[0][0]
         return to_return
@@ -598,9 +620,9 @@ class ProjetMollusque(TablePecheSentinelle):
         query = (
             "SELECT shared_models_cruise.targeted_trawl_distance "
             "FROM shared_models_cruise "
-            f"WHERE shared_models_cruise.id={self._get_current_row_pk()} "
+            "WHERE shared_models_cruise.id=? "
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
         to_return = result[0][0]
         to_return = float(to_return)
@@ -679,9 +701,9 @@ class ProjetMollusque(TablePecheSentinelle):
         query = (
             "SELECT shared_models_cruise.samplers "
             "FROM shared_models_cruise "
-            f"WHERE shared_models_cruise.id={self._get_current_row_pk()} "
+            "WHERE shared_models_cruise.id=? "
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
         to_return = result[0][0]
         return to_return
@@ -700,9 +722,9 @@ class ProjetMollusque(TablePecheSentinelle):
         query = (
             "SELECT shared_models_cruise.notes "
             "FROM shared_models_cruise "
-            f"WHERE shared_models_cruise.id={self._get_current_row_pk()} "
+            "WHERE shared_models_cruise.id=? "
         )
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
         to_return = result[0][0]
 
@@ -0,0 +1,141 @@
+import json
+import logging
+import re
+import threading
+
+
+class QueryProfiler:
+    """Collects timing statistics of the queries executed by a DB helper
+
+    Queries are grouped by template: string and numeric literals are replaced
+    by ``?`` so that the same query executed for different rows is only counted once.
+
+    A single profiler can be shared by many helpers, e.g.::
+
+        profiler = QueryProfiler()
+        andes_db = AndesHelper(profiler=profiler)
+        ref = OracleHelper(access_file=..., profiler=profiler)
+        ...
+        print(profiler.report(top_n=20))
+        profiler.dump_json("query_profile.json")
+
+    """
+
+    # quoted strings, or numbers not part of an identifier
+    _literal_pattern = re.compile(
+        r"'(?:[^']|'')*'|(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])"
+    )
+    # list of placeholders, as found in a IN (...) clause
+    _placeholder_list_pattern = re.compile(r"\?(?:\s*,\s*\?)+")
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        # template -> statistics
+        self.stats: dict[str, dict] = {}
+
+    @classmethod
+    def to_template(cls, query: str) -> str:
+        """Strip the literals out of a query
+
+        :param query: the SQL query
+        :type query: str
+        :return: the query with literals replaced by ``?`` and whitespace collapsed
+        :rtype: str
+        """
+        template = cls._literal_pattern.sub("?", query)
+        template = cls._placeholder_list_pattern.sub("?", template)
+        return re.sub(r"\s+", " ", template).strip()
+
+    def record(self, query: str, elapsed: float, n_rows: int, source: str = ""):
+        """Record one query execution
+
+        :param query: the SQL query
+        :type query: str
+        :param elapsed: wall time of the execution (including fetch); unit seconds
+        :type elapsed: float
+        :param n_rows: number of rows returned
+        :type n_rows: int
+        :param source: name of the database the query was executed on
+        :type source: str, optional
+        """
+        template = self.to_template(query)
+        with self._lock:
+            stat = self.stats.get(template)
+            if stat is None:
+                stat = {
+                    "source": source,
+                    "calls": 0,
+                    "rows": 0,
+                    "total_time": 0.0,
+                    "max_time": 0.0,
+                }
+                self.stats[template] = stat
+            stat["calls"] += 1
+            stat["rows"] += n_rows
+            stat["total_time"] += elapsed
+            stat["max_time"] = max(stat["max_time"], elapsed)
+
+    def reset(self):
+        """Clear all the recorded statistics"""
+        with self._lock:
+            self.stats = {}
+
+    def top(self, top_n: int = 10, sort_by: str = "total_time") -> list[tuple[str, dict]]:
+        """The top templates, sorted in decreasing order
+
+        :param top_n: number of templates to return, defaults to 10
+        :type top_n: int, optional
+        :param sort_by: statistic to sort on (total_time, calls, rows or max_time), defaults to "total_time"
+        :type sort_by: str, optional
+        :return: a list of (template, statistics) tuples
+        :rtype: list[tuple[str, dict]]
+        """
+        with self._lock:
+            items = [(template, dict(stat)) for template, stat in self.stats.items()]
+        if items and sort_by not in items[0][1]:
+            raise ValueError(f"Cannot sort on {sort_by}")
+        items.sort(key=lambda item: item[1][sort_by], reverse=True)
+        return items[:top_n]
+
+    def report(self, top_n: int = 10, sort_by: str = "total_time") -> str:
+        """Human readable report of the top templates
+
+        :param top_n: number of templates to report, defaults to 10
+        :type top_n: int, optional
+        :param sort_by: statistic to sort on, defaults to "total_time"
+        :type sort_by: str, optional
+        :return: the report
+        :rtype: str
+        """
+        with self._lock:
+            total_time = sum(stat["total_time"] for stat in self.stats.values())
+            total_calls = sum(stat["calls"] for stat in self.stats.values())
+            n_templates = len(self.stats)
+
+        lines = [
+            f"{total_calls} queries, {n_templates} templates, {total_time:.3f} s total",
+            f"{'total (s)':>10} {'mean (ms)':>10} {'calls':>8} {'rows':>9}  query",
+        ]
+        for template, stat in self.top(top_n, sort_by):
+            mean_ms = 1000 * stat["total_time"] / stat["calls"]
+            lines.append(
+                f"{stat['total_time']:>10.3f} {mean_ms:>10.3f} {stat['calls']:>8} {stat['rows']:>9}  "
+                f"[{stat['source']}] {template}"
+            )
+        return "\n".join(lines)
+
+    def dump_json(self, path: str):
+        """Write all the recorded statistics to a JSON file
+
+        :param path: the output file
+        :type path: str
+        """
+        with self._lock:
+            to_dump = [
+                {"template": template, **stat} for template, stat in self.stats.items()
+            ]
+        to_dump.sort(key=lambda item: item["total_time"], reverse=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(to_dump, f, indent=2, ensure_ascii=False)
+        self.logger.info("Wrote query profile to %s", path)
@@ -0,0 +1,156 @@
+"""Reference tables of PSE exported to a SQLite file
+
+Export the reference tables once (on a machine with the MS Access driver or the Oracle client)::
+
+    python -m andes_migrate.sqlite_reference_helper ./reference.sqlite \
+        --access-file andes_migrate/ref_data/access_template.mdb
+
+and use the file as reference data anywhere::
+
+    ref = SQLiteReferenceHelper("./reference.sqlite")
+
+"""
+import argparse
+import logging
+import sqlite3
+
+from andes_migrate.oracle_helper import OracleHelper
+from andes_migrate.query_profiler import QueryProfiler
+from andes_migrate.sqlite_utils import create_table, description_column_types, insert_rows
+
+# reference tables used by the migration
+REFERENCE_TABLES = [
+    "ENGIN_GENERAL",
+    "ESPECE_NORME",
+    "FUSEAU_HORAIRE",
+    "INDICE_SUIVI_ETAT_STOCK",
+    "NAVIRE",
+    "NORME",
+    "SECTEUR_RELEVE_MOLL",
+    "SOURCE_INFO",
+    "TYPE_ETAT_MOLL",
+    "TYPE_HEURE",
+    "TYPE_LONGUEUR",
+    "TYPE_MESURE_MOLL",
+    "TYPE_PANIER",
+    "TYPE_STRATE_MOLL",
+    "TYPE_STRATIFICATION",
+    "TYPE_TRAIT",
+    "ZONE_GEST_MOLL",
+]
+
+
+def export_reference_sqlite(
+    ref: OracleHelper, sqlite_file: str, tables: list[str] | None = None
+):
+    """Copy reference tables to a SQLite file usable by :class:`SQLiteReferenceHelper`
+
+    The kind of source (MS Access or Oracle) is recorded in the file, as it changes some
+    naming conventions (e.g. STRAP vs STRAP_IML).
+
+    :param ref: the source reference database
+    :type ref: OracleHelper
+    :param sqlite_file: the output SQLite file (existing tables are replaced)
+    :type sqlite_file: str
+    :param tables: tables to copy, defaults to REFERENCE_TABLES
+    :type tables: list[str], optional
+    """
+    logger = logging.getLogger(__name__)
+    con = sqlite3.connect(sqlite_file)
+    try:
+        for table in tables or REFERENCE_TABLES:
+            rows = ref.execute_query(f"SELECT * FROM {table}")
+            columns = [desc[0] for desc in ref.cur.description]
+            types = description_column_types(ref.cur.description)
+            create_table(con, table.upper(), columns, rows, types=types)
+            insert_rows(con, table.upper(), columns, rows)
+            logger.info("Exported %s rows from %s", len(rows), table)
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS _reference_meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        con.execute(
+            "INSERT OR REPLACE INTO _reference_meta VALUES ('ms_access', ?)",
+            (str(int(ref.ms_access)),),
+        )
+        con.commit()
+    finally:
+        con.close()
+
+
+class SQLiteReferenceHelper(OracleHelper):
+    """Reference data read from a SQLite export of the PSE reference tables
+
+    Same interface as :class:`~andes_migrate.oracle_helper.OracleHelper`, without needing
+    the MS Access driver or the Oracle client. The tables are always preloaded, so
+    lookups match like the exported source did (e.g. case-insensitive for MS Access).
+
+    :param sqlite_file: path to the SQLite file, see :func:`export_reference_sqlite`
+    :type sqlite_file: str
+    :param ms_access: use the MS Access naming conventions, defaults to the source recorded in the file
+    :type ms_access: bool, optional
+    :param profiler: records the timing of the executed queries, defaults to None
+    :type profiler: QueryProfiler, optional
+    """
+
+    def __init__(
+        self,
+        sqlite_file: str,
+        ms_access: bool | None = None,
+        profiler: QueryProfiler | None = None,
+    ):
+        self.sqlite_file = sqlite_file
+        super().__init__(profiler=profiler, preload=True)
+        if ms_access is not None:
+            self.ms_access = ms_access
+        else:
+            # needed before the first query (e.g. to name the STRAP norm)
+            self.ms_access = self._read_source_kind()
+
+    def _read_source_kind(self) -> bool:
+        """True if the file was exported from MS Access"""
+        con = sqlite3.connect(self.sqlite_file)
+        try:
+            result = con.execute(
+                "SELECT value FROM _reference_meta WHERE key='ms_access'"
+            ).fetchall()
+        except sqlite3.OperationalError:
+            result = []
+        finally:
+            con.close()
+        if not len(result) == 1:
+            self.logger.error(
+                "Cannot tell the source of %s, please specify ms_access", self.sqlite_file
+            )
+            raise ValueError
+        return bool(int(result[0][0]))
+
+    def _connect(self):
+        self.con = sqlite3.connect(
+            self.sqlite_file, detect_types=sqlite3.PARSE_DECLTYPES
+        )
+        self.cur = self.con.cursor()
+        print("Successfully connected to SQlite reference file")
+
+    def _execute_query(self, query: str):
+        try:
+            return self.cur.execute(query).fetchall()
+        except Exception as exc:
+            self.logger.error("Error to executing query: %s", query)
+            raise exc
+
+    def execute_statement(self, statement: str):
+        return self._execute_query(statement)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export the PSE reference tables to a SQLite file"
+    )
+    parser.add_argument("sqlite_file", help="output SQLite file")
+    parser.add_argument(
+        "--access-file", help="export from this MS Access file instead of Oracle"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    export_reference_sqlite(OracleHelper(access_file=args.access_file), args.sqlite_file)
@@ -0,0 +1,230 @@
+import sqlite3
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Iterable, Sequence
+
+import oracledb
+from mysql.connector import FieldType
+
+# mysql.connector type codes -> declared SQLite type
+# (BLOB and TEXT columns share their type codes, they are left to the inference)
+_MYSQL_TYPES = {
+    **dict.fromkeys(
+        [FieldType.TINY, FieldType.SHORT, FieldType.LONG, FieldType.INT24,
+         FieldType.LONGLONG, FieldType.YEAR, FieldType.BIT],
+        "INTEGER",
+    ),
+    **dict.fromkeys(
+        [FieldType.FLOAT, FieldType.DOUBLE, FieldType.DECIMAL, FieldType.NEWDECIMAL],
+        "REAL",
+    ),
+    FieldType.DATETIME: "timestamp",
+    FieldType.TIMESTAMP: "timestamp",
+    FieldType.DATE: "date",
+    **dict.fromkeys(
+        [FieldType.VAR_STRING, FieldType.STRING, FieldType.VARCHAR, FieldType.ENUM,
+         FieldType.SET, FieldType.JSON, FieldType.TIME],
+        "TEXT",
+    ),
+}
+
+# oracledb type codes -> declared SQLite type (NUMBER depends on its scale, see description_column_types)
+_ORACLE_TYPES = {
+    oracledb.DB_TYPE_BINARY_FLOAT: "REAL",
+    oracledb.DB_TYPE_BINARY_DOUBLE: "REAL",
+    oracledb.DB_TYPE_BINARY_INTEGER: "INTEGER",
+    **dict.fromkeys(
+        [oracledb.DB_TYPE_DATE, oracledb.DB_TYPE_TIMESTAMP, oracledb.DB_TYPE_TIMESTAMP_LTZ,
+         oracledb.DB_TYPE_TIMESTAMP_TZ],
+        "timestamp",
+    ),
+    **dict.fromkeys(
+        [oracledb.DB_TYPE_VARCHAR, oracledb.DB_TYPE_CHAR, oracledb.DB_TYPE_NVARCHAR,
+         oracledb.DB_TYPE_NCHAR, oracledb.DB_TYPE_LONG, oracledb.DB_TYPE_CLOB, oracledb.DB_TYPE_NCLOB],
+        "TEXT",
+    ),
+    **dict.fromkeys([oracledb.DB_TYPE_RAW, oracledb.DB_TYPE_LONG_RAW, oracledb.DB_TYPE_BLOB], "BLOB"),
+}
+
+# marks the files written by andes_extract, whose timestamp and date columns are typed
+EXTRACT_META_TABLE = "_andes_extract"
+
+
+def _convert_timestamp(value: bytes) -> datetime:
+    # unlike the (deprecated) default converter of sqlite3, reads the time zone offsets
+    return datetime.fromisoformat(value.decode())
+
+
+def _convert_date(value: bytes) -> date:
+    return date.fromisoformat(value.decode())
+
+
+# used by the connections with detect_types=sqlite3.PARSE_DECLTYPES, instead of the sqlite3 defaults
+sqlite3.register_converter("timestamp", _convert_timestamp)
+sqlite3.register_converter("date", _convert_date)
+
+
+def is_andes_extract(sqlite_file: str) -> bool:
+    """True if the SQLite file was written by :func:`~andes_migrate.andes_extract.extract_cruise`
+
+    :param sqlite_file: path to the SQLite file
+    :type sqlite_file: str
+    """
+    con = sqlite3.connect(sqlite_file)
+    try:
+        return con.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name=?", (EXTRACT_META_TABLE,)
+        ).fetchone()[0] > 0
+    finally:
+        con.close()
+
+
+def to_sqlite_value(value):
+    """Convert a value fetched from MySQL/Oracle/Access to one sqlite3 can bind
+
+    Dates and datetimes are stored in ISO format, which is what the ``date`` and ``timestamp``
+    converters registered by this module expect (see ``detect_types=sqlite3.PARSE_DECLTYPES``).
+
+    :param value: the value to convert
+    :return: the converted value
+    """
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        # bool is an int
+        return value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat(" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (time, timedelta)):
+        return str(value)
+    if isinstance(value, bytearray):
+        return bytes(value)
+    if isinstance(value, (set, frozenset)):
+        # MySQL SET columns
+        return ",".join(sorted(value))
+    return str(value)
+
+
+def _python_sqlite_type(python_type: type) -> str:
+    if issubclass(python_type, (bool, int)):
+        return "INTEGER"
+    if issubclass(python_type, (float, Decimal)):
+        return "REAL"
+    if issubclass(python_type, datetime):
+        return "timestamp"
+    if issubclass(python_type, date):
+        return "date"
+    if issubclass(python_type, (bytes, bytearray)):
+        return "BLOB"
+    return "TEXT"
+
+
+def sqlite_column_type(values: Iterable) -> str:
+    """Declared column type matching the first non-null value of a column
+
+    :param values: the values of the column
+    :type values: Iterable
+    :return: the declared type, empty if all the values are null
+    :rtype: str
+    """
+    for value in values:
+        if value is not None:
+            return _python_sqlite_type(type(value))
+    return ""
+
+
+def description_column_types(description: Sequence[Sequence]) -> list[str]:
+    """Declared column types matching the type codes of a DB-API cursor description
+
+    The type codes of pyodbc (Python types), mysql.connector (``FieldType``) and oracledb (``DbType``)
+    are understood, other codes (e.g. sqlite3, which has none) give an empty type.
+
+    :param description: the ``description`` of a cursor
+    :type description: Sequence[Sequence]
+    :return: the declared types, in the order of the columns
+    :rtype: list[str]
+    """
+    types = []
+    for desc in description:
+        type_code = desc[1]
+        if isinstance(type_code, type):
+            types.append(_python_sqlite_type(type_code))
+        elif isinstance(type_code, int):
+            types.append(_MYSQL_TYPES.get(type_code, ""))
+        elif type_code == oracledb.DB_TYPE_NUMBER:
+            # NUMBER(p, 0) is fetched as int, an unconstrained NUMBER as int or float depending on
+            # the value, which the NUMERIC affinity keeps
+            precision, scale = desc[4], desc[5]
+            types.append("INTEGER" if precision and scale == 0 else "NUMERIC")
+        elif type_code in _ORACLE_TYPES:
+            types.append(_ORACLE_TYPES[type_code])
+        else:
+            types.append("")
+    return types
+
+
+def create_table(
+    con: sqlite3.Connection,
+    table: str,
+    columns: Sequence[str],
+    rows: Sequence[Sequence],
+    primary_key: str | None = None,
+    types: Sequence[str] | None = None,
+):
+    """Create a table with the declared column types, or types inferred from the data
+
+    The inferred type of a column without any non-null value in ``rows`` is empty,
+    the declared types (e.g. from :func:`description_column_types`) should be given when known.
+
+    :param con: the SQLite connection
+    :type con: sqlite3.Connection
+    :param table: name of the table
+    :type table: str
+    :param columns: column names
+    :type columns: Sequence[str]
+    :param rows: data used to infer the column types (not inserted)
+    :type rows: Sequence[Sequence]
+    :param primary_key: column to declare as primary key, defaults to None
+    :type primary_key: str, optional
+    :param types: declared column types, empty ones are inferred from ``rows``, defaults to None
+    :type types: Sequence[str], optional
+    """
+    col_defs = []
+    for i, col in enumerate(columns):
+        col_type = types[i] if types and types[i] else sqlite_column_type(row[i] for row in rows)
+        col_def = f'"{col}" {col_type}'.strip()
+        if col == primary_key:
+            col_def += " PRIMARY KEY"
+        col_defs.append(col_def)
+    con.execute(f'DROP TABLE IF EXISTS "{table}"')
+    con.execute(f'CREATE TABLE "{table}" ({", ".join(col_defs)})')
+
+
+def insert_rows(
+    con: sqlite3.Connection,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence],
+) -> int:
+    """Bulk insert rows in a table
+
+    :param con: the SQLite connection
+    :type con: sqlite3.Connection
+    :param table: name of the table
+    :type table: str
+    :param columns: column names, in the same order as the row values
+    :type columns: Sequence[str]
+    :param rows: the rows to insert
+    :type rows: Iterable[Sequence]
+    :return: the number of inserted rows
+    :rtype: int
+    """
+    col_str = ", ".join(f'"{col}"' for col in columns)
+    placeholders = ", ".join("?" * len(columns))
+    cur = con.executemany(
+        f'INSERT INTO "{table}" ({col_str}) VALUES ({placeholders})',
+        ([to_sqlite_value(v) for v in row] for row in rows),
+    )
+    return cur.rowcount
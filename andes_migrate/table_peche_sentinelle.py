@@ -4,7 +4,9 @@ from zoneinfo import ZoneInfo
 
 from pyodbc import DataError
 
+from andes_migrate.merge_writer import NATURAL_KEYS
 from andes_migrate.oracle_helper import OracleHelper
+from andes_migrate.table_writer import TableWriter, cursor_contains
 
 # logging.basicConfig(level=logging.INFO)
 
@@ -21,7 +23,7 @@ class TablePecheSentinelle:
         """_summary_
 
         Args:
-            output_cur (): output cursor for writing data to
+            output_cur (): output cursor for writing data to, or a TableWriter
             ref (OracleHelper | None, optional): _description_. Defaults to None.
         """
         self.logger = logging.getLogger(__name__)
@@ -31,8 +33,11 @@ class TablePecheSentinelle:
         if ref:
             self.reference_data = ref
         else:
-            self.reference_data = OracleHelper()
+            # one (lazily connected) instance for all the tables
+            self.reference_data = OracleHelper.shared()
         self.output_cur = output_cur
+        # MigrationJournal of a resumable run, see ProjetMollusque
+        self.journal = None
 
         self.table_name: str
         self.data = {}
@@ -81,7 +86,10 @@ class TablePecheSentinelle:
             if self._row_idx < len(self._row_list):
                 # increment first,  it'l be adjusted in _get_current_row_pk()
                 self._row_idx += 1
-                self.populate_data()
+                if isinstance(self.output_cur, TableWriter):
+                    self.output_cur.populate(self)
+                else:
+                    self.populate_data()
                 try:
                     self.write_row()
                 except Exception as exc:
@@ -155,6 +163,10 @@ class TablePecheSentinelle:
         raise NotImplementedError
 
     def write_row(self):
+        if isinstance(self.output_cur, TableWriter):
+            self.output_cur.write(self)
+            return
+
         statement = self.get_insert_statement()
         try:
             self.output_cur.execute(statement)
@@ -168,6 +180,28 @@ class TablePecheSentinelle:
         # print(statement)
         # self.output_cur.commit()
 
+    def _checkpoint(self):
+        """Commit the output, and record the current row as completed in the journal
+
+        The row is recorded as pending before the commit, so that a rerun knows to look
+        for it in the output (see `_is_in_output`) if the run stops in between.
+        """
+        pk = self._get_current_row_pk()
+        self.journal.mark_pending(self.table_name, pk)
+        self.output_cur.commit()
+        self.journal.mark_done(self.table_name, pk)
+
+    def _is_in_output(self) -> bool:
+        """True if the current row (``self.data``) is already in the output table
+
+        The row is looked up by its natural key (see ``NATURAL_KEYS``), e.g. to resume
+        a run that stopped between committing the row and recording it in its journal.
+        """
+        key = {col: self.data[col] for col in NATURAL_KEYS[self.table_name]}
+        if isinstance(self.output_cur, TableWriter):
+            return self.output_cur.contains(self.table_name, key)
+        return cursor_contains(self.output_cur, self.table_name, key)
+
     def get_insert_statement(self):
         col_str = [k for k in self.data.keys()]
         col_str = ", ".join(col_str)
@@ -0,0 +1,237 @@
+import logging
+
+# parent tables first, see docs/source/combiner_bd.md
+TABLE_ORDER = [
+    "PROJET_MOLLUSQUE",
+    "TRAIT_MOLLUSQUE",
+    "ENGIN_MOLLUSQUE",
+    "CAPTURE_MOLLUSQUE",
+    "FREQ_LONG_MOLLUSQUE",
+    "BIOMETRIE_MOLLUSQUE",
+    "POIDS_BIOMETRIE",
+]
+
+
+def ordered_tables(table_names) -> list[str]:
+    """Table names sorted parent -> child (following ``TABLE_ORDER``), unknown tables last
+
+    :param table_names: the table names to sort
+    :return: the sorted table names
+    :rtype: list[str]
+    """
+    table_names = list(table_names)
+    known = [t for t in TABLE_ORDER if t in table_names]
+    return known + [t for t in table_names if t not in TABLE_ORDER]
+
+
+def null_if_empty(value):
+    """Value as written: like value_2_string(), empty strings are NULL
+
+    :param value: the value of a column
+    :return: None for an empty string, the value otherwise
+    """
+    if isinstance(value, str) and value == "":
+        return None
+    return value
+
+
+def key_condition(key: dict) -> tuple[str, list]:
+    """WHERE condition matching the rows with these column values, with ``?`` placeholders
+
+    ``col=?`` never matches a NULL: NULL (or empty) values are matched with ``col IS NULL``.
+
+    :param key: column name -> value
+    :type key: dict
+    :return: the condition, and the values to bind
+    :rtype: tuple[str, list]
+    """
+    conditions = []
+    params = []
+    for col, value in key.items():
+        value = null_if_empty(value)
+        if value is None:
+            conditions.append(f"{col} IS NULL")
+        else:
+            conditions.append(f"{col}=?")
+            params.append(value)
+    return " AND ".join(conditions), params
+
+
+def cursor_contains(cur, table_name: str, key: dict) -> bool:
+    """True if a table has a row with these column values, queried with ``?`` placeholders (e.g. pyodbc)
+
+    :param cur: the cursor
+    :param table_name: name of the table
+    :type table_name: str
+    :param key: column name -> value
+    :type key: dict
+    """
+    where, params = key_condition(key)
+    cur.execute(f"SELECT COUNT(*) FROM {table_name} WHERE {where}", params)
+    return cur.fetchall()[0][0] > 0
+
+
+class TableWriter:
+    """Abstract Class
+    Destination of the rows produced by the Peche Sentinelle table objects.
+
+    A TableWriter can be given as ``output_cur`` to any
+    :class:`~andes_migrate.table_peche_sentinelle.TablePecheSentinelle`, instead of a cursor:
+    each row is then handed to :meth:`write` instead of being inserted one statement at a time.
+
+    Need to override :meth:`write_data` by child class
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    def populate(self, table):
+        """Populate the current row of a table object, before it is written
+
+        Writers can override this, e.g. to time the extraction or record its failures.
+
+        :param table: the table object
+        :type table: TablePecheSentinelle
+        """
+        table.populate_data()
+
+    def write(self, table):
+        """Write the current row of a table object
+
+        :param table: the table object, its ``data`` holds the current row
+        :type table: TablePecheSentinelle
+        """
+        self.register_table(table)
+        # the table object re-uses its data dict for every row
+        self.write_data(table.table_name, dict(table.data))
+
+    def register_table(self, table):
+        """Called with the table object before each of its rows is written
+
+        :param table: the table object
+        :type table: TablePecheSentinelle
+        """
+
+    def write_data(self, table_name: str, data: dict):
+        """Write one row
+
+        :param table_name: the destination table
+        :type table_name: str
+        :param data: column name -> value
+        :type data: dict
+        """
+        raise NotImplementedError
+
+    def contains(self, table_name: str, key: dict) -> bool:
+        """True if the output already has a row with these column values, e.g. written by a previous run
+
+        NULL values match NULL values.
+
+        :param table_name: the destination table
+        :type table_name: str
+        :param key: column name -> value, e.g. the natural key of the row
+        :type key: dict
+        """
+        raise NotImplementedError
+
+    def commit(self):
+        """Make the written rows permanent"""
+
+    def rollback(self):
+        """Discard the rows written since the last commit"""
+
+    def close(self):
+        """Release the resources held by the writer"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
+        finally:
+            self.close()
+
+
+class BufferedTableWriter(TableWriter):
+    """Write the rows with parameterized ``executemany``, ``batch_size`` rows at a time
+
+    Replaces the per-row literal INSERT statements: the rows are buffered per table,
+    and values are bound as parameters (no quoting of the values needed).
+    Before a table is flushed, its parent tables (see ``TABLE_ORDER``) are flushed,
+    so the rows are always inserted parent first.
+
+    :param output_cur: the output cursor (e.g. pyodbc on the output MS Access file)
+    :param batch_size: number of rows inserted per ``executemany``, defaults to 1000
+    :type batch_size: int, optional
+    :param fast_executemany: use the pyodbc ``fast_executemany`` array binding, defaults to True
+    :type fast_executemany: bool, optional
+    """
+
+    def __init__(self, output_cur, batch_size: int = 1000, fast_executemany: bool = True):
+        super().__init__()
+        self.output_cur = output_cur
+        self.batch_size = batch_size
+        if fast_executemany and hasattr(output_cur, "fast_executemany"):
+            output_cur.fast_executemany = True
+        # table name -> (columns, buffered rows)
+        self._buffers: dict[str, tuple[list[str], list[list]]] = {}
+
+    def write_data(self, table_name: str, data: dict):
+        columns = list(data.keys())
+        if table_name in self._buffers and self._buffers[table_name][0] != columns:
+            self.flush(table_name)
+        if table_name not in self._buffers:
+            self._buffers[table_name] = (columns, [])
+        row = [null_if_empty(v) for v in data.values()]
+        self._buffers[table_name][1].append(row)
+        if len(self._buffers[table_name][1]) >= self.batch_size:
+            self.flush(table_name)
+
+    def _flush_table(self, table_name: str):
+        columns, rows = self._buffers.pop(table_name)
+        if not rows:
+            return
+        col_str = ", ".join(columns)
+        placeholders = ", ".join("?" * len(columns))
+        statement = f"INSERT INTO {table_name} ({col_str}) VALUES ({placeholders})"
+        try:
+            self.output_cur.executemany(statement, rows)
+        except Exception as exc:
+            self.logger.error("Could not insert %s rows in %s", len(rows), table_name)
+            raise exc
+
+    def flush(self, table_name: str | None = None):
+        """Insert the buffered rows
+
+        :param table_name: only flush this table (and its parents), defaults to None (all tables)
+        :type table_name: str, optional
+        """
+        tables = ordered_tables(self._buffers.keys())
+        if table_name is not None:
+            if table_name in TABLE_ORDER:
+                parents = TABLE_ORDER[: TABLE_ORDER.index(table_name)]
+                tables = [t for t in tables if t in parents] + [table_name]
+            else:
+                tables = [table_name]
+        for table in tables:
+            if table in self._buffers:
+                self._flush_table(table)
+
+    def contains(self, table_name: str, key: dict) -> bool:
+        self.flush(table_name)
+        return cursor_contains(self.output_cur, table_name, key)
+
+    def commit(self):
+        self.flush()
+        self.output_cur.commit()
+
+    def rollback(self):
+        self._buffers.clear()
+        self.output_cur.rollback()
+
+    def close(self):
+        self.flush()
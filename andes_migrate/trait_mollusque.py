@@ -23,9 +23,70 @@ from andes_migrate.decorators import (
 class TraitMollusque(TablePecheSentinelle):
     """
     Object model representing the TRAIT_MOLLUSQUE table
+
+    With `snapshot=True`, all the shared_models_set columns (and set operations) needed by the getters
+    are loaded for the whole cruise in two queries by `_init_rows`,
+    and the getters read from this in-memory record instead of querying Andes for each set.
+
+    If the project has a journal, the sets completed by a previous run are skipped,
+    and the output is committed each time a set (and all its children) is done,
+    i.e., when the next set is requested.
     """
 
-    def __init__(self, andes_db: AndesHelper, proj: ProjetMollusque, *args, **kwargs):
+    # shared_models_set columns (and many-to-one relations) needed by the getters
+    _set_columns = {
+        "set_number": "shared_models_set.set_number",
+        "start_date": "shared_models_set.start_date",
+        "end_date": "shared_models_set.end_date",
+        "start_latitude": "shared_models_set.start_latitude",
+        "end_latitude": "shared_models_set.end_latitude",
+        "start_longitude": "shared_models_set.start_longitude",
+        "end_longitude": "shared_models_set.end_longitude",
+        "start_depth_m": "shared_models_set.start_depth_m",
+        "remarks": "shared_models_set.remarks",
+        "trawl_cable_length": "shared_models_set.trawl_cable_length",
+        "fill_percent": "shared_models_set.fill_percent",
+        "station_name": "shared_models_station.name",
+        "set_result_code": "shared_models_setresult.code",
+        "gear_type_code": "shared_models_geartype.code",
+        "auxiliary_equipment_code": "shared_models_auxiliaryequipment.code",
+        "area_of_operation": "shared_models_cruise.area_of_operation",
+        "stratification_type_description": "shared_models_stratificationtype.description_fra",
+    }
+
+    # joins needed to reach the above columns from shared_models_set (order matters)
+    _set_joins = {
+        "shared_models_station": (
+            "LEFT JOIN shared_models_station "
+            "ON shared_models_set.station_id=shared_models_station.id "
+        ),
+        "shared_models_setresult": (
+            "LEFT JOIN shared_models_setresult "
+            "ON shared_models_set.set_result_id=shared_models_setresult.id "
+        ),
+        "shared_models_geartype": (
+            "LEFT JOIN shared_models_geartype "
+            "ON shared_models_set.gear_type_id=shared_models_geartype.id "
+        ),
+        "shared_models_auxiliaryequipment": (
+            "LEFT JOIN shared_models_auxiliaryequipment "
+            "ON shared_models_set.auxiliary_equipment_id=shared_models_auxiliaryequipment.id "
+        ),
+        "shared_models_cruise": (
+            "LEFT JOIN shared_models_cruise "
+            "ON shared_models_set.cruise_id=shared_models_cruise.id "
+        ),
+        "shared_models_stratificationtype": (
+            "LEFT JOIN shared_models_stratificationtype "
+            "ON shared_models_cruise.stratification_type_id=shared_models_stratificationtype.id "
+        ),
+    }
+    # joins of the above that go through another joined table
+    _set_join_parents = {
+        "shared_models_stratificationtype": "shared_models_cruise",
+    }
+
+    def __init__(self, andes_db: AndesHelper, proj: ProjetMollusque, *args, snapshot: bool = False, **kwargs):
         # super().__init__(*args, **kwargs)
         super().__init__(*args, ref=proj.reference_data, **kwargs)
 
@@ -33,7 +94,47 @@ class TraitMollusque(TablePecheSentinelle):
         self.proj: ProjetMollusque = proj
         self.table_name = "TRAIT_MOLLUSQUE"
 
+        self.snapshot = snapshot
+        # set_id -> {column: value}, only populated in snapshot mode
+        self._set_snapshot: dict[int, dict] | None = None
+        # set_id -> names of the set operations, only populated in snapshot mode
+        self._set_operations: dict[int, list] | None = None
+
+        self.journal = proj.journal
         self._init_rows()
+        if self.journal is not None:
+            self._skip_completed_sets()
+
+    def _skip_completed_sets(self):
+        """Remove the sets committed by a previous run from self._row_list
+
+        A set left pending by the previous run (stopped while committing it) is
+        skipped if its trait is in the output, and written again otherwise.
+        """
+        for idx, set_pk in enumerate(self._row_list):
+            if self.journal.is_pending(self.table_name, set_pk):
+                self._row_idx = idx + 1
+                self.populate_data()
+                if self._is_in_output():
+                    self.journal.mark_done(self.table_name, set_pk)
+        self._row_idx = 0
+        self.data = {}
+
+        n_sets = len(self._row_list)
+        self._row_list = [
+            set_pk for set_pk in self._row_list
+            if not self.journal.is_done(self.table_name, set_pk)
+        ]
+        if len(self._row_list) < n_sets:
+            self.logger.info(
+                "Skipping %s sets completed by a previous run", n_sets - len(self._row_list)
+            )
+
+    def __next__(self):
+        if self.journal is not None and self._row_idx:
+            # the previous set and all its children are written
+            self._checkpoint()
+        return super().__next__()
 
     def _init_rows(self):
         """Initialisation method
@@ -46,21 +147,101 @@ class TraitMollusque(TablePecheSentinelle):
         self._row_list will be populated with the associated Andes set ids for the current mission
         self._row_idx will start at 0
 
+        In snapshot mode, see `_init_snapshot`
+
         """
+        if self.snapshot:
+            self._init_snapshot()
+            return
+
         query = (
             "SELECT shared_models_set.id "
             "FROM shared_models_set "
-            f"WHERE shared_models_set.cruise_id={self.proj._get_current_row_pk()} "
+            "WHERE shared_models_set.cruise_id=? "
             "ORDER BY shared_models_set.id ASC "
         )
 
-        result = self.andes_db.execute_query(query)
+        result = self.andes_db.execute_query(query, (self.proj._get_current_row_pk(),))
         self._assert_not_empty(result)
 
         # a list of all the Set pk's (need to unpack a bit)
         self._row_list = [set[0] for set in result]
         self._row_idx = 0
 
+    def _init_snapshot(self):
+        """Snapshot initialisation method
+        Loads every needed shared_models_set column (joined to station, set result,
+        gear type, auxiliary equipment and stratification) for the whole cruise in one query,
+        and the set operations in a second one.
+
+        After running this methods initialises the following attribute:
+        self._set_snapshot (set_id -> {column: value})
+        self._set_operations (set_id -> [operation name, ...])
+        self._row_list
+        self._row_idx (hopefully to self._row_idx=0)
+
+        """
+        columns = list(self._set_columns.keys())
+        query = (
+            "SELECT shared_models_set.id, "
+            + ", ".join(self._set_columns[column] for column in columns)
+            + " FROM shared_models_set "
+            + "".join(self._set_joins.values())
+            + "WHERE shared_models_set.cruise_id=? "
+            "ORDER BY shared_models_set.id ASC "
+        )
+
+        result = self.andes_db.execute_query(query, (self.proj._get_current_row_pk(),))
+        self._assert_not_empty(result)
+
+        self._set_snapshot = {row[0]: dict(zip(columns, row[1:])) for row in result}
+        self._row_list = [row[0] for row in result]
+        self._row_idx = 0
+
+        query = (
+            "SELECT shared_models_set.id, shared_models_operation.name "
+            "FROM shared_models_set "
+            "LEFT JOIN shared_models_set_operations "
+            "ON shared_models_set_operations.set_id = shared_models_set.id "
+            "LEFT JOIN shared_models_operation "
+            "ON shared_models_operation.id = shared_models_set_operations.operation_id "
+            "WHERE shared_models_set.cruise_id=? "
+        )
+        result = self.andes_db.execute_query(query, (self.proj._get_current_row_pk(),))
+        self._set_operations = {}
+        for set_pk, operation in result:
+            self._set_operations.setdefault(set_pk, []).append((operation,))
+
+    def _get_set_value(self, column: str):
+        """Get a column of the current set (see `_set_columns` for the available columns)
+
+        In snapshot mode, the value is read from the in-memory record,
+        otherwise the Andes DB is queried for the current set.
+
+        :param column: The column name, one of the keys of `_set_columns`
+        :type column: str
+        :return: the value of the column for the current set
+        """
+        set_pk = self._get_current_row_pk()
+        if self._set_snapshot is not None:
+            return self._set_snapshot[set_pk][column]
+
+        expression = self._set_columns[column]
+        table = expression.split(".")[0]
+        joins = []
+        while table in self._set_joins:
+            joins.insert(0, self._set_joins[table])
+            table = self._set_join_parents.get(table)
+        query = (
+            f"SELECT {expression} "
+            "FROM shared_models_set "
+            + "".join(joins)
+            + "WHERE shared_models_set.id=? "
+        )
+        result = self.andes_db.execute_query(query, (set_pk,))
+        self._assert_one(result)
+        return result[0][0]
+
     def populate_data(self):
         """Populate data: run all getters"""
 
@@ -143,15 +324,7 @@ class TraitMollusque(TablePecheSentinelle):
         -----
         shared_models.set.set_number
         """
-        set_pk = self._get_current_row_pk()
-        query = (
-            "SELECT shared_models_set.set_number "
-            "FROM shared_models_set "
-            f"WHERE shared_models_set.id={set_pk} "
-        )
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        to_return = result[0][0]
+        to_return = self._get_set_value("set_number")
         return to_return
 
     @validate_int(not_null=False)
@@ -228,14 +401,19 @@ class TraitMollusque(TablePecheSentinelle):
 
         """
 
-        query = (
-            "SELECT shared_models_cruise.area_of_operation "
-            "FROM shared_models_cruise "
-            f"WHERE shared_models_cruise.id={self.proj._get_current_row_pk()} "
-        )
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        secteur: str = result[0][0]
+        if self._set_snapshot is not None:
+            secteur: str = self._get_set_value("area_of_operation")
+        else:
+            query = (
+                "SELECT shared_models_cruise.area_of_operation "
+                "FROM shared_models_cruise "
+                "WHERE shared_models_cruise.id=? "
+            )
+            result = self.andes_db.execute_query(
+                query, (self.proj._get_current_row_pk(),)
+            )
+            self._assert_one(result)
+            secteur = result[0][0]
 
         # first char stripped of accents and cast to uppercase
         secteur = unidecode(secteur[0].upper())
@@ -263,16 +441,7 @@ class TraitMollusque(TablePecheSentinelle):
         # a faster way is to get shared_models_set.stratum directly ?
         # but that would be too easy, instead  do the following...
 
-        query = (
-            "SELECT shared_models_station.name "
-            "FROM shared_models_set "
-            "LEFT JOIN shared_models_station "
-            "ON shared_models_set.station_id=shared_models_station.id "
-            f"WHERE shared_models_set.id={self._get_current_row_pk()} "
-        )
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        station_name = str(result[0][0])
+        station_name = str(self._get_set_value("station_name"))
                            
         cod_secteur_releve = self.get_cod_secteur_releve()
         # 1 -> Côte-Nord
@@ -350,15 +519,7 @@ class TraitMollusque(TablePecheSentinelle):
 
         """
 
-        query = f"SELECT shared_models_station.name \
-                FROM shared_models_set \
-                LEFT JOIN shared_models_station \
-                    ON shared_models_set.station_id = shared_models_station.id \
-                WHERE shared_models_set.id={self._get_current_row_pk()};"
-
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        to_return = result[0][0]
+        to_return = self._get_set_value("station_name")
         # extract all non-numerical chacters
         to_return = "".join(c for c in to_return if c.isnumeric())
         return to_return
@@ -394,16 +555,19 @@ class TraitMollusque(TablePecheSentinelle):
 
         # first, need to know what kind of set operations this is
         # One could lookup directly the operation with the set_id, but this seems more proper...
-        query = (
-            "SELECT shared_models_operation.name "
-            "FROM shared_models_set "
-            "LEFT JOIN shared_models_set_operations "
-            "ON shared_models_set_operations.set_id = shared_models_set.id "
-            "LEFT JOIN shared_models_operation "
-            "ON shared_models_operation.id = shared_models_set_operations.operation_id "
-            f"WHERE shared_models_set.id={self._get_current_row_pk()} "
-        )
-        result = self.andes_db.execute_query(query)
+        if self._set_operations is not None:
+            result = self._set_operations[self._get_current_row_pk()]
+        else:
+            query = (
+                "SELECT shared_models_operation.name "
+                "FROM shared_models_set "
+                "LEFT JOIN shared_models_set_operations "
+                "ON shared_models_set_operations.set_id = shared_models_set.id "
+                "LEFT JOIN shared_models_operation "
+                "ON shared_models_operation.id = shared_models_set_operations.operation_id "
+                "WHERE shared_models_set.id=? "
+            )
+            result = self.andes_db.execute_query(query, (self._get_current_row_pk(),))
         self._assert_one(result)
         operation = result[0][0]
 
@@ -420,16 +584,21 @@ class TraitMollusque(TablePecheSentinelle):
 
         # For Fishing, need to lookup stratificatointype
         elif operation == 'Fishing':
-            query = (
-                f"SELECT shared_models_stratificationtype.description_fra "
-                "FROM shared_models_cruise "
-                "LEFT JOIN shared_models_stratificationtype "
-                "ON shared_models_cruise.stratification_type_id = shared_models_stratificationtype.id "
-                f"WHERE shared_models_cruise.id={self.proj._get_current_row_pk()} "
-            )
-            result = self.andes_db.execute_query(query)
-            self._assert_one(result)
-            desc = result[0][0]
+            if self._set_snapshot is not None:
+                desc = self._get_set_value("stratification_type_description")
+            else:
+                query = (
+                    "SELECT shared_models_stratificationtype.description_fra "
+                    "FROM shared_models_cruise "
+                    "LEFT JOIN shared_models_stratificationtype "
+                    "ON shared_models_cruise.stratification_type_id = shared_models_stratificationtype.id "
+                    "WHERE shared_models_cruise.id=? "
+                )
+                result = self.andes_db.execute_query(
+                    query, (self.proj._get_current_row_pk(),)
+                )
+                self._assert_one(result)
+                desc = result[0][0]
             
             andes_2_oracle_map = {
                 "Échantillonnage aléatoire": "Aléatoire simple",
@@ -467,14 +636,7 @@ class TraitMollusque(TablePecheSentinelle):
         Code lookup
 
         """
-        query = f"SELECT shared_models_setresult.code \
-                FROM shared_models_set \
-                LEFT JOIN shared_models_setresult \
-                    ON shared_models_set.set_result_id = shared_models_setresult.id \
-                WHERE shared_models_set.id={self._get_current_row_pk()};"
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        to_return = result[0][0]
+        to_return = self._get_set_value("set_result_code")
 
         # this ia a weird one...
         # see issue #1237
@@ -567,12 +729,7 @@ class TraitMollusque(TablePecheSentinelle):
         The code lookup is then made on the value "Avancée" or "Normale"
 
         """
-        query = f"SELECT shared_models_set.start_date \
-                FROM shared_models_set \
-                WHERE shared_models_set.id={self._get_current_row_pk()};"
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        dt = result[0][0]
+        dt = self._get_set_value("start_date")
         # if no start date, stop trying to find a cod_stype_heure, just return none
         if dt is None:
             return None
@@ -609,12 +766,7 @@ class TraitMollusque(TablePecheSentinelle):
         The code lookup is then made on the value "Quebec"
 
         """
-        query = f"SELECT shared_models_set.start_date \
-                FROM shared_models_set \
-                WHERE shared_models_set.id={self._get_current_row_pk()};"
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        dt = result[0][0]
+        dt = self._get_set_value("start_date")
 
         # if no start date, stop trying to find a cod_fuseau_horaire, just return none
         if dt is None:
@@ -668,12 +820,7 @@ class TraitMollusque(TablePecheSentinelle):
         Andes: shared_models_set.start_latitude
 
         """
-        query = f"SELECT shared_models_set.start_latitude \
-                FROM shared_models_set \
-                WHERE shared_models_set.id={self._get_current_row_pk()};"
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        to_return = result[0][0]
+        to_return = self._get_set_value("start_latitude")
         # convert to Oracle coord encoding
         to_return = OracleHelper._to_oracle_coord(to_return)
         return to_return
@@ -688,12 +835,7 @@ class TraitMollusque(TablePecheSentinelle):
         Andes: shared_models_set.end_latitude
 
         """
-        query = f"SELECT shared_models_set.end_latitude \
-                FROM shared_models_set \
-                WHERE shared_models_set.id={self._get_current_row_pk()};"
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        to_return = result[0][0]
+        to_return = self._get_set_value("end_latitude")
         # convert to Oracle coord encoding
         to_return = OracleHelper._to_oracle_coord(to_return)
         return to_return
@@ -707,12 +849,7 @@ class TraitMollusque(TablePecheSentinelle):
         Andes: shared_models_set.start_longitude
 
         """
-        query = f"SELECT shared_models_set.start_longitude \
-                FROM shared_models_set \
-                WHERE shared_models_set.id={self._get_current_row_pk()};"
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        to_return = result[0][0]
+        to_return = self._get_set_value("start_longitude")
         
         # return right away if None
         if to_return is None:
@@ -733,12 +870,7 @@ class TraitMollusque(TablePecheSentinelle):
         Andes: shared_models_set.end_longitude
 
         """
-        query = f"SELECT shared_models_set.end_longitude \
-                FROM shared_models_set \
-                WHERE shared_models_set.id={self._get_current_row_pk()};"
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        to_return = result[0][0]
+        to_return = self._get_set_value("end_longitude")
 
         # return right away if None
         if to_return is None:
@@ -906,12 +1038,7 @@ class TraitMollusque(TablePecheSentinelle):
         Andes: shared_models_set.start_depth_m
 
         """
-        query = f"SELECT shared_models_set.start_depth_m \
-                FROM shared_models_set \
-                WHERE shared_models_set.id={self._get_current_row_pk()};"
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        to_return = result[0][0]
+        to_return = self._get_set_value("start_depth_m")
         return to_return
 
     @tag(HardCoded)
@@ -939,12 +1066,7 @@ class TraitMollusque(TablePecheSentinelle):
         Andes: shared_models_set.start_depth_m
 
         """
-        query = f"SELECT shared_models_set.start_depth_m \
-                FROM shared_models_set \
-                WHERE shared_models_set.id={self._get_current_row_pk()};"
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        to_return = result[0][0]
+        to_return = self._get_set_value("start_depth_m")
         return to_return
 
     @tag(HardCoded)
@@ -971,19 +1093,12 @@ class TraitMollusque(TablePecheSentinelle):
         Andes: shared_models_set.remarks
 
         """
-        query = f"SELECT shared_models_set.remarks \
-                FROM shared_models_set \
-                WHERE shared_models_set.id={self._get_current_row_pk()};"
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        to_return = str(result[0][0])
+        to_return = str(self._get_set_value("remarks"))
 
         # need to remove line breaks and carriage-returns
         # only because it currupts de .dat files,
         to_return = to_return.replace('\n', ' ')
         to_return = to_return.replace('\r', ' ')
-        # need to escape single quotes because it corrupts the SQL statements
-        to_return = to_return.replace('\'', '\'\'')
         return to_return
 
     @validate_int(not_null=False)
@@ -1011,12 +1126,7 @@ class TraitMollusque(TablePecheSentinelle):
 
         """
 
-        query = f"SELECT shared_models_set.start_date \
-                FROM shared_models_set \
-                WHERE shared_models_set.id={self._get_current_row_pk()};"
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        dt = result[0][0]
+        dt = self._get_set_value("start_date")
         if type(dt) == datetime.datetime:
             (dt_str, timezone_str, is_dst) = TraitMollusque.format_time(dt)
             return dt_str
@@ -1038,12 +1148,7 @@ class TraitMollusque(TablePecheSentinelle):
 
         """
 
-        query = f"SELECT shared_models_set.end_date \
-                FROM shared_models_set \
-                WHERE shared_models_set.id={self._get_current_row_pk()};"
-        result = self.andes_db.execute_query(query)
-        self._assert_one(result)
-        dt = result[0][0]
+        dt = self._get_set_value("end_date")
         if type(dt) == datetime.datetime:
             (dt_str, timezone_str, is_dst) = TraitMollusque.format_time(dt)
             return dt_str
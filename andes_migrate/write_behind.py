@@ -0,0 +1,122 @@
+import queue
+import threading
+
+from andes_migrate.table_writer import TableWriter, cursor_contains
+
+
+class WriteBehindWriter(TableWriter):
+    """Write the rows from a background thread, while the next rows are extracted
+
+    Wraps an output cursor (or another :class:`~andes_migrate.table_writer.TableWriter`),
+    which is then only used by the writer thread. The rows are handed over through a queue
+    of at most ``max_pending`` rows: when the output is slower than the extraction,
+    the table iterators wait for room in the queue.
+
+    An error raised by the writer thread is raised again by the next call made
+    by the producing thread (:meth:`write`, :meth:`flush`, :meth:`commit`...),
+    and the rows queued after it are discarded (until :meth:`rollback`).
+
+    :meth:`commit` and :meth:`rollback` wait for all the queued rows to be processed::
+
+        with WriteBehindWriter(output_cur) as output:
+            proj = ProjetMollusque(andes_db, output, ref=ref, zone=zone, no_notif=no_notif, espece=espece)
+            ...
+
+    :param output: the output cursor, or a TableWriter
+    :param max_pending: maximum number of queued rows, defaults to 1000
+    :type max_pending: int, optional
+    """
+
+    def __init__(self, output, max_pending: int = 1000):
+        super().__init__()
+        self.output = output
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._error: Exception | None = None
+        self._thread = threading.Thread(
+            target=self._run, name="write_behind", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                method, args = item
+                # after an error, only rollback and close are still done
+                if self._error is None or method in ("rollback", "close"):
+                    getattr(self.output, method)(*args)
+            except Exception as exc:
+                self.logger.error("Could not %s %s: %s", item[0], item[1], exc)
+                self._error = exc
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error = self._error
+            self._error = None
+            raise error
+
+    def _submit(self, method: str, *args):
+        self._raise_error()
+        if not self._thread.is_alive():
+            raise ValueError("The writer is closed")
+        self._queue.put((method, args))
+
+    def populate(self, table):
+        if isinstance(self.output, TableWriter):
+            # done by this thread, like register_table()
+            self.output.populate(table)
+        else:
+            table.populate_data()
+
+    def write(self, table):
+        if isinstance(self.output, TableWriter):
+            # done by this thread, the table object is not used by the writer thread
+            self.output.register_table(table)
+            self._submit("write_data", table.table_name, dict(table.data))
+        else:
+            self._submit("execute", table.get_insert_statement())
+
+    def write_data(self, table_name: str, data: dict):
+        self._submit("write_data", table_name, dict(data))
+
+    def flush(self):
+        """Wait until all the queued rows are written"""
+        self._queue.join()
+        self._raise_error()
+
+    def contains(self, table_name: str, key: dict) -> bool:
+        """Wait until all the queued rows are written, and look for the row in the output"""
+        self.flush()
+        if not self._thread.is_alive():
+            raise ValueError("The writer is closed")
+        # the writer thread is idle until the next row is queued
+        if isinstance(self.output, TableWriter):
+            return self.output.contains(table_name, key)
+        return cursor_contains(self.output, table_name, key)
+
+    def commit(self):
+        self._submit("commit")
+        self.flush()
+
+    def rollback(self):
+        """Discard the rows written since the last commit, and the pending error if any"""
+        if not self._thread.is_alive():
+            # nothing would process the rollback
+            raise ValueError("The writer is closed")
+        self._queue.put(("rollback", ()))
+        self._queue.join()
+        self._error = None
+
+    def close(self):
+        """Write the queued rows, close the wrapped writer and stop the writer thread"""
+        if not self._thread.is_alive():
+            return
+        if isinstance(self.output, TableWriter):
+            self._queue.put(("close", ()))
+        self._queue.put(None)
+        self._thread.join()
+        self._raise_error()
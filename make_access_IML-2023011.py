@@ -1,3 +1,4 @@
+import os
 import shutil
 import pyodbc
 import logging 
@@ -9,6 +10,7 @@ from andes_migrate.trait_mollusque import TraitMollusque
 from andes_migrate.engin_mollusque import EnginMollusque
 from andes_migrate.freq_long_mollusque import FreqLongMollusque
 from andes_migrate.andes_helper import AndesHelper
+from andes_migrate.migration_journal import MigrationJournal
 
 
 logging.basicConfig(level=logging.ERROR)
@@ -29,7 +31,12 @@ SEQ_peche = 151
 
 
 output_fname = f'./{no_notification}.mdb'
-shutil.copyfile('andes_migrate/ref_data/access_template.mdb', output_fname)
+# the output is committed after each trait, a rerun resumes from the first unfinished trait
+# (delete both files to start over)
+journal_fname = f'./{no_notification}.journal.json'
+if not os.path.exists(journal_fname):
+    shutil.copyfile('andes_migrate/ref_data/access_template.mdb', output_fname)
+journal = MigrationJournal(journal_fname, no_notification)
 con = pyodbc.connect(
     f"Driver={{Microsoft Access Driver (*.mdb, *.accdb)}};DBQ={output_fname};"
 )
@@ -38,7 +45,9 @@ output_cur = con.cursor()
 
 # proj = ProjetMollusque(andes_db, output_cur, ref=ref)
 # proj.init_input(zone="20", no_releve=34, no_notif=no_notification, espece="pétoncle")
-proj = ProjetMollusque(andes_db, output_cur, ref=ref, zone=zone, no_notif=no_notification, espece=espece)
+proj = ProjetMollusque(
+    andes_db, output_cur, ref=ref, zone=zone, no_notif=no_notification, espece=espece, journal=journal
+)
 
 
 for p in proj:
@@ -1,3 +1,4 @@
+import os
 import shutil
 import pyodbc
 import logging 
@@ -9,6 +10,7 @@ from andes_migrate.trait_mollusque import TraitMollusque
 from andes_migrate.engin_mollusque import EnginMollusque
 from andes_migrate.freq_long_mollusque import FreqLongMollusque
 from andes_migrate.andes_helper import AndesHelper
+from andes_migrate.migration_journal import MigrationJournal
 
 
 logging.basicConfig(level=logging.ERROR)
@@ -41,7 +43,12 @@ size_class_filter = [vivant_intact_size_class, claquette_ouverte]
 
 
 output_fname = f'./{no_notification}.mdb'
-shutil.copyfile('andes_migrate/ref_data/access_template.mdb', output_fname)
+# the output is committed after each trait, a rerun resumes from the first unfinished trait
+# (delete both files to start over)
+journal_fname = f'./{no_notification}.journal.json'
+if not os.path.exists(journal_fname):
+    shutil.copyfile('andes_migrate/ref_data/access_template.mdb', output_fname)
+journal = MigrationJournal(journal_fname, no_notification)
 con = pyodbc.connect(
     f"Driver={{Microsoft Access Driver (*.mdb, *.accdb)}};DBQ={output_fname};"
 )
@@ -50,7 +57,9 @@ output_cur = con.cursor()
 
 # proj = ProjetMollusque(andes_db, output_cur, ref=ref)
 # proj.init_input(zone="20", no_releve=34, no_notif=no_notification, espece="pétoncle")
-proj = ProjetMollusque(andes_db, output_cur, ref=ref, zone=zone, no_notif=no_notification, espece=espece)
+proj = ProjetMollusque(
+    andes_db, output_cur, ref=ref, zone=zone, no_notif=no_notification, espece=espece, journal=journal
+)
 
 
 for p in proj:
@@ -67,7 +76,9 @@ for p in proj:
             engin = EnginMollusque(trait, output_cur)
             for e in engin:
                 # print(f"Engin: ", e)
-                capture = CaptureMollusque(engin, output_cur, aphia_id_filter=aphia_id_filter, size_class_filter=size_class_filter)
+                capture = CaptureMollusque(
+                    engin, output_cur, aphia_id_filter=aphia_id_filter, size_class_filter=size_class_filter
+                )
                 for c in capture:
                     print(f"Capture: ", c)
 
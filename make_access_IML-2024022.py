@@ -1,3 +1,4 @@
+import os
 import shutil
 import pyodbc
 import logging 
@@ -12,6 +13,7 @@ from andes_migrate.biometrie_mollusque import BiometrieMollusque
 from andes_migrate.poids_biometrie import PoidsBiometrie
 
 from andes_migrate.andes_helper import AndesHelper
+from andes_migrate.migration_journal import MigrationJournal
 
 
 logging.basicConfig(level=logging.ERROR)
@@ -50,14 +52,21 @@ ANDES_DB_USERPASS = 'NOPE NO PASSWORD HERE'
 
 
 output_fname = f'./{no_notification}.mdb'
-shutil.copyfile('andes_migrate/ref_data/access_template.mdb', output_fname)
+# the output is committed after each trait, a rerun resumes from the first unfinished trait
+# (delete both files to start over)
+journal_fname = f'./{no_notification}.journal.json'
+if not os.path.exists(journal_fname):
+    shutil.copyfile('andes_migrate/ref_data/access_template.mdb', output_fname)
+journal = MigrationJournal(journal_fname, no_notification)
 con = pyodbc.connect(
     f"Driver={{Microsoft Access Driver (*.mdb, *.accdb)}};DBQ={output_fname};"
 )
 output_cur = con.cursor()
 
 
-proj = ProjetMollusque(andes_db, output_cur, ref=ref, zone=zone, no_notif=no_notification, espece=espece)
+proj = ProjetMollusque(
+    andes_db, output_cur, ref=ref, zone=zone, no_notif=no_notification, espece=espece, journal=journal
+)
 
 for p in proj:
     print(f"Projet: ", p)
@@ -0,0 +1,171 @@
+"""Fixtures shared by the tests: a small Andes SQLite cruise, with reference tables from a SQLite export"""
+import datetime
+import random
+import sqlite3
+
+import pytest
+
+from andes_migrate.andes_helper import AndesHelper
+from andes_migrate.sqlite_reference_helper import SQLiteReferenceHelper
+from andes_migrate.sqlite_utils import EXTRACT_META_TABLE
+
+
+def build_andes(path):
+    """A cruise of 6 sets (and a second cruise of 2 sets), with scallop and hermit crab catches
+
+    Marked as written by andes_extract, so its timestamp columns are read as datetime like on MySQL.
+    """
+    con = sqlite3.connect(path)
+    x = con.execute
+    x("CREATE TABLE shared_models_cruise (id integer primary key, mission_number text, description text, "
+      "survey_number integer, vessel_id integer, season integer, stratification_type_id integer, "
+      "start_date text, end_date text, chief_scientist text, targeted_trawl_duration real, "
+      "targeted_trawl_speed real, targeted_trawl_distance real, samplers text, notes text, "
+      "area_of_operation text, sampling_protocol_id integer)")
+    x("INSERT INTO shared_models_cruise VALUES (1, 'IML-2024-008F', 'Évaluation de stocks IML - Pétoncle Minganie', "
+      "34, 1, 2024, 1, '2024-06-01 10:00:00', '2024-06-20 10:00:00', 'Bob', 5.0, 2.0, 0.17, 'Patrick, Sandy', "
+      "'it''s a note', 'Côte-Nord', 1)")
+    x("INSERT INTO shared_models_cruise VALUES (2, 'IML-2024-009', 'autre', 35, 1, 2024, 1, '2024-07-01 10:00:00', "
+      "'2024-07-20 10:00:00', 'Bob', 5.0, 2.0, 0.17, 'x', 'y', 'Côte-Nord', 1)")
+    x("CREATE TABLE shared_models_vessel (id integer primary key, nbpc text, name text)")
+    x("INSERT INTO shared_models_vessel VALUES (1, '178', 'Leim')")
+    x("CREATE TABLE shared_models_stratificationtype (id integer primary key, code integer, description_fra text)")
+    x("INSERT INTO shared_models_stratificationtype VALUES (1, 8, 'Échantillonnage aléatoire')")
+    x("CREATE TABLE shared_models_station (id integer primary key, name text)")
+    x("CREATE TABLE shared_models_setresult (id integer primary key, code text)")
+    for code in range(1, 7):
+        x("INSERT INTO shared_models_setresult VALUES (?, ?)", (code, str(code)))
+    x("CREATE TABLE shared_models_operation (id integer primary key, name text)")
+    x("INSERT INTO shared_models_operation VALUES (1, 'Fishing'), (2, 'CTD')")
+    x("CREATE TABLE shared_models_geartype (id integer primary key, code integer)")
+    x("INSERT INTO shared_models_geartype VALUES (1, 57), (2, 58)")
+    x("CREATE TABLE shared_models_auxiliaryequipment (id integer primary key, code integer)")
+    x("INSERT INTO shared_models_auxiliaryequipment VALUES (1, 1), (2, 2)")
+    x("CREATE TABLE shared_models_set (id integer primary key, cruise_id integer, set_number integer, "
+      "station_id integer, set_result_id integer, start_date timestamp, end_date timestamp, "
+      "start_latitude real, end_latitude real, start_longitude real, end_longitude real, start_depth_m real, "
+      "remarks text, gear_type_id integer, auxiliary_equipment_id integer, trawl_cable_length real, "
+      "fill_percent real)")
+    x("CREATE TABLE shared_models_set_operations (id integer primary key, set_id integer, operation_id integer)")
+    x("CREATE TABLE shared_models_species (id integer primary key, aphia_id integer, code integer)")
+    x("INSERT INTO shared_models_species VALUES (1, 156972, 4179), (2, 140692, 4167), (3, 106854, 2561)")
+    x("CREATE TABLE shared_models_sizeclass (id integer primary key, code integer, description_fra text, "
+      "sampling_protocol_id integer)")
+    x("INSERT INTO shared_models_sizeclass VALUES (1, 0, 'NA', 1), (2, 1, 'Vivant, intact', 1), "
+      "(3, 2, 'Claquette', 1)")
+    x("CREATE TABLE shared_models_relativeabundancecategory (id integer primary key, code integer)")
+    x("INSERT INTO shared_models_relativeabundancecategory VALUES (1, 1), (2, 2)")
+    x("CREATE TABLE shared_models_observationtype (id integer primary key, nom text)")
+    x("INSERT INTO shared_models_observationtype VALUES (7, 'Longueur'), (8, 'Couverture Balanes')")
+    # the category code is an integer, the observation values are strings
+    x("CREATE TABLE shared_models_observationtypecategory (id integer primary key, observation_type_id integer, "
+      "code integer, description_fra text)")
+    x("INSERT INTO shared_models_observationtypecategory VALUES (1, 8, 0, 'Aucune balanes'), (2, 8, 1, '1/3')")
+    x("CREATE TABLE ecosystem_survey_catch (id integer primary key, set_id integer, species_id integer, "
+      "relative_abundance_category_id integer, specimen_count integer, notes text)")
+    x("CREATE TABLE ecosystem_survey_basket (id integer primary key, catch_id integer, size_class integer, "
+      "basket_wt_kg real)")
+    x("CREATE TABLE ecosystem_survey_specimen (id integer primary key, basket_id integer, comment text)")
+    x("CREATE TABLE ecosystem_survey_observation (id integer primary key, specimen_id integer, "
+      "observation_type_id integer, observation_value text)")
+
+    rnd = random.Random(3)
+    catch_id = basket_id = specimen_id = 0
+    observation_id = 1000
+    for set_id in range(1, 9):
+        cruise_id = 1 if set_id <= 6 else 2
+        x("INSERT INTO shared_models_station VALUES (?, ?)", (set_id, f"{'AB'[set_id % 2]}{100 + set_id}"))
+        start = datetime.datetime(2024, 6, 1 + set_id, 12, 30, 0)
+        x("INSERT INTO shared_models_set VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (
+            set_id, cruise_id, set_id, set_id, (set_id % 6) + 1, start, start + datetime.timedelta(minutes=5),
+            50.1 + set_id / 100, 50.11 + set_id / 100, -63.2 - set_id / 100, -63.21 - set_id / 100,
+            20.0 + set_id, f"rem {set_id}\nit's" if not set_id == 3 else None,
+            1 + (set_id % 2), 1 + (set_id % 2), 60.0, 50.0,
+        ))
+        x("INSERT INTO shared_models_set_operations (set_id, operation_id) VALUES (?, 1)", (set_id,))
+        for species_id in (1, 2, 3):
+            catch_id += 1
+            hermit_crab = species_id == 3
+            x("INSERT INTO ecosystem_survey_catch VALUES (?, ?, ?, ?, ?, ?)", (
+                catch_id, set_id, species_id, 1 if hermit_crab else None, 3 if hermit_crab else None, "n",
+            ))
+            if hermit_crab:
+                continue
+            for size_class in (1, 2):
+                basket_id += 1
+                x("INSERT INTO ecosystem_survey_basket VALUES (?, ?, ?, ?)", (basket_id, catch_id, size_class, 1.5))
+                for _ in range(rnd.randint(1, 4)):
+                    specimen_id += 1
+                    x("INSERT INTO ecosystem_survey_specimen VALUES (?, ?, ?)", (specimen_id, basket_id, "c"))
+                    observation_id += 1
+                    x("INSERT INTO ecosystem_survey_observation VALUES (?, ?, ?, ?)", (
+                        observation_id, specimen_id, 7, str(round(rnd.uniform(40, 120), 1)),
+                    ))
+                    observation_id += 1
+                    x("INSERT INTO ecosystem_survey_observation VALUES (?, ?, ?, ?)", (
+                        observation_id, specimen_id, 8, rnd.choice(["0", "0", "1", "2", "3", "NaN"]),
+                    ))
+    x(f"CREATE TABLE {EXTRACT_META_TABLE} (key TEXT PRIMARY KEY, value TEXT)")
+    con.commit()
+    con.close()
+
+
+def build_reference(path):
+    """Reference tables, as exported by export_reference_sqlite from MS Access"""
+    con = sqlite3.connect(path)
+
+    def table(name, columns, rows):
+        con.execute(f"CREATE TABLE {name} ({', '.join(columns)})")
+        con.executemany(f"INSERT INTO {name} VALUES ({', '.join('?' * len(columns))})", rows)
+
+    table("SOURCE_INFO", ["COD_SOURCE_INFO integer", "DESC_SOURCE_INFO_F text"], [
+        (18, "Évaluation de stocks IML - Pétoncle Minganie"),
+        (19, "Évaluation de stocks IML - Pétoncle I de M"),
+        (22, "autre"),
+    ])
+    table("NAVIRE", ["COD_NBPC text"], [("178",), ("999",)])
+    table("INDICE_SUIVI_ETAT_STOCK", ["COD_SERIE_HIST integer", "DESC_SERIE_HIST_F text"], [
+        (16, "Indice d'abondance zone 16F - pétoncle"),
+        (15, "Indice d'abondance zone 16E - pétoncle"),
+    ])
+    table("TYPE_STRATIFICATION", ["COD_TYP_STRATIF integer"], [(7,), (8,)])
+    table("ZONE_GEST_MOLL", ["COD_ZONE_GEST_MOLL integer", "ZONE_GEST_MOLL text"], [
+        (1, "16E"), (2, "16F"), (17, "20"),
+    ])
+    table("SECTEUR_RELEVE_MOLL", ["COD_SECTEUR_RELEVE integer", "SECTEUR_RELEVE text"], [(1, "C"), (4, "I")])
+    table("TYPE_STRATE_MOLL", ["COD_STRATE integer", "STRATE text", "COD_SECTEUR_RELEVE integer"], [
+        (10, "A", 1), (11, "B", 1), (12, "A", 4),
+    ])
+    table("TYPE_TRAIT", ["COD_TYP_TRAIT integer", "DESC_TYP_TRAIT_F text"], [
+        (1, "Aléatoire simple"), (2, "Station fixe"), (3, "Océanographie seulement"),
+    ])
+    table("TYPE_HEURE", ["COD_TYP_HEURE integer", "DESC_TYP_HEURE_F text"], [(0, "Normale"), (1, "Avancée")])
+    table("FUSEAU_HORAIRE", ["COD_FUSEAU_HORAIRE integer", "DESC_FUSEAU_HORAIRE_F text"], [
+        (0, "GMT"), (1, "Québec"),
+    ])
+    table("ENGIN_GENERAL", ["COD_ENG_GEN integer", "NOM_ENG_F text"], [
+        (57, "Drague Digby (4 paniers doublés)"), (58, "Drague Digby (4 paniers non doublés)"),
+    ])
+    table("TYPE_PANIER", ["COD_TYP_PANIER integer", "DESC_TYP_PANIER_F text"], [
+        (0, "Aucun"), (1, "Panier standard"), (2, "Panier doublé"),
+    ])
+    table("TYPE_MESURE_MOLL", ["COD_TYP_MESURE integer", "DESC_TYP_MESURE_F text"], [
+        (1, "Données qualitatives"), (2, "Données quantitatives"),
+    ])
+    table("NORME", ["COD_NORME integer", "NOM_NORME text"], [(1, "AphiaId"), (2, "STRAP")])
+    table("ESPECE_NORME", ["COD_ESP_GEN integer", "COD_NORME integer", "COD_ESPECE text"], [
+        (48, 1, "156972"), (48, 2, "4179"), (50, 1, "140692"), (50, 2, "4167"), (900, 1, "106854"),
+        (900, 2, "2561"),
+    ])
+    table("_reference_meta", ["key text primary key", "value text"], [("ms_access", "1")])
+    con.commit()
+    con.close()
+
+
+@pytest.fixture
+def cruise(tmp_path):
+    andes_file = str(tmp_path / "andes.sqlite")
+    reference_file = str(tmp_path / "reference.sqlite")
+    build_andes(andes_file)
+    build_reference(reference_file)
+    return AndesHelper(sqlite_file=andes_file), SQLiteReferenceHelper(reference_file)
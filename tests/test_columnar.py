@@ -0,0 +1,49 @@
+"""The columnar frames must match the rows of the per-row table iterators
+
+Runs both on a small Andes SQLite cruise, with reference tables from a SQLite export.
+"""
+
+import pytest
+
+from andes_migrate.capture_mollusque import CaptureMollusque
+from andes_migrate.columnar import ColumnarExtractor, compare_frame
+from andes_migrate.dry_run import DryRunWriter
+from andes_migrate.engin_mollusque import EnginMollusque
+from andes_migrate.projet_mollusque import ProjetMollusque
+from andes_migrate.trait_mollusque import TraitMollusque
+
+
+@pytest.mark.parametrize("capture_filters", [
+    {"aphia_id_filter": [156972, 140692, 106854], "size_class_filter": [1, 2]},
+    {},
+    {"aphia_id_filter": [140692]},
+])
+def test_frames_match_rows(cruise, capture_filters):
+    andes_db, ref = cruise
+    output = DryRunWriter()
+    proj = ProjetMollusque(andes_db, output, ref=ref, zone="16F", no_notif="IML-2024-008F", espece="pétoncle")
+    for _ in proj:
+        rows = {"TRAIT": [], "ENGIN": [], "CAPTURE": []}
+        trait = TraitMollusque(andes_db, proj, output)
+        for trait_row in trait:
+            rows["TRAIT"].append(dict(trait_row))
+            engin = EnginMollusque(trait, output)
+            for engin_row in engin:
+                rows["ENGIN"].append(dict(engin_row))
+                capture = CaptureMollusque(engin, output, **capture_filters)
+                for capture_row in capture:
+                    rows["CAPTURE"].append(dict(capture_row))
+        assert output.failures == []
+
+        extractor = ColumnarExtractor(andes_db, proj, **capture_filters)
+        frames = {
+            "TRAIT": extractor.trait_frame(),
+            "ENGIN": extractor.engin_frame(),
+            "CAPTURE": extractor.capture_frame(),
+        }
+        for table_name, frame in frames.items():
+            assert rows[table_name], f"no {table_name} rows to compare"
+            assert compare_frame(frame, rows[table_name]) == [], table_name
+
+        # the scallop catches have barnacle observations
+        assert frames["CAPTURE"]["COD_ABONDANCE_EPIBIONT"].notna().any()
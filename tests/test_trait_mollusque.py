@@ -0,0 +1,36 @@
+"""The set values read by TraitMollusque must not depend on the snapshot mode"""
+import pytest
+
+from andes_migrate.dry_run import DryRunWriter
+from andes_migrate.projet_mollusque import ProjetMollusque
+from andes_migrate.trait_mollusque import TraitMollusque
+
+
+def set_values(andes_db, ref, snapshot):
+    output = DryRunWriter()
+    proj = ProjetMollusque(andes_db, output, ref=ref, zone="16F", no_notif="IML-2024-008F", espece="pétoncle")
+    next(proj)
+    trait = TraitMollusque(andes_db, proj, output, snapshot=snapshot)
+    values = []
+    for row in trait:
+        values.append((
+            {column: trait._get_set_value(column) for column in TraitMollusque._set_columns},
+            dict(row),
+        ))
+    assert output.failures == []
+    return values
+
+
+@pytest.mark.parametrize("snapshot", [False, True])
+def test_set_values(cruise, snapshot):
+    andes_db, ref = cruise
+    values = set_values(andes_db, ref, snapshot)
+    assert len(values) == 6
+    for columns, _ in values:
+        assert columns["area_of_operation"] == "Côte-Nord"
+        assert columns["stratification_type_description"] == "Échantillonnage aléatoire"
+
+
+def test_snapshot_matches_queries(cruise):
+    andes_db, ref = cruise
+    assert set_values(andes_db, ref, snapshot=True) == set_values(andes_db, ref, snapshot=False)